@@ -7,7 +7,7 @@ A comprehensive library for easy and fast 2D game development in Python.
 __version__ = "0.1.0"
 
 # Import core modules
-from .core.game import Game
+from .core.game import Game, get_game
 from .core.scene import Scene
 from .core.game_object import GameObject
 
@@ -25,12 +25,12 @@ from .input import on_key_press, on_mouse_click, on_update
 from .camera import Camera
 
 # AI module
-from .ai import AI, create_ai
+from .ai import AI, AISystem, BehaviorType, create_ai
 
 __all__ = [
-    'Game', 'Scene', 'GameObject',
+    'Game', 'get_game', 'Scene', 'GameObject',
     'create_scene', 'get_current_scene',
     'draw_rectangle', 'draw_circle', 'draw_text', 'draw_image',
     'on_key_press', 'on_mouse_click', 'on_update',
-    'Camera', 'AI', 'create_ai'
+    'Camera', 'AI', 'AISystem', 'BehaviorType', 'create_ai'
 ]
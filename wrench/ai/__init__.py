@@ -4,8 +4,24 @@ Classes and functions for AI and behavior management.
 from typing import Dict, List, Optional, Tuple, Any, Callable
 import random
 import math
+from enum import IntEnum
+import numpy as np
+import pygame
 from ..core.game_object import GameObject
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+class BehaviorType(IntEnum):
+    """AI behavior ids; also the values stored in AISystem.behavior_ids."""
+    IDLE = 0
+    PATROL = 1
+    CHASE = 2
+    WANDER = 3
+    FLEE = 4
+
 class AI:
     """Base AI class that provides different behavior templates."""
     
@@ -16,6 +32,11 @@ class AI:
             behavior_type: AI behavior type (idle, patrol, chase, wander, flee)
             **kwargs: Behavior-specific parameters
         """
+        # Indexed by BehaviorType
+        self._handlers = (
+            self._update_idle, self._update_patrol, self._update_chase,
+            self._update_wander, self._update_flee
+        )
         self.behavior_type = behavior_type
         self.target = None
         self.speed = kwargs.get('speed', 100.0)
@@ -28,24 +49,27 @@ class AI:
         self.wander_jitter = kwargs.get('wander_jitter', 10.0)
         self.wander_target = (0, 0)
         self.flee_threshold = kwargs.get('flee_threshold', 100.0)
-        self.obstacles = kwargs.get('obstacles', [])
+        self._obstacle_positions = np.empty((0, 2), dtype=np.float32)
+        self.obstacles = kwargs.get('obstacles', [])  # Also builds _obstacle_positions
         self.avoid_radius = kwargs.get('avoid_radius', 50.0)
     
+    @property
+    def behavior_type(self) -> str:
+        """AI behavior type (idle, patrol, chase, wander, flee)."""
+        return self._behavior_type
+    
+    @behavior_type.setter
+    def behavior_type(self, behavior_type: str) -> None:
+        if isinstance(behavior_type, BehaviorType):
+            behavior_type = behavior_type.name.lower()
+        self._behavior_type = behavior_type
+        # Convert to an integer id once instead of comparing strings every update
+        self.behavior_id = BehaviorType.__members__.get(behavior_type.upper(), BehaviorType.IDLE)
+    
     def update(self, delta_time: float, owner: GameObject) -> None:
         """Updates the AI behavior."""
-        if not hasattr(owner, 'position'):
-            return
-            
-        if self.behavior_type == "idle":
-            self._update_idle(delta_time, owner)
-        elif self.behavior_type == "patrol":
-            self._update_patrol(delta_time, owner)
-        elif self.behavior_type == "chase":
-            self._update_chase(delta_time, owner)
-        elif self.behavior_type == "wander":
-            self._update_wander(delta_time, owner)
-        elif self.behavior_type == "flee":
-            self._update_flee(delta_time, owner)
+        if hasattr(owner, 'position'):
+            self._handlers[self.behavior_id](delta_time, owner)
     
     def _update_idle(self, delta_time: float, owner: GameObject) -> None:
         """Idle behavior - does nothing."""
@@ -55,97 +79,332 @@ class AI:
         """Patrol behavior - moves between specified points."""
         if not self.patrol_points:
             return
-            
-        target_pos = self.patrol_points[self.current_patrol_index]
-        direction = pygame.Vector2(target_pos) - pygame.Vector2(owner.position)
         
-        if direction.length() < 10.0:  # Hedefe ulaşıldı
+        x, y = owner.position
+        target_x, target_y = self.patrol_points[self.current_patrol_index]
+        dx, dy = target_x - x, target_y - y
+        distance = math.hypot(dx, dy)
+        
+        if distance < 10.0:  # Hedefe ulaşıldı
             self.current_patrol_index = (self.current_patrol_index + 1) % len(self.patrol_points)
-            target_pos = self.patrol_points[self.current_patrol_index]
-            direction = pygame.Vector2(target_pos) - pygame.Vector2(owner.position)
+            target_x, target_y = self.patrol_points[self.current_patrol_index]
+            dx, dy = target_x - x, target_y - y
+            distance = math.hypot(dx, dy)
         
-        if direction.length() > 0:
-            direction = direction.normalize()
-            new_pos = pygame.Vector2(owner.position) + direction * self.speed * delta_time
-            owner.position = (new_pos.x, new_pos.y)
+        if distance > 0:
+            step = self.speed * delta_time / distance
+            owner.position = (x + dx * step, y + dy * step)
     
     def _update_chase(self, delta_time: float, owner: GameObject) -> None:
         """Chase behavior - follows a target."""
         if not self.target or not hasattr(self.target, 'position'):
             return
-            
-        direction = pygame.Vector2(self.target.position) - pygame.Vector2(owner.position)
-        distance = direction.length()
+        
+        x, y = owner.position
+        target_x, target_y = self.target.position
+        dx, dy = target_x - x, target_y - y
+        distance = math.hypot(dx, dy)
         
         if distance > self.range or distance > self.detection_range:
             return  # Hedef menzil dışında
-            
+        
         if distance > 0:
-            direction = direction.normalize()
-            new_pos = pygame.Vector2(owner.position) + direction * self.speed * delta_time
-            owner.position = (new_pos.x, new_pos.y)
+            step = self.speed * delta_time / distance
+            owner.position = (x + dx * step, y + dy * step)
     
     def _update_wander(self, delta_time: float, owner: GameObject) -> None:
         """Wander behavior - moves randomly."""
         # Change direction randomly
-        self.wander_target = (
-            self.wander_target[0] + random.uniform(-1, 1) * self.wander_jitter,
-            self.wander_target[1] + random.uniform(-1, 1) * self.wander_jitter
-        )
+        jitter = self.wander_jitter
+        wander_x = self.wander_target[0] + random.uniform(-1, 1) * jitter
+        wander_y = self.wander_target[1] + random.uniform(-1, 1) * jitter
+        self.wander_target = (wander_x, wander_y)
         # Normalize the target
-        if self.wander_target != (0, 0):
-            wander_force = pygame.Vector2(self.wander_target).normalize() * self.wander_radius
-        else:
-            wander_force = pygame.Vector2(0, 0)
+        length = math.hypot(wander_x, wander_y)
+        if length > 0:
+            force = self.wander_radius / length
+            wander_x *= force
+            wander_y *= force
         # Add a forward force
-        forward = pygame.Vector2(1, 0)  # Default forward direction
+        forward_x, forward_y = 1.0, 0.0  # Default forward direction
         if hasattr(owner, 'rotation'):
             rad = math.radians(owner.rotation)
-            forward = pygame.Vector2(math.cos(rad), math.sin(rad))
+            forward_x, forward_y = math.cos(rad), math.sin(rad)
         
-        target = pygame.Vector2(owner.position) + forward * self.wander_distance + wander_force
-        direction = target - pygame.Vector2(owner.position)
+        # Direction from the owner to its wander target
+        dx = forward_x * self.wander_distance + wander_x
+        dy = forward_y * self.wander_distance + wander_y
+        distance = math.hypot(dx, dy)
         
-        if direction.length() > 0:
-            direction = direction.normalize()
-            new_pos = pygame.Vector2(owner.position) + direction * self.speed * delta_time
-            owner.position = (new_pos.x, new_pos.y)
+        if distance > 0:
+            x, y = owner.position
+            step = self.speed * delta_time / distance
+            owner.position = (x + dx * step, y + dy * step)
             
             # Rotate toward target
             if hasattr(owner, 'rotation'):
-                target_angle = math.degrees(math.atan2(direction.y, direction.x))
-                owner.rotation = target_angle
+                owner.rotation = math.degrees(math.atan2(dy, dx))
     
     def _update_flee(self, delta_time: float, owner: GameObject) -> None:
         """Flee behavior - runs away from target."""
         if not self.target or not hasattr(self.target, 'position'):
             return
-            
-        direction = pygame.Vector2(owner.position) - pygame.Vector2(self.target.position)
-        distance = direction.length()
+        
+        x, y = owner.position
+        target_x, target_y = self.target.position
+        dx, dy = x - target_x, y - target_y
+        distance = math.hypot(dx, dy)
         
         if distance < self.flee_threshold and distance > 0:
-            direction = direction.normalize()
-            new_pos = pygame.Vector2(owner.position) + direction * self.speed * delta_time
-            owner.position = (new_pos.x, new_pos.y)
+            step = self.speed * delta_time / distance
+            owner.position = (x + dx * step, y + dy * step)
+    
+    @property
+    def obstacles(self) -> List[GameObject]:
+        """Objects to steer away from."""
+        return self._obstacles
+    
+    @obstacles.setter
+    def obstacles(self, obstacles: List[GameObject]) -> None:
+        self._obstacles = list(obstacles)
+        self.refresh_obstacles()
+    
+    def add_obstacle(self, obstacle: GameObject) -> None:
+        """Adds an obstacle to avoid."""
+        self._obstacles.append(obstacle)
+        self.refresh_obstacles()
+    
+    def remove_obstacle(self, obstacle: GameObject) -> None:
+        """Removes an obstacle."""
+        if obstacle in self._obstacles:
+            self._obstacles.remove(obstacle)
+            self.refresh_obstacles()
+    
+    def refresh_obstacles(self) -> None:
+        """Re-reads obstacle positions; avoid_obstacles() calls this on every call."""
+        positions = [obstacle.position for obstacle in self._obstacles if hasattr(obstacle, 'position')]
+        if positions and len(positions) == len(self._obstacle_positions):
+            # Same obstacle count as last time; reuse the array
+            self._obstacle_positions[:] = positions
+        else:
+            self._obstacle_positions = np.array(positions, dtype=np.float32).reshape(-1, 2)
     
     def avoid_obstacles(self, owner: GameObject) -> pygame.Vector2:
         """Avoidance behavior - steers away from obstacles."""
-        avoidance = pygame.Vector2(0, 0)
-        
-        for obstacle in self.obstacles:
-            if not hasattr(obstacle, 'position'):
-                continue
-                
-            to_obstacle = pygame.Vector2(obstacle.position) - pygame.Vector2(owner.position)
-            distance = to_obstacle.length()
-            
-            if distance < self.avoid_radius and distance > 0:
-                # Increase avoidance force as distance decreases
-                strength = 1.0 - (distance / self.avoid_radius)
-                avoidance -= to_obstacle.normalize() * strength
+        self.refresh_obstacles()  # Obstacles may have moved since the last call
+        if not len(self._obstacle_positions):
+            return pygame.Vector2(0, 0)
+        ax, ay = _avoid_obstacles_kernel(
+            float(owner.position[0]), float(owner.position[1]),
+            self._obstacle_positions, float(self.avoid_radius))
+        return pygame.Vector2(ax, ay)
+
+def _avoid_obstacles_numpy(owner_x: float, owner_y: float,
+                           obstacle_positions: np.ndarray, avoid_radius: float) -> Tuple[float, float]:
+    """Sums the avoidance force away from every obstacle within avoid_radius."""
+    to = obstacle_positions - np.array((owner_x, owner_y), dtype=np.float32)
+    d2 = to[:, 0] ** 2 + to[:, 1] ** 2
+    mask = (d2 < avoid_radius * avoid_radius) & (d2 > 0)
+    if not mask.any():
+        return 0.0, 0.0
+    d = np.sqrt(d2[mask])
+    # Increase avoidance force as distance decreases
+    scale = (1.0 - d / avoid_radius) / d
+    return float(-(to[mask, 0] * scale).sum()), float(-(to[mask, 1] * scale).sum())
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _avoid_obstacles_kernel(owner_x, owner_y, obstacle_positions, avoid_radius):
+        """Numba version of _avoid_obstacles_numpy; plain loops compile best."""
+        ax = 0.0
+        ay = 0.0
+        r2 = avoid_radius * avoid_radius
+        for i in range(obstacle_positions.shape[0]):
+            dx = obstacle_positions[i, 0] - owner_x
+            dy = obstacle_positions[i, 1] - owner_y
+            d2 = dx * dx + dy * dy
+            if d2 < r2 and d2 > 0.0:
+                d = np.sqrt(d2)
+                scale = (1.0 - d / avoid_radius) / d
+                ax -= dx * scale
+                ay -= dy * scale
+        return ax, ay
+else:
+    _avoid_obstacles_kernel = _avoid_obstacles_numpy
+
+class AISystem:
+    """Updates many AI agents at once using NumPy arrays.
+
+    Agent state is kept as Structure-of-Arrays (one row per agent) so every
+    behavior is processed with a single vectorized pass instead of
+    per-agent Vector2 math.
+    """
+    
+    def __init__(self):
+        self.agents: List[AI] = []
+        self.owners: List[GameObject] = []
+        self.positions = np.zeros((0, 2), dtype=np.float32)
+        self.wander_targets = np.zeros((0, 2), dtype=np.float32)
+        self.dirty = np.zeros(0, dtype=bool)
+        self._rebuild()
+    
+    def add(self, ai: AI, owner: GameObject) -> None:
+        """Registers an AI and the object it controls."""
+        self.agents.append(ai)
+        self.owners.append(owner)
+        self._rebuild()
+    
+    def remove(self, ai: AI) -> None:
+        """Unregisters an AI."""
+        if ai not in self.agents:
+            return
+        index = self.agents.index(ai)
+        ai.wander_target = tuple(self.wander_targets[index].tolist())
+        del self.agents[index]
+        del self.owners[index]
+        self._rebuild()
+    
+    def refresh(self) -> None:
+        """Re-reads per-agent parameters (speed, ranges, behavior) after changes."""
+        self._rebuild()
+    
+    def _rebuild(self) -> None:
+        """Rebuilds the per-agent parameter columns."""
+        agents = self.agents
+        count = len(agents)
+        self.behavior_ids = np.array([ai.behavior_id for ai in agents], dtype=np.uint8)
+        self.speeds = np.array([ai.speed for ai in agents], dtype=np.float32)
+        self.ranges = np.array(
+            [min(ai.range, ai.detection_range) for ai in agents], dtype=np.float32)
+        self.flee_thresholds = np.array([ai.flee_threshold for ai in agents], dtype=np.float32)
+        self.wander_radii = np.array([ai.wander_radius for ai in agents], dtype=np.float32)
+        self.wander_distances = np.array([ai.wander_distance for ai in agents], dtype=np.float32)
+        self.wander_jitters = np.array([ai.wander_jitter for ai in agents], dtype=np.float32)
+        self.wander_targets = np.array(
+            [ai.wander_target for ai in agents], dtype=np.float32).reshape(count, 2)
+        self.positions = np.zeros((count, 2), dtype=np.float32)
+        self.dirty = np.zeros(count, dtype=bool)
+        
+        # Agent indices per behavior
+        self._indices = {
+            behavior_id: np.flatnonzero(self.behavior_ids == behavior_id)
+            for behavior_id in BehaviorType
+        }
+    
+    def step(self, delta_time: float) -> None:
+        """Updates all registered agents."""
+        if not self.agents:
+            return
+        
+        self.positions[:] = [owner.position for owner in self.owners]
+        self.dirty[:] = False
+        
+        self._step_patrol(delta_time)
+        self._step_chase(delta_time)
+        self._step_wander(delta_time)
+        self._step_flee(delta_time)
+        
+        # Write back only the agents that moved
+        positions = self.positions
+        for i in np.flatnonzero(self.dirty):
+            self.owners[i].position = (float(positions[i, 0]), float(positions[i, 1]))
+    
+    def _move(self, idx: np.ndarray, delta: np.ndarray, dist: np.ndarray,
+              mask: np.ndarray, delta_time: float) -> None:
+        """Moves agents idx[mask] along delta by speed * delta_time."""
+        idx = idx[mask]
+        if not len(idx):
+            return
+        step = self.speeds[idx] * delta_time / dist[mask]
+        self.positions[idx] += delta[mask] * step[:, None]
+        self.dirty[idx] = True
+    
+    def _gather_targets(self, idx: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns agents in idx that have a target, with the target positions."""
+        agents = self.agents
+        idx = np.array(
+            [i for i in idx if agents[i].target is not None and hasattr(agents[i].target, 'position')],
+            dtype=np.intp)
+        targets = np.array(
+            [agents[i].target.position for i in idx], dtype=np.float32).reshape(len(idx), 2)
+        return idx, targets
+    
+    def _step_patrol(self, delta_time: float) -> None:
+        """Patrol behavior - moves between specified points."""
+        agents = self.agents
+        idx = np.array(
+            [i for i in self._indices[BehaviorType.PATROL] if agents[i].patrol_points], dtype=np.intp)
+        if not len(idx):
+            return
+        
+        targets = np.array(
+            [agents[i].patrol_points[agents[i].current_patrol_index] for i in idx],
+            dtype=np.float32)
+        delta = targets - self.positions[idx]
+        dist = np.linalg.norm(delta, axis=1)
+        
+        # Advance agents that reached their point
+        for j in np.flatnonzero(dist < 10.0):
+            ai = agents[idx[j]]
+            ai.current_patrol_index = (ai.current_patrol_index + 1) % len(ai.patrol_points)
+            targets[j] = ai.patrol_points[ai.current_patrol_index]
+            delta[j] = targets[j] - self.positions[idx[j]]
+            dist[j] = np.hypot(delta[j, 0], delta[j, 1])
+        
+        self._move(idx, delta, dist, dist > 0, delta_time)
+    
+    def _step_chase(self, delta_time: float) -> None:
+        """Chase behavior - follows a target."""
+        idx, targets = self._gather_targets(self._indices[BehaviorType.CHASE])
+        if not len(idx):
+            return
         
-        return avoidance
+        delta = targets - self.positions[idx]
+        dist = np.linalg.norm(delta, axis=1)
+        self._move(idx, delta, dist, (dist > 0) & (dist <= self.ranges[idx]), delta_time)
+    
+    def _step_flee(self, delta_time: float) -> None:
+        """Flee behavior - runs away from target."""
+        idx, targets = self._gather_targets(self._indices[BehaviorType.FLEE])
+        if not len(idx):
+            return
+        
+        delta = self.positions[idx] - targets
+        dist = np.linalg.norm(delta, axis=1)
+        self._move(idx, delta, dist, (dist > 0) & (dist < self.flee_thresholds[idx]), delta_time)
+    
+    def _step_wander(self, delta_time: float) -> None:
+        """Wander behavior - moves randomly."""
+        idx = self._indices[BehaviorType.WANDER]
+        if not len(idx):
+            return
+        
+        # Change direction randomly
+        wander = self.wander_targets[idx]
+        wander += np.random.uniform(-1, 1, wander.shape).astype(np.float32) * self.wander_jitters[idx, None]
+        self.wander_targets[idx] = wander
+        
+        # Normalize the target
+        length = np.linalg.norm(wander, axis=1)
+        nonzero = length > 0
+        wander_force = np.zeros_like(wander)
+        wander_force[nonzero] = (wander[nonzero] / length[nonzero, None]
+                                 * self.wander_radii[idx][nonzero, None])
+        
+        # Add a forward force
+        rad = np.radians([getattr(self.owners[i], 'rotation', 0.0) for i in idx])
+        forward = np.stack((np.cos(rad), np.sin(rad)), axis=1).astype(np.float32)
+        delta = forward * self.wander_distances[idx, None] + wander_force
+        dist = np.linalg.norm(delta, axis=1)
+        moving = dist > 0
+        self._move(idx, delta, dist, moving, delta_time)
+        
+        # Rotate toward target
+        angles = np.degrees(np.arctan2(delta[:, 1], delta[:, 0]))
+        for i, angle in zip(idx[moving], angles[moving]):
+            owner = self.owners[i]
+            if hasattr(owner, 'rotation'):
+                owner.rotation = float(angle)
 
 def create_ai(behavior_type: str = "idle", **kwargs) -> AI:
     """Creates a new AI instance."""
@@ -160,4 +419,4 @@ AI_TYPES = {
     "flee": "Runs away from target"
 }
 
-__all__ = ['AI', 'create_ai', 'AI_TYPES']
+__all__ = ['AI', 'AISystem', 'BehaviorType', 'create_ai', 'AI_TYPES']
@@ -1,6 +1,7 @@
 """
 Camera class used to control the viewable area in the game world.
 """
+import numpy as np
 import pygame
 from typing import Tuple, Optional, List
 
@@ -17,6 +18,8 @@ class Camera:
         self.position = pygame.Vector2(0, 0)
         self.width = width
         self.height = height
+        self._half_width = width // 2
+        self._half_height = height // 2
         self.zoom = 1.0
         self.min_zoom = 0.1
         self.max_zoom = 4.0
@@ -30,22 +33,25 @@ class Camera:
     
     def update(self, delta_time: float) -> None:
         """Updates the camera."""
+        position = self.position
+        
         # Target following
         if self.target:
-            target_pos = pygame.Vector2(
-                self.target.position[0] - self.width // 2,
-                self.target.position[1] - self.height // 2
-            )
+            target_x = self.target.position[0] - self._half_width
+            target_y = self.target.position[1] - self._half_height
             # Smooth following
-            self.position += (target_pos - self.position) * (self.smooth_speed * delta_time)
+            k = self.smooth_speed * delta_time
+            position.x += (target_x - position.x) * k
+            position.y += (target_y - position.y) * k
         
         # Screen shake effect
         if self.shake_timer > 0:
             self.shake_timer -= delta_time
-            self.position.x += (pygame.math.clamp(self.shake_intensity * (self.shake_timer / self.shake_duration), 0, self.shake_intensity) * 
-                              (pygame.math.noise(pygame.time.get_ticks() * 0.01) * 2 - 1))
-            self.position.y += (pygame.math.clamp(self.shake_intensity * (self.shake_timer / self.shake_duration), 0, self.shake_intensity) * 
-                              (pygame.math.noise(pygame.time.get_ticks() * 0.01 + 1000) * 2 - 1))
+            magnitude = pygame.math.clamp(
+                self.shake_intensity * (self.shake_timer / self.shake_duration), 0, self.shake_intensity)
+            t = pygame.time.get_ticks() * 0.01
+            position.x += magnitude * (pygame.math.noise(t) * 2 - 1)
+            position.y += magnitude * (pygame.math.noise(t + 1000) * 2 - 1)
         
         # Boundary check
         if self.bounds:
@@ -115,3 +121,22 @@ class Camera:
                 rect.left < viewport.right and
                 rect.bottom > viewport.top and 
                 rect.top < viewport.bottom)
+    
+    def cull_mask(self, positions: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+        """Checks many (x, y, width, height) boxes against the viewport at once.
+        
+        Args:
+            positions: (N, 2) array of top-left corners
+            sizes: (N, 2) array of widths and heights
+            
+        Returns:
+            Boolean array, True for boxes inside the viewport
+        """
+        left = self.position.x
+        top = self.position.y
+        right = left + self.width / self.zoom
+        bottom = top + self.height / self.zoom
+        x = positions[:, 0]
+        y = positions[:, 1]
+        return ((x + sizes[:, 0] > left) & (x < right) &
+                (y + sizes[:, 1] > top) & (y < bottom))
@@ -4,22 +4,29 @@ Wrench Game Engine - Main Game Class
 import pygame
 import sys
 from typing import Dict, Optional
-from ..scene import Scene
+from .scene import Scene
+from ..input import _dispatch_events
+from ..setupfiles.fixes.graphics import apply_vendor_environment, get_gpu_vendor
+
+_GAME: Optional['Game'] = None
 
 class Game:
     """Main game class. Manages the game loop and core functionality."""
     
-    _instance = None
-    
     def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+        # There is one game per process; Game() returns it once it exists
+        if _GAME is not None:
+            return _GAME
+        return super().__new__(cls)
     
     def __init__(self, title: str = "Wrench Game", width: int = 800, height: int = 600):
-        if hasattr(self, '_initialized'):
-            return
-            
+        global _GAME
+        if _GAME is self:
+            return  # Already initialized; don't reopen the window
+        
+        # Driver settings only take effect if set before the context exists;
+        # the vendor comes from the cache written by optimize_shaders()
+        apply_vendor_environment(get_gpu_vendor(probe=False))
         pygame.init()
         self.screen = pygame.display.set_mode((width, height))
         pygame.display.set_caption(title)
@@ -29,7 +36,9 @@ class Game:
         self.scenes: Dict[str, Scene] = {}
         self.current_scene: Optional[Scene] = None
         self.fps = 60
-        self._initialized = True
+        
+        # Returned by get_game() and by later Game() calls
+        _GAME = self
     
     def add_scene(self, name: str, scene: 'Scene') -> None:
         """Adds a new scene to the game."""
@@ -51,13 +60,13 @@ class Game:
         
         while self.running:
             # Process events
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                
-                # Aktif sahneye olayı ilet
-                if self.current_scene:
-                    self.current_scene.handle_event(event)
+            events = pygame.event.get()
+            _dispatch_events(events)
+            if any(event.type == pygame.QUIT for event in events):
+                self.running = False
+            if self.current_scene:
+                # Aktif sahneye olayları ilet
+                self.current_scene.handle_events(events)
             
             # Update
             delta_time = self.clock.tick(self.fps) / 1000.0  # Saniye cinsinden delta time
@@ -75,3 +84,9 @@ class Game:
         """Quits the game and cleans up resources."""
         pygame.quit()
         sys.exit()
+
+def get_game(title: str = "Wrench Game", width: int = 800, height: int = 600) -> Game:
+    """Returns the shared game instance, creating it on first use."""
+    if _GAME is None:
+        return Game(title, width, height)
+    return _GAME
@@ -2,12 +2,18 @@
 Base class for game objects.
 """
 from typing import Dict, Any, Optional, List, Tuple, Type, TypeVar, Generic
+import numpy as np
 import pygame
 
 T = TypeVar('T')
 
 class Component:
     """Base class for components."""
+    __slots__ = ('game_object', 'enabled')
+    
+    # Event types passed to handle_event(); None receives every event
+    HANDLES: Optional[Tuple[int, ...]] = None
+    
     def __init__(self, game_object: 'GameObject'):
         self.game_object = game_object
         self.enabled = True
@@ -23,30 +29,147 @@ class Component:
     def on_destroy(self) -> None:
         """Called when the component is being destroyed."""
         pass
+    
+    def get_blit(self) -> Optional[Tuple]:
+        """Returns a (surface, dest) or (surface, dest, area) tuple to batch-blit.
+        
+        Components that draw a single surface can return it here so the scene
+        blits them together with Surface.blits(); returning None makes the
+        scene call draw() instead.
+        """
+        return None
 
 class GameObject:
     """Base class for all objects in the game world."""
     
+    __slots__ = (
+        'name', '_position', '_scale', '_size', '_scene_index', 'rotation',
+        '_z_index', '_scene', 'components', '_updaters', '_drawers', '_drawer_blits', '_handlers',
+        'tags', 'initialized'
+    )
+    
     def __init__(self, name: str = "GameObject", position: Tuple[float, float] = (0, 0)):
         self.name = name
-        self.position = list(position)
+        # Used while the object is not in a scene; scenes store these in shared arrays
+        self._position = np.array(position, dtype=np.float64)
+        self._scale = np.ones(2, dtype=np.float64)
+        self._size = np.zeros(2, dtype=np.float64)  # Unscaled width and height, used for culling
+        self._scene_index = -1
         self.rotation = 0.0
-        self.scale = [1.0, 1.0]
-        self.z_index = 0
+        self._z_index = 0
+        self._scene = None  # Scene the object has been added to
         self.components: List[Component] = []
+        # Components partitioned by the hooks they implement
+        self._updaters: List[Component] = []
+        self._drawers: List[Component] = []
+        self._drawer_blits: List[Optional[Any]] = []  # get_blit of each drawer, or None
+        self._handlers: List[Component] = []
         self.tags: List[str] = []
         self.initialized = False
     
+    @property
+    def position(self) -> Tuple[float, float]:
+        """(x, y) position as a tuple; assign a new pair to move the object.
+        
+        The tuple is a copy, so item assignment such as position[0] += dx
+        raises TypeError; write obj.position = (x + dx, y) instead.
+        """
+        if self._scene is not None:
+            x, y = self._scene._positions[self._scene_index]
+        else:
+            x, y = self._position
+        return (float(x), float(y))
+    
+    @position.setter
+    def position(self, value: Tuple[float, float]) -> None:
+        scene = self._scene
+        if scene is not None:
+            scene._positions[self._scene_index] = value
+            scene._spatial_hash_dirty = True
+        else:
+            self._position[:] = value
+    
+    @property
+    def scale(self) -> Tuple[float, float]:
+        """(x, y) scale factors as a tuple; assign a new pair to change them."""
+        if self._scene is not None:
+            x, y = self._scene._scales[self._scene_index]
+        else:
+            x, y = self._scale
+        return (float(x), float(y))
+    
+    @scale.setter
+    def scale(self, value: Tuple[float, float]) -> None:
+        scene = self._scene
+        if scene is not None:
+            scene._scales[self._scene_index] = value
+            scene._spatial_hash_dirty = True
+        else:
+            self._scale[:] = value
+    
+    @property
+    def size(self) -> Tuple[float, float]:
+        """Unscaled (width, height) as a tuple, used for culling and bounds."""
+        if self._scene is not None:
+            width, height = self._scene._sizes[self._scene_index]
+        else:
+            width, height = self._size
+        return (float(width), float(height))
+    
+    @size.setter
+    def size(self, value: Tuple[float, float]) -> None:
+        scene = self._scene
+        if scene is not None:
+            scene._sizes[self._scene_index] = value
+            scene._spatial_hash_dirty = True
+        else:
+            self._size[:] = value
+    
+    @property
+    def z_index(self) -> int:
+        """Draw order; higher values are drawn on top."""
+        return self._z_index
+    
+    @z_index.setter
+    def z_index(self, value: int) -> None:
+        old = self._z_index
+        self._z_index = value
+        if self._scene is not None and old != value:
+            self._scene._notify_z_change(self, old, value)
+    
     def add_component(self, component_type: Type[T], *args, **kwargs) -> T:
         """Adds a new component to this object."""
         component = component_type(self, *args, **kwargs)
         self.components.append(component)
+        if hasattr(component, 'update'):
+            self._updaters.append(component)
+        if hasattr(component, 'draw'):
+            self._drawers.append(component)
+            self._drawer_blits.append(getattr(component, 'get_blit', None))
+        if hasattr(component, 'handle_event'):
+            self._handlers.append(component)
         
         if self.initialized:
             component.start()
             
         return component
     
+    def remove_component(self, component: Component) -> None:
+        """Removes a component from this object."""
+        if component not in self.components:
+            return
+        self.components.remove(component)
+        if component in self._drawers:
+            index = self._drawers.index(component)
+            del self._drawers[index]
+            del self._drawer_blits[index]
+        if component in self._handlers:
+            self._handlers.remove(component)
+        if component in self._updaters:
+            self._updaters.remove(component)
+        if hasattr(component, 'on_destroy'):
+            component.on_destroy()
+    
     def get_component(self, component_type: Type[T]) -> Optional[T]:
         """Returns the first component of the specified type."""
         for component in self.components:
@@ -65,14 +188,31 @@ class GameObject:
     
     def update(self, delta_time: float) -> None:
         """Her karede güncelleme için çağrılır."""
-        for component in self.components:
-            if hasattr(component, 'update') and component.enabled:
+        for component in self._updaters:
+            if component.enabled:
                 component.update(delta_time)
     
     def draw(self, screen: pygame.Surface) -> None:
         """Renders the object to the screen."""
-        for component in self.components:
-            if hasattr(component, 'draw') and component.enabled:
+        for component in self._drawers:
+            if component.enabled:
+                component.draw(screen)
+    
+    def _draw_batched(self, screen: pygame.Surface, batch: List[Tuple]) -> None:
+        """Adds component blits to batch and draws the other components directly.
+        
+        Pending blits are flushed before any direct draw so ordering is kept.
+        """
+        for component, get_blit in zip(self._drawers, self._drawer_blits):
+            if not component.enabled:
+                continue
+            blit = get_blit() if get_blit is not None else None
+            if blit is not None:
+                batch.append(blit)
+            else:
+                if batch:
+                    screen.blits(batch, doreturn=False)
+                    batch.clear()
                 component.draw(screen)
     
     def on_destroy(self) -> None:
@@ -83,9 +223,19 @@ class GameObject:
     
     def handle_event(self, event: pygame.event.Event) -> None:
         """Handles incoming events."""
-        for component in self.components:
-            if hasattr(component, 'handle_event') and component.enabled:
-                component.handle_event(event)
+        # Copied so handlers can add or remove components
+        for component in tuple(self._handlers):
+            if component.enabled:
+                handles = getattr(component, 'HANDLES', None)
+                if handles is None or event.type in handles:
+                    component.handle_event(event)
+    
+    def get_bounds(self) -> Tuple[float, float, float, float]:
+        """Returns the object's (x, y, width, height) bounding box."""
+        x, y = self.position
+        width, height = self.size
+        scale_x, scale_y = self.scale
+        return (x, y, width * scale_x, height * scale_y)
     
     def has_tag(self, tag: str) -> bool:
         """Checks if the object has the specified tag."""
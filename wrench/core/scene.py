@@ -1,21 +1,126 @@
 """
 Core scene management class.
 """
-from typing import List, Dict, Optional, Type, Any
+from typing import List, Dict, Optional, Tuple, Type, Any
+import bisect
+import numpy as np
 import pygame
 from .game_object import GameObject
+from .spatial_hash import SpatialHash, aabb_overlap
 
 class Scene:
     """Base class representing game scenes."""
     
     _current_scene = None
     
+    # Object count above which the spatial hash is built
+    SPATIAL_HASH_THRESHOLD = 100
+    
+    # Object count above which draw() culls against the camera
+    CULL_THRESHOLD = 100
+    
     def __init__(self, name: str):
         self.name = name
-        self.game_objects: List[GameObject] = []
-        self._game_objects_to_add = []
-        self._game_objects_to_remove = []
+        # Objects in the scene in the order they were added
+        self._members: Dict[GameObject, None] = {}
+        self._members_view: Optional[Tuple[GameObject, ...]] = None  # Cached game_objects
+        # z_index -> objects in draw order; dicts act as ordered sets with O(1) removal
+        self._by_z: Dict[int, Dict[GameObject, None]] = {}
+        self._sorted_z_keys: List[int] = []  # Kept sorted with bisect as buckets come and go
+        # Transforms of all objects in the scene, indexed by GameObject._scene_index
+        self._positions = np.zeros((64, 2), dtype=np.float64)
+        self._scales = np.ones((64, 2), dtype=np.float64)
+        self._sizes = np.zeros((64, 2), dtype=np.float64)
+        self._free_indices: List[int] = []
+        self._next_index = 0
+        self._game_objects_to_add: Dict[GameObject, None] = {}
+        self._game_objects_to_remove: Dict[GameObject, None] = {}
         self.initialized = False
+        self.camera = None  # Optional camera used for culling in draw()
+        self.clear_color: Optional[tuple] = (0, 0, 0)  # None skips clearing the screen
+        self._spatial_hash = SpatialHash()
+        self._spatial_hash_dirty = True
+    
+    @property
+    def game_objects(self) -> Tuple[GameObject, ...]:
+        """All game objects in the scene, in the order they were added.
+        
+        Read-only, so scene.game_objects.append(obj) raises; use
+        add_game_object() and remove_game_object() instead. The tuple is
+        cached until objects are added or removed.
+        """
+        view = self._members_view
+        if view is None:
+            view = self._members_view = tuple(self._members)
+        return view
+    
+    def _attach(self, game_object: GameObject) -> None:
+        """Moves an object's transform into the scene's arrays.
+        
+        An object lives in one scene at a time; the scene it was in drops it first.
+        """
+        previous = game_object._scene
+        if previous is not None:
+            previous._release(game_object)
+        if self._free_indices:
+            index = self._free_indices.pop()
+        else:
+            index = self._next_index
+            self._next_index += 1
+            if index >= len(self._positions):
+                self._positions = np.concatenate((self._positions, np.zeros_like(self._positions)))
+                self._scales = np.concatenate((self._scales, np.ones_like(self._scales)))
+                self._sizes = np.concatenate((self._sizes, np.zeros_like(self._sizes)))
+        self._positions[index] = game_object._position
+        self._scales[index] = game_object._scale
+        self._sizes[index] = game_object._size
+        game_object._scene_index = index
+        game_object._scene = self
+        self._members[game_object] = None
+        self._members_view = None
+        self._spatial_hash_dirty = True  # Also set by the transform setters
+    
+    def _detach(self, game_object: GameObject) -> None:
+        """Copies an object's transform back out of the scene's arrays."""
+        index = game_object._scene_index
+        game_object._position[:] = self._positions[index]
+        game_object._scale[:] = self._scales[index]
+        game_object._size[:] = self._sizes[index]
+        self._free_indices.append(index)
+        del self._members[game_object]
+        self._members_view = None
+        self._spatial_hash_dirty = True  # Also set by the transform setters
+        game_object._scene_index = -1
+        game_object._scene = None
+    
+    def _release(self, game_object: GameObject) -> None:
+        """Drops an object that is moving to another scene, without destroying it."""
+        self._remove_from_bucket(game_object, game_object.z_index)
+        self._detach(game_object)
+    
+    def _add_to_bucket(self, game_object: GameObject) -> None:
+        """Adds an object to the bucket for its z_index."""
+        z = game_object.z_index
+        bucket = self._by_z.get(z)
+        if bucket is None:
+            self._by_z[z] = {game_object: None}
+            bisect.insort(self._sorted_z_keys, z)
+        else:
+            bucket[game_object] = None
+    
+    def _remove_from_bucket(self, game_object: GameObject, z: int) -> None:
+        """Removes an object from the bucket for z."""
+        bucket = self._by_z[z]
+        del bucket[game_object]
+        if not bucket:
+            del self._by_z[z]
+            keys = self._sorted_z_keys
+            del keys[bisect.bisect_left(keys, z)]
+    
+    def _notify_z_change(self, game_object: GameObject, old: int, new: int) -> None:
+        """Moves an object to a new bucket after its z_index changed."""
+        self._remove_from_bucket(game_object, old)
+        self._add_to_bucket(game_object)
     
     @classmethod
     def create(cls, name: str) -> 'Scene':
@@ -29,51 +134,95 @@ class Scene:
     
     def add_game_object(self, game_object: GameObject) -> None:
         """Adds a new game object to the scene."""
-        self._game_objects_to_add.append(game_object)
+        self._game_objects_to_add[game_object] = None
     
     def remove_game_object(self, game_object: GameObject) -> None:
         """Removes a game object from the scene."""
-        self._game_objects_to_remove.append(game_object)
+        self._game_objects_to_remove[game_object] = None
     
     def handle_event(self, event: pygame.event.Event) -> None:
         """Handles incoming events."""
-        for game_object in self.game_objects:
-            if hasattr(game_object, 'handle_event'):
+        self.handle_events((event,))
+    
+    def handle_events(self, events: List[pygame.event.Event]) -> None:
+        """Passes a batch of events, in queue order, to each object in the order it was added."""
+        # Objects added or removed by a handler take effect in the next update()
+        game_objects = self.game_objects
+        for event in events:
+            for game_object in game_objects:
                 game_object.handle_event(event)
     
     def update(self, delta_time: float) -> None:
         """Updates the scene."""
         # Add new objects
-        for game_object in self._game_objects_to_add:
-            if game_object not in self.game_objects:
-                self.game_objects.append(game_object)
+        to_add, self._game_objects_to_add = self._game_objects_to_add, {}
+        for game_object in to_add:
+            if game_object not in self._members:
+                self._attach(game_object)
+                self._add_to_bucket(game_object)
                 if not game_object.initialized:
                     game_object.start()
                     game_object.initialized = True
-        self._game_objects_to_add.clear()
         
         # Remove objects marked for deletion
-        for game_object in self._game_objects_to_remove:
-            if game_object in self.game_objects:
+        to_remove, self._game_objects_to_remove = self._game_objects_to_remove, {}
+        for game_object in to_remove:
+            if game_object in self._members:
                 if hasattr(game_object, 'on_destroy'):
                     game_object.on_destroy()
-                self.game_objects.remove(game_object)
-        self._game_objects_to_remove.clear()
+                self._remove_from_bucket(game_object, game_object.z_index)
+                self._detach(game_object)
         
         # Update all objects
-        for game_object in self.game_objects:
+        game_objects = self.game_objects
+        for game_object in game_objects:
             if hasattr(game_object, 'update'):
                 game_object.update(delta_time)
     
+    def query(self, aabb) -> List[GameObject]:
+        """Returns the game objects overlapping an (x, y, width, height) box."""
+        game_objects = self.game_objects
+        if len(game_objects) <= self.SPATIAL_HASH_THRESHOLD:
+            return [obj for obj in game_objects if aabb_overlap(obj.get_bounds(), aabb)]
+        
+        if self._spatial_hash_dirty:
+            self._spatial_hash.clear()
+            for game_object in game_objects:
+                self._spatial_hash.insert(game_object, game_object.get_bounds())
+            self._spatial_hash_dirty = False
+        return self._spatial_hash.query_aabb(aabb)
+    
     def draw(self, screen: pygame.Surface) -> None:
         """Renders the scene."""
-        screen.fill((0, 0, 0))  # Black background
-        screen.fill((0, 0, 0))  # Siyah arka plan
+        if self.clear_color is not None:
+            screen.fill(self.clear_color)
+        
+        by_z = self._by_z
+        count = self._next_index
+        if self.camera is not None and count - len(self._free_indices) > self.CULL_THRESHOLD:
+            # Cull every object against the camera in one vectorized pass. Objects
+            # with no size set have an unknown extent and are always drawn.
+            sizes = self._sizes[:count]
+            visible = (self.camera.cull_mask(self._positions[:count], sizes * self._scales[:count])
+                       | (sizes == 0).any(axis=1)).tolist()
+            game_objects = (obj for z in self._sorted_z_keys for obj in by_z[z]
+                            if visible[obj._scene_index])
+        else:
+            game_objects = (obj for z in self._sorted_z_keys for obj in by_z[z])
         
-        # Tüm nesneleri çiz
-        for game_object in sorted(self.game_objects, key=lambda x: x.z_index):
-            if hasattr(game_object, 'draw'):
+        # Tüm nesneleri çiz; sprite blits are batched into Surface.blits calls
+        batch = []
+        for game_object in game_objects:
+            if type(game_object).draw is GameObject.draw:
+                game_object._draw_batched(screen, batch)
+            else:
+                # Custom draw() overrides are called directly
+                if batch:
+                    screen.blits(batch, doreturn=False)
+                    batch.clear()
                 game_object.draw(screen)
+        if batch:
+            screen.blits(batch, doreturn=False)
     
     def on_enter(self) -> None:
         """Called when the scene becomes active."""
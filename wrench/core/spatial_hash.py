@@ -0,0 +1,69 @@
+"""
+Uniform grid spatial hash used for area queries and culling.
+"""
+from typing import Any, Dict, List, Tuple
+
+AABB = Tuple[float, float, float, float]  # (x, y, width, height)
+
+def aabb_overlap(a: AABB, b: AABB) -> bool:
+    """Checks if two (x, y, width, height) boxes overlap."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    return ax <= bx + bw and bx <= ax + aw and ay <= by + bh and by <= ay + ah
+
+class SpatialHash:
+    """Buckets objects into fixed-size grid cells for fast area queries."""
+
+    def __init__(self, cell_size: float = 128.0):
+        """Creates a new spatial hash.
+
+        Args:
+            cell_size: Width and height of a grid cell in world units
+        """
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[Tuple[int, Any, AABB]]] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _cell_range(self, aabb: AABB) -> Tuple[int, int, int, int]:
+        """Returns the (min_x, min_y, max_x, max_y) cells covered by a box."""
+        x, y, w, h = aabb
+        size = self.cell_size
+        return (int(x // size), int(y // size),
+                int((x + w) // size), int((y + h) // size))
+
+    def insert(self, obj: Any, aabb: AABB) -> None:
+        """Adds an object covering the given box."""
+        entry = (self._count, obj, tuple(aabb))
+        self._count += 1
+        min_x, min_y, max_x, max_y = self._cell_range(aabb)
+        cells = self._cells
+        for cx in range(min_x, max_x + 1):
+            for cy in range(min_y, max_y + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [entry]
+                else:
+                    bucket.append(entry)
+
+    def query_aabb(self, aabb: AABB) -> List[Any]:
+        """Returns the objects overlapping a box, in insertion order."""
+        found: Dict[int, Any] = {}
+        min_x, min_y, max_x, max_y = self._cell_range(aabb)
+        cells = self._cells
+        for cx in range(min_x, max_x + 1):
+            for cy in range(min_y, max_y + 1):
+                bucket = cells.get((cx, cy))
+                if not bucket:
+                    continue
+                for serial, obj, box in bucket:
+                    if serial not in found and aabb_overlap(box, aabb):
+                        found[serial] = obj
+        return [found[serial] for serial in sorted(found)]
+
+    def clear(self) -> None:
+        """Removes all objects."""
+        self._cells.clear()
+        self._count = 0
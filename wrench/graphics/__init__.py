@@ -6,6 +6,8 @@ from .draw import (
     draw_circle,
     draw_text,
     draw_image,
+    preload_image,
+    clear_image_cache,
     draw_line,
     draw_polygon,
     draw_ellipse,
@@ -20,6 +22,8 @@ __all__ = [
     'draw_circle',
     'draw_text',
     'draw_image',
+    'preload_image',
+    'clear_image_cache',
     'draw_line',
     'draw_polygon',
     'draw_ellipse',
@@ -0,0 +1,96 @@
+"""
+Light matrix construction compiled with Numba when it is available.
+
+Every function writes a row-major 4x4 float32 matrix into a caller-owned
+out buffer and returns it. Without Numba the same code runs as plain Python.
+"""
+import math
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+def look_at(eye, target, up, out):
+    """Writes a right-handed lookAt view matrix into out.
+
+    Falls back to +z as up when looking along up (e.g. a light pointing
+    straight down).
+    """
+    ex, ey, ez = eye[0], eye[1], eye[2]
+    fx, fy, fz = target[0] - ex, target[1] - ey, target[2] - ez
+    inv = 1.0 / math.sqrt(fx * fx + fy * fy + fz * fz)
+    fx, fy, fz = fx * inv, fy * inv, fz * inv
+    # s = f x up
+    sx = fy * up[2] - fz * up[1]
+    sy = fz * up[0] - fx * up[2]
+    sz = fx * up[1] - fy * up[0]
+    length2 = sx * sx + sy * sy + sz * sz
+    if length2 < 1e-12:
+        sx, sy, sz = fy, -fx, 0.0
+        length2 = sx * sx + sy * sy
+    inv = 1.0 / math.sqrt(length2)
+    sx, sy, sz = sx * inv, sy * inv, sz * inv
+    # u = s x f
+    ux, uy, uz = sy * fz - sz * fy, sz * fx - sx * fz, sx * fy - sy * fx
+    out[0, 0] = sx
+    out[0, 1] = sy
+    out[0, 2] = sz
+    out[0, 3] = -(sx * ex + sy * ey + sz * ez)
+    out[1, 0] = ux
+    out[1, 1] = uy
+    out[1, 2] = uz
+    out[1, 3] = -(ux * ex + uy * ey + uz * ez)
+    out[2, 0] = -fx
+    out[2, 1] = -fy
+    out[2, 2] = -fz
+    out[2, 3] = fx * ex + fy * ey + fz * ez
+    out[3, 0] = 0.0
+    out[3, 1] = 0.0
+    out[3, 2] = 0.0
+    out[3, 3] = 1.0
+    return out
+
+def perspective(fov, aspect, near, far, out):
+    """Writes a perspective projection matrix (fov in radians) into out."""
+    f = 1.0 / math.tan(fov * 0.5)
+    out[:, :] = 0.0
+    out[0, 0] = f / aspect
+    out[1, 1] = f
+    out[2, 2] = (far + near) / (near - far)
+    out[2, 3] = 2.0 * far * near / (near - far)
+    out[3, 2] = -1.0
+    return out
+
+def ortho(left, right, bottom, top, near, far, out):
+    """Writes an orthographic projection matrix into out."""
+    out[:, :] = 0.0
+    out[0, 0] = 2.0 / (right - left)
+    out[1, 1] = 2.0 / (top - bottom)
+    out[2, 2] = -2.0 / (far - near)
+    out[0, 3] = -(right + left) / (right - left)
+    out[1, 3] = -(top + bottom) / (top - bottom)
+    out[2, 3] = -(far + near) / (far - near)
+    out[3, 3] = 1.0
+    return out
+
+if njit is not None:
+    look_at = njit(cache=True, fastmath=True)(look_at)
+    perspective = njit(cache=True, fastmath=True)(perspective)
+    ortho = njit(cache=True, fastmath=True)(ortho)
+
+def warm_up() -> None:
+    """Compiles the kernels for the float32 buffers Light passes in.
+
+    Numba compiles on first call; with cache=True later runs load the
+    compiled code from disk. Does nothing without Numba.
+    """
+    if njit is None:
+        return
+    vec = np.zeros(3, dtype=np.float32)
+    out = np.empty((4, 4), dtype=np.float32)
+    look_at(vec, np.array((0.0, 0.0, -1.0), dtype=np.float32),
+            np.array((0.0, 1.0, 0.0), dtype=np.float32), out)
+    perspective(1.0, 1.0, 0.1, 100.0, out)
+    ortho(-1.0, 1.0, -1.0, 1.0, 0.1, 100.0, out)
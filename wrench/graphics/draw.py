@@ -2,8 +2,39 @@
 Basic drawing functions.
 """
 import pygame
-import math
-from typing import Tuple, List, Optional, Union
+import numpy as np
+from functools import lru_cache
+from typing import Tuple, List, Optional, Union, Dict
+
+# Loaded images keyed by (path, size)
+_IMAGE_CACHE: Dict[Tuple[str, Optional[Tuple[int, int]]], pygame.Surface] = {}
+
+# (N, 2) unit vectors for N evenly spaced points starting at the top
+_UNIT_POLY_CACHE: Dict[int, np.ndarray] = {}
+
+def _unit_polygon(point_count: int) -> np.ndarray:
+    """Returns cached (cos, sin) unit vectors for a regular polygon."""
+    unit = _UNIT_POLY_CACHE.get(point_count)
+    if unit is None:
+        angles = 2 * np.pi * np.arange(point_count) / point_count - np.pi / 2
+        unit = np.column_stack((np.cos(angles), np.sin(angles)))
+        _UNIT_POLY_CACHE[point_count] = unit
+    return unit
+
+@lru_cache(maxsize=128)
+def _get_font(font_name: str, font_size: int) -> pygame.font.Font:
+    """Returns a cached system font."""
+    return pygame.font.SysFont(font_name, font_size)
+
+@lru_cache(maxsize=256)
+def _render_text(text: str, font_name: str, font_size: int,
+                 color: Tuple[int, int, int], antialias: bool) -> pygame.Surface:
+    """Returns a cached rendered text surface."""
+    rendered = _get_font(font_name, font_size).render(text, antialias, color)
+    # Match the display pixel format so blits don't convert per pixel
+    if pygame.display.get_surface() is not None:
+        rendered = rendered.convert_alpha()
+    return rendered
 
 def draw_rectangle(surface: pygame.Surface, color: Tuple[int, int, int], 
                   rect: Tuple[float, float, float, float], 
@@ -32,8 +63,7 @@ def draw_text(surface: pygame.Surface, text: str,
              color: Tuple[int, int, int] = (255, 255, 255),
              antialias: bool = True) -> None:
     """Draws text."""
-    font = pygame.font.SysFont(font_name, font_size)
-    text_surface = font.render(text, antialias, color)
+    text_surface = _render_text(text, font_name, font_size, tuple(color), antialias)
     surface.blit(text_surface, position)
 
 def draw_image(surface: pygame.Surface, image_path: str, 
@@ -41,13 +71,37 @@ def draw_image(surface: pygame.Surface, image_path: str,
               size: Optional[Tuple[float, float]] = None) -> None:
     """Draws an image."""
     try:
-        image = pygame.image.load(image_path)
-        if size:
-            image = pygame.transform.scale(image, (int(size[0]), int(size[1])))
+        image = preload_image(image_path, size)
         surface.blit(image, position)
     except pygame.error as e:
         print(f"Failed to load image: {e}")
 
+def preload_image(image_path: str, 
+                 size: Optional[Tuple[float, float]] = None) -> pygame.Surface:
+    """Loads an image into the image cache and returns it.
+    
+    Args:
+        image_path: Path of the image file
+        size: Optional (width, height) to scale the image to
+    """
+    if size:
+        size = (int(size[0]), int(size[1]))
+    key = (image_path, size)
+    image = _IMAGE_CACHE.get(key)
+    if image is None:
+        image = pygame.image.load(image_path)
+        # Match the display pixel format so blits don't convert per pixel
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha()
+        if size:
+            image = pygame.transform.scale(image, size)
+        _IMAGE_CACHE[key] = image
+    return image
+
+def clear_image_cache() -> None:
+    """Removes all cached images."""
+    _IMAGE_CACHE.clear()
+
 def draw_line(surface: pygame.Surface, color: Tuple[int, int, int], 
              start_pos: Tuple[float, float], end_pos: Tuple[float, float], 
              width: int = 1) -> None:
@@ -77,13 +131,8 @@ def draw_star(surface: pygame.Surface, color: Tuple[int, int, int],
              outer_radius: float, inner_radius: float, 
              points: int = 5, width: int = 0) -> None:
     """Draws a star."""
-    point_list = []
-    for i in range(points * 2):
-        radius = inner_radius if i % 2 else outer_radius
-        angle = math.pi / points * i - math.pi / 2
-        x = center[0] + math.cos(angle) * radius
-        y = center[1] + math.sin(angle) * radius
-        point_list.append((x, y))
+    radii = np.where(np.arange(points * 2) % 2, inner_radius, outer_radius)
+    point_list = (_unit_polygon(points * 2) * radii[:, None] + center).tolist()
     
     if width == 0:
         pygame.draw.polygon(surface, color, point_list)
@@ -104,12 +153,7 @@ def draw_regular_polygon(surface: pygame.Surface,
                        radius: float, point_count: int, 
                        width: int = 0) -> None:
     """Draws a regular polygon."""
-    points = []
-    for i in range(point_count):
-        angle = 2 * math.pi * i / point_count - math.pi / 2
-        x = center[0] + math.cos(angle) * radius
-        y = center[1] + math.sin(angle) * radius
-        points.append((x, y))
+    points = (_unit_polygon(point_count) * radius + center).tolist()
     
     if width == 0:
         pygame.draw.polygon(surface, color, points)
@@ -3,22 +3,29 @@ Advanced HDR rendering system with physically-based lighting, shadows, and atmos
 This module provides high-quality rendering features for realistic graphics.
 """
 from dataclasses import dataclass, field
-from typing import List, Tuple, Optional, Dict, Any
+from typing import List, Tuple, Optional, Dict, Any, Callable
 import numpy as np
 import moderngl
 import glm
 import pygame
 from pygame import gfxdraw
-from enum import Enum, auto
+from enum import Enum, IntEnum, auto
+from functools import lru_cache
 import random
 import math
+import operator
+import time
+import weakref
+from ._math_native import look_at, perspective, ortho, warm_up as _warm_up_math
+from .shaders import (BLIT_FRAGMENT_SHADER, COMPOSITE_FRAGMENT_SHADER,
+                      FULLSCREEN_TRIANGLE_VERTEX_SHADER, with_defines)
 
 # Constants
 HDR_MAX_LUMINANCE = 10000.0  # Maximum HDR value (nits)
 HDR_EXPOSURE = 1.0           # Default exposure
 HDR_GAMMA = 2.2              # Gamma correction value
 
-class LightType(Enum):
+class LightType(IntEnum):
     """Types of light sources with physical properties."""
     DIRECTIONAL = auto()  # Sun/moon - infinite distance, parallel rays
     POINT = auto()        # Omnidirectional point light (light bulbs)
@@ -29,28 +36,273 @@ class LightType(Enum):
     VOLUME = auto()       # Volumetric light (god rays, light shafts)
     IES = auto()          # IES profile-based light
 
-@dataclass
+def _vec(*values: float):
+    """Returns a dataclass field defaulting to a new float32 vector of values."""
+    return field(default_factory=lambda: np.array(values, dtype=np.float32))
+
+# Vector Light fields, stored as float32 arrays
+_LIGHT_VECTOR_FIELDS = frozenset((
+    'color', 'position', 'rotation', 'direction', 'attenuation', 'area_size'
+))
+
+# Spot cone angle fields -> attribute caching cos(angle / 2)
+_LIGHT_COS_FIELDS = {'inner_angle': '_cos_inner_half', 'outer_angle': '_cos_outer_half'}
+
+# Light fields that invalidate the cached view/projection matrices
+_LIGHT_MATRIX_FIELDS = frozenset((
+    'light_type', 'position', 'rotation', 'direction', 'range', 'outer_angle'
+))
+
+# Lights sharing a fixture type share these; keys are rounded by the callers
+@lru_cache(maxsize=2048)
+def _perspective(fov: float, aspect: float, near: float, far: float) -> np.ndarray:
+    """Returns a shared, read-only perspective projection matrix (row-major)."""
+    m = perspective(fov, aspect, near, far, np.empty((4, 4), dtype=np.float32))
+    m.setflags(write=False)
+    return m
+
+@lru_cache(maxsize=2048)
+def _ortho(left: float, right: float, bottom: float, top: float,
+           near: float, far: float) -> np.ndarray:
+    """Returns a shared, read-only orthographic projection matrix (row-major)."""
+    m = ortho(left, right, bottom, top, near, far, np.empty((4, 4), dtype=np.float32))
+    m.setflags(write=False)
+    return m
+
+def _respecify_depth16(texture: Any, size: Tuple[int, int], cube: bool = False) -> None:
+    """Reallocates a ModernGL depth texture as GL_DEPTH_COMPONENT16.
+    
+    ModernGL only creates 24-bit depth textures; re-specifying the storage
+    keeps the wrapper usable as a depth attachment at half the memory.
+    """
+    if cube:
+        glBindTexture(GL_TEXTURE_CUBE_MAP, texture.glo)
+        targets = [GL_TEXTURE_CUBE_MAP_POSITIVE_X + face for face in range(6)]
+    else:
+        glBindTexture(GL_TEXTURE_2D, texture.glo)
+        targets = [GL_TEXTURE_2D]
+    for target in targets:
+        glTexImage2D(target, 0, GL_DEPTH_COMPONENT16, size[0], size[1], 0,
+                     GL_DEPTH_COMPONENT, GL_UNSIGNED_SHORT, None)
+
+# Initial number of rows in a LightPool
+MAX_LIGHTS = 256
+
+# Per-light shader data, laid out like a std140 struct (vec4s first, 128 bytes)
+LIGHT_DTYPE = np.dtype([
+    ('position', 'f4', 4),       # w = 0 for directional lights
+    ('direction', 'f4', 4),
+    ('color', 'f4', 4),
+    ('attenuation', 'f4', 4),    # constant, linear, quadratic, unused
+    ('area_size', 'f4', 4),      # width, height, unused, unused
+    ('type', 'i4'),              # LightType value; 0 marks a free row
+    ('shadow_map_index', 'i4'),
+    ('ies_texture_index', 'i4'),
+    ('volumetric', 'f4'),
+    ('intensity', 'f4'),
+    ('range', 'f4'),
+    ('inner_angle', 'f4'),       # Cosine of half the inner cone angle
+    ('outer_angle', 'f4'),       # Cosine of half the outer cone angle
+    ('shadow_bias', 'f4'),
+    ('shadow_normal_bias', 'f4'),
+    ('shadow_softness', 'f4'),
+    ('volumetric_intensity', 'f4'),
+])
+
+class LightPool:
+    """Contiguous LIGHT_DTYPE rows for all lights, uploaded as a single buffer."""
+    
+    def __init__(self, capacity: int = MAX_LIGHTS):
+        self.buf = np.zeros(capacity, dtype=LIGHT_DTYPE)
+        self.active = np.zeros(capacity, dtype=bool)  # Row's light is enabled and visible
+        self.version = 0  # Bumped whenever a row's active flag changes
+        self._free: List[int] = []
+        self._next = 0
+    
+    def allocate(self) -> int:
+        """Reserves a row and returns its index."""
+        if self._free:
+            return self._free.pop()
+        slot = self._next
+        self._next += 1
+        if slot >= len(self.buf):
+            self.buf = np.concatenate((self.buf, np.zeros_like(self.buf)))
+            self.active = np.concatenate((self.active, np.zeros_like(self.active)))
+        return slot
+    
+    def release(self, slot: int) -> None:
+        """Clears a row and makes it available again."""
+        self.buf[slot] = 0
+        self.set_active(slot, False)
+        self._free.append(slot)
+    
+    def set_active(self, slot: int, active: bool) -> None:
+        """Records whether the light in a row is enabled and visible."""
+        if self.active[slot] != active:
+            self.active[slot] = active
+            self.version += 1
+    
+    @property
+    def data(self) -> np.ndarray:
+        """Rows up to the highest one in use, e.g. for ctx.buffer(data=pool.data)."""
+        return self.buf[:self._next]
+
+LIGHT_POOL = LightPool()
+
+# Texture unit of the IES atlas (u_IESAtlas in shaders.IES_SAMPLING)
+IES_ATLAS_BINDING = 9
+
+# IES profiles are resampled to one texel per degree: 360 horizontal x 181 vertical
+IES_ATLAS_SIZE = (360, 181)
+MAX_IES_PROFILES = 64
+
+class IESAtlas:
+    """Texture array holding every uploaded IES profile, one layer per profile.
+    
+    Lights pass their profile's layer as ies_texture_index and the shader
+    samples the array directly, so profiles are never resampled per frame.
+    """
+    
+    def __init__(self, max_profiles: int = MAX_IES_PROFILES):
+        self.max_profiles = max_profiles
+        self.texture = None  # R16F texture array, created by the first add()
+        self._next = 0
+    
+    def add(self, ctx, image: np.ndarray) -> int:
+        """Uploads a (181, 360) relative-candela image into a free layer and returns it."""
+        if self._next >= self.max_profiles:
+            raise ValueError(f"IES atlas is full ({self.max_profiles} profiles)")
+        if self.texture is None:
+            width, height = IES_ATLAS_SIZE
+            self.texture = ctx.texture_array((width, height, self.max_profiles), 1, dtype='f2')
+            self.texture.repeat_y = False  # Vertical angles clamp; horizontal ones wrap
+        layer = self._next
+        self._next += 1
+        self.texture.write(np.ascontiguousarray(image, dtype=np.float16),
+                           viewport=(0, 0, layer, *IES_ATLAS_SIZE, 1))
+        return layer
+    
+    def use(self, location: int = IES_ATLAS_BINDING) -> None:
+        """Binds the atlas to its texture unit."""
+        if self.texture is not None:
+            self.texture.use(location)
+
+IES_ATLAS = IESAtlas()
+
+def _parse_ies(filepath: str) -> np.ndarray:
+    """Parses an IESNA LM-63 file into a flat float32 [n_h, n_v, h..., v..., candela...] array.
+    
+    Candela values are scaled by the candela multiplier and ballast factor.
+    """
+    with open(filepath, 'r', errors='replace') as f:
+        lines = f.read().splitlines()
+    for index, line in enumerate(lines):
+        if line.strip().upper().startswith('TILT='):
+            break
+    else:
+        raise ValueError(f"{filepath}: missing TILT= line")
+    tokens = ' '.join(lines[index + 1:]).replace(',', ' ').split()
+    values = np.array(tokens, dtype=np.float32)
+    
+    pos = 0
+    if lines[index].split('=', 1)[1].strip().upper() == 'INCLUDE':
+        # Lamp-to-luminaire geometry, then n tilt angles and n multiplying factors
+        pos = 2 + 2 * int(values[1])
+    multiplier = values[pos + 2]
+    n_v, n_h = int(values[pos + 3]), int(values[pos + 4])
+    ballast_factor = values[pos + 10]
+    pos += 13  # Skip to the angle lists
+    
+    vertical = values[pos:pos + n_v]
+    horizontal = values[pos + n_v:pos + n_v + n_h]
+    candela = values[pos + n_v + n_h:pos + n_v + n_h + n_h * n_v] * (multiplier * ballast_factor)
+    if len(candela) != n_h * n_v:
+        raise ValueError(f"{filepath}: expected {n_h * n_v} candela values, found {len(candela)}")
+    return np.concatenate(((n_h, n_v), horizontal, vertical, candela)).astype(np.float32)
+
+@dataclass(slots=True)
 class LightProfile:
     """IES light profile data for realistic light distribution."""
     name: str
     data: np.ndarray  # Photometric data
-    horizontal_angles: np.ndarray
-    vertical_angles: np.ndarray
-    candela_values: np.ndarray
+    horizontal_angles: np.ndarray  # Degrees, ascending; 0, 0-90, 0-180 or 0-360
+    vertical_angles: np.ndarray    # Degrees, ascending, 0 = straight down
+    candela_values: np.ndarray     # (len(horizontal_angles), len(vertical_angles))
+    _atlas_layer: int = field(init=False, repr=False, default=-1)  # Layer in IES_ATLAS
     
     @classmethod
     def from_ies_file(cls, filepath: str) -> 'LightProfile':
-        """Load IES profile from .ies file."""
-        # Parse IES file and extract photometric data
-        # Implementation depends on IES file parser
-        pass
+        """Load IES profile from .ies file.
+        
+        The parsed grid is cached next to the file as <filepath>.cache.npy
+        and memory-mapped on later loads while it is newer than the source.
+        """
+        name = os.path.splitext(os.path.basename(filepath))[0]
+        cache = filepath + '.cache.npy'
+        try:
+            if os.path.getmtime(cache) >= os.path.getmtime(filepath):
+                return cls._from_grid(name, np.load(cache, mmap_mode='r'))
+        except (OSError, ValueError):
+            pass
+        
+        grid = _parse_ies(filepath)
+        try:
+            np.save(cache, grid)
+        except OSError:
+            pass  # Read-only location; parse again next time
+        return cls._from_grid(name, grid)
     
-    def to_texture(self, ctx) -> Any:
-        """Convert IES profile to a 2D texture for GPU sampling."""
-        # Convert photometric data to 2D texture
-        pass
+    @classmethod
+    def _from_grid(cls, name: str, grid: np.ndarray) -> 'LightProfile':
+        """Builds a profile from a flat [n_h, n_v, h..., v..., candela...] array."""
+        n_h, n_v = int(grid[0]), int(grid[1])
+        horizontal = grid[2:2 + n_h]
+        vertical = grid[2 + n_h:2 + n_h + n_v]
+        candela = grid[2 + n_h + n_v:].reshape(n_h, n_v)
+        return cls(name, candela, horizontal, vertical, candela)
+    
+    def to_image(self) -> np.ndarray:
+        """Resamples the candela grid to a (181, 360) float16 image, normalized to 1.
+        
+        Rows are vertical angles and columns horizontal angles in one degree
+        steps; symmetric profiles (last horizontal angle 0, 90 or 180) are
+        mirrored around the full circle.
+        """
+        horizontal = np.asarray(self.horizontal_angles, dtype=np.float32)
+        vertical = np.asarray(self.vertical_angles, dtype=np.float32)
+        candela = np.asarray(self.candela_values, dtype=np.float32)
+        
+        # Interpolate each measured plane over 0..180 degrees vertically
+        steps = np.arange(IES_ATLAS_SIZE[1], dtype=np.float32)
+        planes = np.array([np.interp(steps, vertical, row, left=0.0, right=0.0) for row in candela])
+        
+        # Fold 0..359 degrees into the measured horizontal range
+        angles = np.arange(IES_ATLAS_SIZE[0], dtype=np.float32)
+        last = horizontal[-1]
+        if len(horizontal) == 1:
+            rows = np.repeat(planes, IES_ATLAS_SIZE[0], axis=0)
+        else:
+            if last == 90.0:
+                angles = angles % 180.0
+                angles = np.where(angles > 90.0, 180.0 - angles, angles)
+            elif last == 180.0:
+                angles = np.where(angles > 180.0, 360.0 - angles, angles)
+            i = np.clip(np.searchsorted(horizontal, angles, side='right') - 1, 0, len(horizontal) - 2)
+            t = np.clip((angles - horizontal[i]) / (horizontal[i + 1] - horizontal[i]), 0.0, 1.0)[:, None]
+            rows = planes[i] * (1.0 - t) + planes[i + 1] * t
+        
+        peak = rows.max()
+        if peak > 0.0:
+            rows /= peak
+        return np.ascontiguousarray(rows.T, dtype=np.float16)
+    
+    def to_texture(self, ctx) -> int:
+        """Uploads the profile into IES_ATLAS once and returns its layer."""
+        if self._atlas_layer < 0:
+            self._atlas_layer = IES_ATLAS.add(ctx, self.to_image())
+        return self._atlas_layer
 
-@dataclass
+@dataclass(eq=False, slots=True, weakref_slot=True)
 class Light:
     """Advanced light source with physical properties and IES profiles."""
     # Basic properties
@@ -61,18 +313,20 @@ class Light:
     layer_mask: int = 0xFFFFFFFF  # Which layers this light affects
     
     # Color and intensity
-    color: Tuple[float, float, float] = (1.0, 0.95, 0.9)  # Warm white by default
+    color: np.ndarray = _vec(1.0, 0.95, 0.9)  # Warm white by default
     temperature: float = 6500.0  # Color temperature in Kelvin
     intensity: float = 1000.0    # In lumens (for point/spot) or lux (for directional)
     
     # Position and orientation
-    position: Tuple[float, float, float] = (0, 10, 0)
-    rotation: Tuple[float, float, float] = (0, 0, 0)
-    direction: Tuple[float, float, float] = (0, -1, 0)  # For directional/spot lights
+    # Vectors are read-only float32 arrays; assign a whole new vector to change one,
+    # which also marks the matrices dirty (light.position[0] = x raises)
+    position: np.ndarray = _vec(0.0, 10.0, 0.0)
+    rotation: np.ndarray = _vec(0.0, 0.0, 0.0)
+    direction: np.ndarray = _vec(0.0, -1.0, 0.0)  # For directional/spot lights
     
     # Attenuation (for point/spot lights)
     range: float = 10.0  # Maximum range in meters
-    attenuation: Tuple[float, float, float] = (1.0, 0.09, 0.032)  # Constant, Linear, Quadratic
+    attenuation: np.ndarray = _vec(1.0, 0.09, 0.032)  # Constant, Linear, Quadratic
     
     # Spotlight properties
     inner_angle: float = 30.0  # In degrees
@@ -80,7 +334,7 @@ class Light:
     falloff: float = 1.0       # Falloff exponent
     
     # Area light properties
-    area_size: Tuple[float, float] = (1.0, 1.0)  # Width and height in meters
+    area_size: np.ndarray = _vec(1.0, 1.0)  # Width and height in meters
     area_shape: str = 'rect'   # 'rect' or 'disk'
     
     # IES profile
@@ -90,7 +344,8 @@ class Light:
     
     # Shadows
     casts_shadows: bool = True
-    shadow_map_size: int = 4096  # Higher resolution for better quality
+    shadow_map_size: Optional[int] = None  # None: 4096 for directional lights, 2048 otherwise
+    shadow_precision: int = 16  # Depth bits for point/spot shadow maps; other values keep 24-bit depth
     shadow_bias: float = 0.001
     shadow_normal_bias: float = 0.05
     shadow_softness: float = 0.5  # PCSS soft shadows
@@ -114,22 +369,90 @@ class Light:
     # Runtime data
     _shadow_map: Optional[Any] = None
     _shadow_fbo: Optional[Any] = None
-    _view_matrix: np.ndarray = field(init=False)
-    _projection_matrix: np.ndarray = field(init=False)
+    # Matrices are row-major float32; transpose before uploading to GL
+    _view_matrix: np.ndarray = field(
+        init=False, repr=False, default_factory=lambda: np.identity(4, dtype=np.float32))
+    _projection_matrix: np.ndarray = field(
+        init=False, repr=False, default_factory=lambda: np.identity(4, dtype=np.float32))
     _frustum: Optional[Any] = None
+    # Scratch vectors reused by _update_matrices
+    _target_buf: np.ndarray = field(
+        init=False, repr=False, default_factory=lambda: np.zeros(3, dtype=np.float32))
+    _up_buf: np.ndarray = field(
+        init=False, repr=False, default_factory=lambda: np.array((0, 1, 0), dtype=np.float32))
+    _matrices_dirty: bool = field(init=False, repr=False, default=True)
+    _last_frame_visible: int = field(init=False, repr=False, default=-1)
+    # cos(angle / 2) of the spot cone, as uploaded in get_light_data
+    _cos_inner_half: float = field(init=False, repr=False, default=1.0)
+    _cos_outer_half: float = field(init=False, repr=False, default=1.0)
+    _slot: int = field(init=False, repr=False, default=-1)  # Row in LIGHT_POOL
+    # Frees the row when the light is garbage collected or released
+    _row_finalizer: Optional[weakref.finalize] = field(init=False, repr=False, default=None)
     
     def __post_init__(self):
-        self._update_matrices()
+        # Matrices are built by the first update() that finds the light visible
+        self._slot = LIGHT_POOL.allocate()
+        self._row_finalizer = weakref.finalize(self, LIGHT_POOL.release, self._slot)
+        LIGHT_POOL.set_active(self._slot, self.enabled and self.visible)
+        # __init__ assigns the _cos_* defaults after the angles, so redo them here
+        self._recompute_spot_cosines()
+        if self.shadow_map_size is None:
+            self.shadow_map_size = 4096 if self.light_type == LightType.DIRECTIONAL else 2048
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in _LIGHT_VECTOR_FIELDS:
+            vector = np.array(value, dtype=np.float32)
+            vector.flags.writeable = False
+            object.__setattr__(self, name, vector)
+        else:
+            object.__setattr__(self, name, value)
+        if name in _LIGHT_MATRIX_FIELDS:
+            object.__setattr__(self, '_matrices_dirty', True)
+        elif name in ('enabled', 'visible') and getattr(self, '_slot', -1) >= 0:
+            LIGHT_POOL.set_active(self._slot, self.enabled and self.visible)
+        cos_name = _LIGHT_COS_FIELDS.get(name)
+        if cos_name is not None:
+            object.__setattr__(self, cos_name, math.cos(math.radians(value * 0.5)))
+    
+    def _recompute_spot_cosines(self) -> None:
+        """Recomputes the cached cosines of the half cone angles."""
+        self._cos_inner_half = math.cos(math.radians(self.inner_angle * 0.5))
+        self._cos_outer_half = math.cos(math.radians(self.outer_angle * 0.5))
+    
+    def update(self, frame_idx: int, frustum: Optional[Any] = None) -> bool:
+        """Per-frame update; returns whether the light contributes this frame.
+        
+        Disabled, invisible and culled lights are skipped without touching
+        their matrices, which are only rebuilt once they are visible again.
+        
+        Args:
+            frame_idx: Index of the frame being rendered
+            frustum: Camera frustum with contains_sphere(center, radius);
+                None disables culling. Directional lights are never culled.
+        """
+        if not (self.enabled and self.visible):
+            return False
+        if (frustum is not None and self.light_type != LightType.DIRECTIONAL
+                and not frustum.contains_sphere(self.position, self.range)):
+            return False
+        self._last_frame_visible = frame_idx
+        if self._matrices_dirty:
+            self._update_matrices()
+        return True
     
     def _update_matrices(self) -> None:
-        """Update light view and projection matrices."""
+        """Update light view and projection matrices if the light has changed."""
+        if not self._matrices_dirty:
+            return
+        self._matrices_dirty = False
+        
         if self.light_type == LightType.DIRECTIONAL:
             # Orthographic projection for directional lights
-            self._view_matrix = self._get_directional_view_matrix()
+            self._get_directional_view_matrix()
             self._projection_matrix = self._get_ortho_projection()
         elif self.light_type in (LightType.POINT, LightType.SPOT):
             # Perspective projection for point/spot lights
-            self._view_matrix = self._get_point_view_matrix()
+            self._get_point_view_matrix()
             self._projection_matrix = self._get_perspective_projection()
         
         # Update frustum for culling
@@ -137,41 +460,36 @@ class Light:
     
     def _get_directional_view_matrix(self) -> np.ndarray:
         """Get view matrix for directional light."""
-        return glm.lookAt(
-            np.array(self.position, dtype=np.float32),
-            np.array(self.position, dtype=np.float32) + np.array(self.direction, dtype=np.float32),
-            np.array([0, 1, 0], dtype=np.float32)
-        )
+        np.add(self.position, self.direction, out=self._target_buf)
+        return look_at(self.position, self._target_buf, self._up_buf, self._view_matrix)
     
     def _get_point_view_matrix(self) -> np.ndarray:
         """Get view matrix for point/spot light."""
-        return glm.lookAt(
-            np.array(self.position, dtype=np.float32),
-            np.array(self.position, dtype=np.float32) + np.array(self.direction, dtype=np.float32),
-            np.array([0, 1, 0], dtype=np.float32)  # Up vector
-        )
+        np.add(self.position, self.direction, out=self._target_buf)
+        return look_at(self.position, self._target_buf, self._up_buf, self._view_matrix)
     
     def _get_ortho_projection(self, cascade_index: int = 0, num_cascades: int = 1) -> np.ndarray:
         """Get orthographic projection for directional light with CSM support."""
         # Implementation for cascaded shadow maps
         # This is a simplified version - actual implementation would use scene bounds
-        return glm.ortho(-10, 10, -10, 10, 0.1, 100.0)
+        return _ortho(-10.0, 10.0, -10.0, 10.0, 0.1, 100.0)
     
     def _get_perspective_projection(self) -> np.ndarray:
         """Get perspective projection for point/spot light."""
+        # Rounded so lights with nearly equal parameters share a cached matrix
         if self.light_type == LightType.SPOT:
-            return glm.perspective(
-                glm.radians(self.outer_angle * 2),  # FOV
+            return _perspective(
+                round(math.radians(self.outer_angle * 2), 5),  # FOV
                 1.0,  # Aspect ratio
                 0.1,  # Near plane
-                self.range  # Far plane
+                round(float(self.range), 3)  # Far plane
             )
         else:  # Point light
-            return glm.perspective(
-                glm.radians(90),  # 90° for each face of the cubemap
+            return _perspective(
+                math.radians(90),  # 90° for each face of the cubemap
                 1.0,  # Aspect ratio
                 0.1,  # Near plane
-                self.range  # Far plane
+                round(float(self.range), 3)  # Far plane
             )
     
     def _update_frustum(self) -> None:
@@ -180,48 +498,81 @@ class Light:
         pass
     
     def get_shadow_map(self, ctx, index: int = 0) -> Any:
-        """Get or create shadow map texture."""
+        """Get or create shadow map texture.
+        
+        Point and spot lights use 16-bit depth when shadow_precision is 16;
+        directional lights (the CSM cascades) keep full precision.
+        """
         if self._shadow_map is None:
+            size = (self.shadow_map_size, self.shadow_map_size)
+            depth16 = self.shadow_precision == 16 and self.light_type != LightType.DIRECTIONAL
             if self.light_type == LightType.POINT:
                 # Cube map for point light shadows
-                self._shadow_map = ctx.texture_cube(
-                    (self.shadow_map_size, self.shadow_map_size),
-                    1,  # 1 channel (depth)
-                    dtype='f4'
-                )
+                self._shadow_map = ctx.depth_texture_cube(size)
+                if depth16:
+                    _respecify_depth16(self._shadow_map, size, cube=True)
             else:
                 # 2D texture for directional/spot lights
-                self._shadow_map = ctx.depth_texture(
-                    (self.shadow_map_size, self.shadow_map_size)
-                )
+                self._shadow_map = ctx.depth_texture(size)
+                if depth16:
+                    _respecify_depth16(self._shadow_map, size)
+                # Lighting samples it as sampler2DShadow; textureGather compares in hardware
+                self._shadow_map.compare_func = '<='
                 self._shadow_fbo = ctx.framebuffer(depth_attachment=self._shadow_map)
         
         return self._shadow_map, self._shadow_fbo
     
-    def get_light_data(self) -> Dict:
-        """Get light data for shader uniforms."""
-        return {
-            'type': self.light_type.value,
-            'position': (*self.position, 1.0 if self.light_type != LightType.DIRECTIONAL else 0.0),
-            'direction': (*self.direction, 0.0),
-            'color': (*self.color, 1.0),
-            'intensity': self.intensity,
-            'range': self.range,
-            'inner_angle': math.cos(math.radians(self.inner_angle * 0.5)),
-            'outer_angle': math.cos(math.radians(self.outer_angle * 0.5)),
-            'attenuation': self.attenuation,
-            'shadow_map_index': 0,  # Will be set by renderer
-            'shadow_bias': self.shadow_bias,
-            'shadow_normal_bias': self.shadow_normal_bias,
-            'shadow_softness': self.shadow_softness,
-            'volumetric': 1.0 if self.volumetric else 0.0,
-            'volumetric_intensity': self.volumetric_intensity,
-            'area_size': (*self.area_size, 0.0, 0.0) if self.light_type == LightType.AREA else (0.0, 0.0, 0.0, 0.0),
-            'ies_texture_index': -1  # Will be set if IES profile is used
-        }
+    def get_light_data(self) -> np.void:
+        """Writes the light's shader data into its LIGHT_POOL row and returns the row.
+        
+        This used to return a new dict. The row is now a LIGHT_DTYPE record
+        viewing LIGHT_POOL.buf, so the whole pool uploads as one buffer.
+        Fields still read by name (row['intensity']), but vectors are
+        fixed-size arrays (position and color are vec4) and there are no
+        dict methods. Later calls overwrite the row; use dict(zip(
+        row.dtype.names, row.item())) for a detached copy.
+        """
+        row = LIGHT_POOL.buf[self._slot]
+        row['type'] = self.light_type
+        row['position'][:3] = self.position
+        row['position'][3] = 1.0 if self.light_type != LightType.DIRECTIONAL else 0.0
+        row['direction'][:3] = self.direction
+        row['color'][:3] = self.color
+        row['color'][3] = 1.0
+        row['attenuation'][:3] = self.attenuation
+        if self.light_type == LightType.AREA:
+            row['area_size'][:2] = self.area_size
+        else:
+            row['area_size'][:2] = 0.0
+        row['intensity'] = self.intensity
+        row['range'] = self.range
+        row['inner_angle'] = self._cos_inner_half
+        row['outer_angle'] = self._cos_outer_half
+        row['shadow_map_index'] = -1  # Set by the renderer for lights it has a shadow map for
+        row['shadow_bias'] = self.shadow_bias
+        row['shadow_normal_bias'] = self.shadow_normal_bias
+        row['shadow_softness'] = self.shadow_softness
+        row['volumetric'] = 1.0 if self.volumetric else 0.0
+        row['volumetric_intensity'] = self.volumetric_intensity
+        # Layer in IES_ATLAS, or -1 until the profile is uploaded with to_texture()
+        row['ies_texture_index'] = self.ies_profile._atlas_layer if self.ies_profile is not None else -1
+        return row
+    
+    @property
+    def light_index(self) -> int:
+        """Row of this light in LIGHT_POOL, as stored in the shader's cluster light lists."""
+        return self._slot
+    
+    def release(self) -> None:
+        """Frees the light's row in LIGHT_POOL now rather than when the light is collected.
+        
+        The light must not be used afterwards.
+        """
+        if self._slot >= 0:
+            self._row_finalizer()
+            self._slot = -1
 
-@dataclass
-class MaterialType(Enum):
+class MaterialType(IntEnum):
     """Types of materials with different shading models."""
     STANDARD = auto()       # Standard PBR material
     SUBSURFACE = auto()     # For skin, wax, marble
@@ -234,7 +585,131 @@ class MaterialType(Enum):
     HAIR = auto()           # For hair/fur rendering
     EYE = auto()            # Specialized for eyes
     
-@dataclass
+# Storage buffer binding point of MaterialTable (shaders.MATERIAL_TABLE_BLOCK)
+MATERIAL_SSBO_BINDING = 1
+
+# Initial number of rows in a MaterialTable
+MAX_MATERIALS = 256
+
+# Material uniforms in std140/std430 layout; each vec3 shares its 16 bytes with a float
+MATERIAL_DTYPE = np.dtype([
+    ('albedo', 'f4', 3), ('metallic', 'f4'),
+    ('emission', 'f4', 3), ('emission_strength', 'f4'),
+    ('subsurface_color', 'f4', 3), ('subsurface', 'f4'),
+    ('subsurface_radius', 'f4', 3), ('subsurface_ior', 'f4'),
+    ('uv_scale', 'f4', 2), ('uv_offset', 'f4', 2),
+    ('roughness', 'f4'), ('ao', 'f4'), ('subsurface_anisotropy', 'f4'), ('clearcoat', 'f4'),
+    ('clearcoat_roughness', 'f4'), ('sheen', 'f4'), ('sheen_tint', 'f4'), ('sheen_roughness', 'f4'),
+    ('anisotropic', 'f4'), ('anisotropic_rotation', 'f4'), ('transmission', 'f4'), ('ior', 'f4'),
+    ('thickness', 'f4'), ('displacement_strength', 'f4'), ('displacement_midlevel', 'f4'),
+    ('detail_scale', 'f4'),
+    ('alpha_cutoff', 'f4'), ('_pad', 'f4', 3),
+])
+
+# Material fields stored in MATERIAL_DTYPE; assigning one marks the block dirty
+_MATERIAL_UNIFORM_FIELDS = frozenset(
+    name for name in MATERIAL_DTYPE.names if not name.startswith('_'))
+
+# Texture fields in texture-unit order (unit 0 = albedo_map)
+_MATERIAL_TEXTURE_FIELDS = (
+    'albedo_map', 'normal_map', 'metallic_map', 'roughness_map', 'ao_map',
+    'emission_map', 'height_map', 'clearcoat_normal_map', 'anisotropic_map',
+    'thickness_map', 'detail_albedo_map', 'detail_normal_map', 'detail_roughness_map'
+)
+_MATERIAL_TEXTURE_FIELD_SET = frozenset(_MATERIAL_TEXTURE_FIELDS)
+
+# Shader define for each texture field; bit i of the defines key is set when
+# _MATERIAL_TEXTURE_FIELDS[i] has a texture
+_TEXTURE_DEFINES = (
+    'HAS_ALBEDO_MAP', 'HAS_NORMAL_MAP', 'HAS_METALLIC_MAP', 'HAS_ROUGHNESS_MAP', 'HAS_AO_MAP',
+    'HAS_EMISSION_MAP', 'HAS_HEIGHT_MAP', 'HAS_CLEARCOAT_NORMAL_MAP', 'HAS_ANISOTROPY_MAP',
+    'HAS_THICKNESS_MAP', 'HAS_DETAIL_ALBEDO_MAP', 'HAS_DETAIL_NORMAL_MAP', 'HAS_DETAIL_ROUGHNESS_MAP'
+)
+_BIT_TWO_SIDED = 13
+_ALPHA_MODE_SHIFT = 14      # 2 bits, index into _ALPHA_MODES
+_MATERIAL_TYPE_SHIFT = 16   # MaterialType value
+_ALPHA_MODES = ('OPAQUE', 'MASK', 'BLEND')
+
+# Material fields that change the shader defines
+_MATERIAL_DEFINE_FIELDS = _MATERIAL_TEXTURE_FIELD_SET | {'two_sided', 'alpha_mode', 'material_type'}
+
+@lru_cache(maxsize=None)
+def _shader_defines(defines_key: int) -> Dict[str, str]:
+    """Returns the shared defines dict for a Material.defines_key."""
+    defines = {'MATERIAL_TYPE': str(defines_key >> _MATERIAL_TYPE_SHIFT)}
+    for bit, name in enumerate(_TEXTURE_DEFINES):
+        defines[name] = '1' if defines_key >> bit & 1 else '0'
+    defines['TWO_SIDED'] = '1' if defines_key >> _BIT_TWO_SIDED & 1 else '0'
+    alpha_mode = _ALPHA_MODES[defines_key >> _ALPHA_MODE_SHIFT & 3]
+    defines['ALPHA_MODE'] = f'ALPHA_MODE_{alpha_mode}'
+    return defines
+
+class MaterialTable:
+    """MATERIAL_DTYPE rows for every Material, uploaded as one storage buffer.
+    
+    Shaders index materials[material_id] instead of binding a block per
+    material. Changed materials are repacked once per upload() and only
+    their rows are written, one write per run of consecutive ids.
+    """
+    
+    def __init__(self, capacity: int = MAX_MATERIALS):
+        self.buf = np.zeros(capacity, dtype=MATERIAL_DTYPE)
+        self._free: List[int] = []
+        self._next = 0
+        self._dirty: Dict[int, 'Material'] = {}  # Row -> material to repack
+        self._ssbo = None
+    
+    def allocate(self) -> int:
+        """Returns a free row, growing the table when it is full."""
+        if self._free:
+            return self._free.pop()
+        slot = self._next
+        self._next += 1
+        if slot >= len(self.buf):
+            self.buf = np.concatenate((self.buf, np.zeros_like(self.buf)))
+        return slot
+    
+    def release(self, slot: int) -> None:
+        """Clears a row and makes it available again."""
+        self._dirty.pop(slot, None)
+        self.buf[slot] = 0
+        self._free.append(slot)
+    
+    def mark_dirty(self, material: 'Material') -> None:
+        """Queues a material's row for the next upload()."""
+        self._dirty[material._id] = material
+    
+    def upload(self, ctx) -> None:
+        """Repacks changed materials and writes their rows to the storage buffer."""
+        if self._ssbo is None or self._ssbo.size < self.buf.nbytes:
+            # New or grown buffer: repack the queue, then write every row
+            if self._ssbo is not None:
+                self._ssbo.release()
+            self._ssbo = ctx.buffer(reserve=self.buf.nbytes)
+            for slot, material in self._dirty.items():
+                material._repack(self.buf[slot])
+            self._dirty.clear()
+            self._ssbo.write(self.buf)
+            return
+        if not self._dirty:
+            return
+        
+        for slot, material in self._dirty.items():
+            material._repack(self.buf[slot])
+        slots = np.fromiter(sorted(self._dirty), dtype=np.intp, count=len(self._dirty))
+        self._dirty.clear()
+        itemsize = MATERIAL_DTYPE.itemsize
+        for run in np.split(slots, np.flatnonzero(np.diff(slots) != 1) + 1):
+            first = int(run[0])
+            self._ssbo.write(self.buf[first:first + len(run)], offset=first * itemsize)
+    
+    def bind(self, binding: int = MATERIAL_SSBO_BINDING) -> None:
+        """Binds the storage buffer; call after upload()."""
+        self._ssbo.bind_to_storage_buffer(binding)
+
+MATERIAL_TABLE = MaterialTable()
+
+@dataclass(slots=True)
 class Material:
     """Advanced physically-based material with support for various material types."""
     # Basic identification
@@ -318,109 +793,222 @@ class Material:
     # Runtime data (not serialized)
     _shader_program: Optional[Any] = None
     _uniform_cache: Dict[str, Any] = field(default_factory=dict)
+    _id: int = field(init=False, repr=False, default=-1)  # Row in MATERIAL_TABLE
+    # Texture ids for units _tex_first_unit.. (0 = unbound), for one glBindTextures call
+    _tex_units: np.ndarray = field(
+        init=False, repr=False, default_factory=lambda: np.zeros(0, dtype=np.uint32))
+    _tex_first_unit: int = field(init=False, repr=False, default=0)
+    _textures_dirty: bool = field(init=False, repr=False, default=True)
+    _defines_key: int = field(init=False, repr=False, default=-1)  # -1 = recompute
+    
+    def __post_init__(self):
+        self._id = MATERIAL_TABLE.allocate()
+        MATERIAL_TABLE.mark_dirty(self)
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if name in _MATERIAL_UNIFORM_FIELDS:
+            # No row yet while __init__ runs; __post_init__ queues the first pack
+            if getattr(self, '_id', -1) >= 0:
+                MATERIAL_TABLE.mark_dirty(self)
+        elif name in _MATERIAL_DEFINE_FIELDS:
+            object.__setattr__(self, '_defines_key', -1)
+            if name in _MATERIAL_TEXTURE_FIELD_SET:
+                object.__setattr__(self, '_textures_dirty', True)
+    
+    def mark_dirty(self) -> None:
+        """Forces a re-upload, e.g. after mutating a field in place."""
+        MATERIAL_TABLE.mark_dirty(self)
+    
+    @property
+    def material_id(self) -> int:
+        """Row of this material in MATERIAL_TABLE, passed to shaders per instance."""
+        return self._id
+    
+    def release(self) -> None:
+        """Frees the material's row in MATERIAL_TABLE. The material must not be used afterwards."""
+        if self._id >= 0:
+            MATERIAL_TABLE.release(self._id)
+            self._id = -1
+    
+    @property
+    def defines_key(self) -> int:
+        """Bitmask of the shader defines; equal keys share a compiled program."""
+        key = self._defines_key
+        if key < 0:
+            if self.alpha_mode not in _ALPHA_MODES:
+                raise ValueError(f"Unknown alpha mode: {self.alpha_mode}")
+            key = int(self.material_type) << _MATERIAL_TYPE_SHIFT
+            key |= _ALPHA_MODES.index(self.alpha_mode) << _ALPHA_MODE_SHIFT
+            if self.two_sided:
+                key |= 1 << _BIT_TWO_SIDED
+            for bit, name in enumerate(_MATERIAL_TEXTURE_FIELDS):
+                if getattr(self, name):
+                    key |= 1 << bit
+            self._defines_key = key
+        return key
     
     def get_shader_defines(self) -> Dict[str, str]:
-        """Get shader preprocessor defines based on material properties."""
-        defines = {
-            'MATERIAL_TYPE': str(self.material_type.value),
-            'HAS_ALBEDO_MAP': '1' if self.albedo_map else '0',
-            'HAS_NORMAL_MAP': '1' if self.normal_map else '0',
-            'HAS_METALLIC_MAP': '1' if self.metallic_map else '0',
-            'HAS_ROUGHNESS_MAP': '1' if self.roughness_map else '0',
-            'HAS_AO_MAP': '1' if self.ao_map else '0',
-            'HAS_EMISSION_MAP': '1' if self.emission_map else '0',
-            'HAS_HEIGHT_MAP': '1' if self.height_map else '0',
-            'HAS_CLEARCOAT_NORMAL_MAP': '1' if self.clearcoat_normal_map else '0',
-            'HAS_ANISOTROPY_MAP': '1' if self.anisotropic_map else '0',
-            'HAS_THICKNESS_MAP': '1' if self.thickness_map else '0',
-            'HAS_DETAIL_ALBEDO_MAP': '1' if self.detail_albedo_map else '0',
-            'HAS_DETAIL_NORMAL_MAP': '1' if self.detail_normal_map else '0',
-            'HAS_DETAIL_ROUGHNESS_MAP': '1' if self.detail_roughness_map else '0',
-            'TWO_SIDED': '1' if self.two_sided else '0',
-            'ALPHA_MODE': f'ALPHA_MODE_{self.alpha_mode}'
-        }
-        return defines
+        """Get shader preprocessor defines based on material properties.
+        
+        The dict is shared by all materials with the same defines_key and
+        must not be modified.
+        """
+        return _shader_defines(self.defines_key)
+    
+    def get_shader_program(self, cache: Dict[int, Any],
+                           compile_program: Callable[[Dict[str, str]], Any]) -> Any:
+        """Returns the program for this material's defines, compiling it on first use.
+        
+        Programs belong to a GL context, so each renderer passes its own cache.
+        
+        Args:
+            cache: Compiled programs keyed by defines_key
+            compile_program: Builds a program from a defines dict
+        """
+        key = self.defines_key
+        program = cache.get(key)
+        if program is None:
+            program = cache[key] = compile_program(_shader_defines(key))
+        return program
+    
+    def _rebuild_bind_list(self) -> None:
+        """Rebuilds the texture id range bound by bind_textures()."""
+        self._textures_dirty = False
+        ids = [getattr(self, name) or 0 for name in _MATERIAL_TEXTURE_FIELDS]
+        used = [unit for unit, tex_id in enumerate(ids) if tex_id]
+        if not used:
+            self._tex_first_unit = 0
+            self._tex_units = np.zeros(0, dtype=np.uint32)
+            return
+        self._tex_first_unit = used[0]
+        self._tex_units = np.array(ids[used[0]:used[-1] + 1], dtype=np.uint32)
     
     def bind_textures(self, ctx) -> None:
-        """Bind all material textures to their respective texture units."""
-        texture_units = {
-            0: self.albedo_map,
-            1: self.normal_map,
-            2: self.metallic_map,
-            3: self.roughness_map,
-            4: self.ao_map,
-            5: self.emission_map,
-            6: self.height_map,
-            7: self.clearcoat_normal_map,
-            8: self.anisotropic_map,
-            9: self.thickness_map,
-            10: self.detail_albedo_map,
-            11: self.detail_normal_map,
-            12: self.detail_roughness_map
-        }
+        """Bind all material textures to their respective texture units.
         
-        for unit, tex_id in texture_units.items():
-            if tex_id is not None:
-                ctx.texture = (unit, tex_id)
-    
-    def update_uniforms(self, shader_program) -> None:
-        """Update shader uniforms with material properties."""
-        # Basic properties
-        shader_program['u_Material.albedo'] = self.albedo
-        shader_program['u_Material.metallic'] = self.metallic
-        shader_program['u_Material.roughness'] = self.roughness
-        shader_program['u_Material.ao'] = self.ao
-        shader_program['u_Material.emission'] = self.emission
-        shader_program['u_Material.emission_strength'] = self.emission_strength
-        
-        # Subsurface scattering
-        shader_program['u_Material.subsurface'] = self.subsurface
-        shader_program['u_Material.subsurface_color'] = self.subsurface_color
-        shader_program['u_Material.subsurface_radius'] = self.subsurface_radius
-        shader_program['u_Material.subsurface_ior'] = self.subsurface_ior
-        shader_program['u_Material.subsurface_anisotropy'] = self.subsurface_anisotropy
-        
-        # Clearcoat
-        shader_program['u_Material.clearcoat'] = self.clearcoat
-        shader_program['u_Material.clearcoat_roughness'] = self.clearcoat_roughness
-        
-        # Sheen
-        shader_program['u_Material.sheen'] = self.sheen
-        shader_program['u_Material.sheen_tint'] = self.sheen_tint
-        shader_program['u_Material.sheen_roughness'] = self.sheen_roughness
-        
-        # Anisotropy
-        shader_program['u_Material.anisotropic'] = self.anisotropic
-        shader_program['u_Material.anisotropic_rotation'] = self.anisotropic_rotation
-        
-        # Transmission
-        shader_program['u_Material.transmission'] = self.transmission
-        shader_program['u_Material.ior'] = self.ior
-        shader_program['u_Material.thickness'] = self.thickness
-        
-        # Displacement
-        shader_program['u_Material.displacement_strength'] = self.displacement_strength
-        shader_program['u_Material.displacement_midlevel'] = self.displacement_midlevel
-        
-        # Detail maps
-        shader_program['u_Material.detail_scale'] = self.detail_scale
-        
-        # UV mapping
-        shader_program['u_Material.uv_scale'] = self.uv_scale
-        shader_program['u_Material.uv_offset'] = self.uv_offset
-        
-        # Alpha mode
-        shader_program['u_Material.alpha_cutoff'] = self.alpha_cutoff
+        Binds the whole unit range with a single glBindTextures call; units
+        without a texture inside the range are unbound.
+        """
+        if self._textures_dirty:
+            self._rebuild_bind_list()
+        if len(self._tex_units):
+            glBindTextures(self._tex_first_unit, len(self._tex_units), self._tex_units)
+    
+    def _repack(self, row: np.void) -> None:
+        """Copies the uniform fields into the material's MATERIAL_TABLE row."""
+        for name in _MATERIAL_UNIFORM_FIELDS:
+            row[name] = getattr(self, name)
+
+@dataclass
+class WeatherState:
+    """Flat weather parameters, grouped by prefix (clouds_, rain_, snow_, fog_, wind_)."""
+    # Clouds
+    clouds_enabled: bool = True
+    clouds_coverage: float = 0.3             # 0-1 cloud coverage
+    clouds_density: float = 0.5              # 0-1 cloud density
+    clouds_wind_speed: float = 10.0          # m/s
+    clouds_wind_direction: np.ndarray = _vec(1.0, 0.0)
+    clouds_precipitation: float = 0.0        # 0-1 precipitation amount
+    clouds_light_absorption: float = 0.05    # How much light clouds absorb
+    clouds_scattering_strength: float = 0.5  # Light scattering in clouds
+    clouds_ambient_occlusion: float = 0.2    # Self-shadowing in clouds
+    clouds_detail_strength: float = 0.3      # Detail noise strength
+    clouds_curl_strength: float = 0.5        # Curl noise for realistic shapes
+    
+    # Rain
+    rain_enabled: bool = False
+    rain_intensity: float = 0.0         # 0-1
+    rain_speed: float = 5.0             # Falling speed
+    rain_wind_influence: float = 0.2    # How much wind affects rain
+    rain_splash_size: float = 0.1       # Size of rain splashes
+    rain_splash_lifetime: float = 1.0   # How long splashes last (seconds)
+    
+    # Snow
+    snow_enabled: bool = False
+    snow_intensity: float = 0.0         # 0-1
+    snow_size: float = 0.05             # Flake size
+    snow_speed: float = 1.0             # Falling speed
+    snow_wind_influence: float = 0.1    # How much wind affects snow
+    snow_accumulation: float = 0.0      # Ground accumulation amount
+    
+    # Fog
+    fog_enabled: bool = True
+    fog_density: float = 0.01
+    fog_color: np.ndarray = field(
+        default_factory=lambda: np.array((0.7, 0.8, 1.0), dtype=np.float32))
+    fog_height_falloff: float = 0.2
+    fog_height: float = 0.0             # Base height of the fog
+    
+    # Wind
+    wind_speed: float = 5.0             # m/s
+    wind_direction: np.ndarray = _vec(1.0, 0.0)  # Normalized direction
+    wind_turbulence: float = 0.2        # Wind turbulence amount
+    
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the old nested layout, e.g. weather['clouds']['coverage']."""
+        nested: Dict[str, Dict[str, Any]] = {}
+        for name, value in self.__dict__.items():
+            group, key = name.split('_', 1)
+            nested.setdefault(group, {})[key] = value
+        return nested
+
+# Uniform block binding point of AtmosphereBlock (shaders.ATMOSPHERE_BLOCK)
+ATMOSPHERE_UBO_BINDING = 2
+
+# Atmosphere uniforms in std140 layout; each vec3 shares its 16 bytes with a float
+ATMO_DTYPE = np.dtype([
+    ('rayleigh_scattering', 'f4', 3), ('rayleigh_scale_height', 'f4'),
+    ('mie_scattering', 'f4', 3), ('mie_scale_height', 'f4'),
+    ('sun_direction', 'f4', 3), ('sun_intensity', 'f4'),
+    ('sun_color', 'f4', 3), ('mie_direction', 'f4'),
+    ('moon_direction', 'f4', 3), ('moon_intensity', 'f4'),
+    ('fog_color', 'f4', 3), ('fog_density', 'f4'),
+    ('wind_direction', 'f4', 2), ('wind_speed', 'f4'), ('fog_height_falloff', 'f4'),
+    ('planet_radius', 'f4'), ('atmosphere_radius', 'f4'), ('time', 'f4'), ('cloud_coverage', 'f4'),
+    ('cloud_density', 'f4'), ('rain_intensity', 'f4'), ('snow_intensity', 'f4'), ('_pad', 'f4'),
+])
+
+# Texture unit of the skybox scattering table (u_AtmosphereLUT in SKYBOX_FRAGMENT_SHADER)
+SKY_LUT_TEXTURE_UNIT = 14
+
+def _sky_scattering_lut(width: int = 128, height: int = 64) -> np.ndarray:
+    """Returns the skybox scattering table as float16 (height, width, 4).
+    
+    Evaluates the procedural sky SKYBOX_FRAGMENT_SHADER used to compute per
+    fragment: rgb is the Rayleigh term times the horizon-blended sky colour,
+    a the Mie phase (g = 0.8). Columns are u = 1 - sqrt(1 - sunDot), rows
+    v = sunDir.y * 0.5 + 0.5. The shader scales a by the sun colour itself, so
+    the table does not depend on the sun and is built once.
+    """
+    u = (np.arange(width, dtype=np.float64) + 0.5) / width
+    v = (np.arange(height, dtype=np.float64) + 0.5) / height
+    sun_dot = 1.0 - (1.0 - u) ** 2
+    rayleigh = 3.0 / (8.0 * math.pi) * (1.0 + sun_dot * sun_dot)
+    g = 0.8
+    x = 1.0 + g * g - 2.0 * g * sun_dot
+    mie = (1.0 - g * g) / (4.0 * math.pi * x * np.sqrt(x))
+    
+    # smoothstep(0, 1, -sunDir.y * 0.5 + 0.5) between blue sky and sunset
+    t = 1.0 - v
+    t = t * t * (3.0 - 2.0 * t)
+    sky = np.array((0.3, 0.6, 1.0)) + t[:, None] * np.array((0.7, 0.1, -0.6))
+    
+    lut = np.empty((height, width, 4), dtype=np.float16)
+    lut[..., :3] = sky[:, None, :] * rayleigh[None, :, None]
+    lut[..., 3] = mie
+    return lut
 
 class AtmosphereSettings:
     """Atmospheric and weather simulation settings."""
     
     def __init__(self):
-        # Sun properties
-        self.sun_direction = glm.normalize(glm.vec3(0.5, 1.0, 0.5))
+        # Sun properties; sun_direction is written in place by _update_sun_position
+        self.sun_direction = np.array((0.5, 1.0, 0.5), dtype=np.float32)
+        self.sun_direction /= np.linalg.norm(self.sun_direction)
         self.sun_intensity = 1.0
         self.sun_angular_radius = 0.00935  # ~0.53 degrees
-        self.sun_color = glm.vec3(1.0, 1.0, 1.0)
+        self.sun_color = (1.0, 1.0, 1.0)
         
         # Atmosphere properties
         self.rayleigh_scattering = glm.vec3(5.8e-6, 13.5e-6, 33.1e-6)  # Rayleigh scattering coefficients
@@ -443,49 +1031,7 @@ class AtmosphereSettings:
         self.fog_height_falloff = 0.2
         
         # Weather
-        self.weather = {
-            'clouds': {
-                'enabled': True,
-                'coverage': 0.3,  # 0-1 cloud coverage
-                'density': 0.5,   # 0-1 cloud density
-                'wind_speed': 10.0,  # m/s
-                'wind_direction': glm.vec2(1.0, 0.0),
-                'precipitation': 0.0,  # 0-1 precipitation amount
-                'light_absorption': 0.05,  # How much light clouds absorb
-                'scattering_strength': 0.5,  # Light scattering in clouds
-                'ambient_occlusion': 0.2,  # Self-shadowing in clouds
-                'detail_strength': 0.3,    # Detail noise strength
-                'curl_strength': 0.5,      # Curl noise for realistic shapes
-            },
-            'rain': {
-                'enabled': False,
-                'intensity': 0.0,  # 0-1
-                'speed': 5.0,      # Falling speed
-                'wind_influence': 0.2,  # How much wind affects rain
-                'splash_size': 0.1,    # Size of rain splashes
-                'splash_lifetime': 1.0,  # How long splashes last (seconds)
-            },
-            'snow': {
-                'enabled': False,
-                'intensity': 0.0,  # 0-1
-                'size': 0.05,      # Flake size
-                'speed': 1.0,      # Falling speed
-                'wind_influence': 0.1,  # How much wind affects snow
-                'accumulation': 0.0,  # Ground accumulation amount
-            },
-            'fog': {
-                'enabled': True,
-                'density': 0.01,
-                'color': glm.vec3(0.7, 0.8, 1.0),
-                'height_falloff': 0.2,
-                'height': 0.0,  # Base height of the fog
-            },
-            'wind': {
-                'speed': 5.0,  # m/s
-                'direction': glm.vec2(1.0, 0.0),  # Normalized direction
-                'turbulence': 0.2,  # Wind turbulence amount
-            }
-        }
+        self.weather = WeatherState()
         
         # Time of day (0-24 hours)
         self.time_of_day = 12.0
@@ -500,70 +1046,154 @@ class AtmosphereSettings:
         # Precomputed values
         self._sun_zenith_angle = 0.0
         self._sun_azimuth = 0.0
-        self._moon_direction = glm.vec3(0.0)
+        self._moon_direction = np.zeros(3, dtype=np.float32)
+        self._last_sun_update: Optional[float] = None  # time_of_day of the last sun update
         self._update_sun_position()
+        
+        # Packed uniform block, refreshed once per update() and uploaded by bind()
+        self._atmo_block = np.zeros(1, dtype=ATMO_DTYPE)
+        self._atmo_ubo = None
+        self._sky_lut = None
+        self._dirty = True
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        # Assigning any setting repacks the block on the next update() or bind()
+        object.__setattr__(self, name, value)
+        if not name.startswith('_'):
+            object.__setattr__(self, '_dirty', True)
     
     def _update_sun_position(self) -> None:
         """Update sun position based on time of day."""
+        # Skip updates for less than one simulated second of change
+        if (self._last_sun_update is not None
+                and abs(self.time_of_day - self._last_sun_update) < 1.0 / 3600.0):
+            return
+        self._last_sun_update = self.time_of_day
+        
         # Convert time of day to angle (0-2π)
         time_angle = (self.time_of_day / 24.0) * math.pi * 2.0
         
         # Calculate sun direction (y-up coordinate system)
-        self._sun_zenith_angle = math.cos(time_angle)
-        self._sun_azimuth = math.sin(time_angle) * 0.5  # Slight offset for more interesting lighting
+        self._sun_zenith_angle = zenith = math.cos(time_angle)
+        self._sun_azimuth = azimuth = math.sin(time_angle) * 0.5  # Slight offset for more interesting lighting
         
-        # Update sun direction
-        self.sun_direction = glm.normalize(glm.vec3(
-            math.sin(self._sun_azimuth) * math.cos(self._sun_zenith_angle),
-            math.sin(self._sun_zenith_angle),
-            math.cos(self._sun_azimuth) * math.cos(self._sun_zenith_angle)
-        ))
+        # Update sun direction; the spherical form is already unit length
+        cos_zenith = math.cos(zenith)
+        sun_y = math.sin(zenith)
+        sun = self.sun_direction
+        sun[0] = math.sin(azimuth) * cos_zenith
+        sun[1] = sun_y
+        sun[2] = math.cos(azimuth) * cos_zenith
         
         # Update moon position (opposite to sun)
-        self._moon_direction = -self.sun_direction
-        
-        # Update sun color based on angle (sunset/sunrise)
-        sun_angle = max(0.0, self.sun_direction.y)
-        self.sun_color = glm.mix(
-            glm.vec3(1.0, 0.6, 0.4),  # Warm colors at sunrise/sunset
-            glm.vec3(1.0, 1.0, 1.0),  # White at noon
-            min(1.0, sun_angle * 2.0)
-        )
+        np.negative(sun, out=self._moon_direction)
+        
+        # Update sun color based on angle (sunset/sunrise):
+        # warm colors at sunrise/sunset, white at noon
+        t = min(1.0, max(0.0, sun_y) * 2.0)
+        self.sun_color = (1.0, 0.6 + 0.4 * t, 0.4 + 0.6 * t)
         
         # Adjust intensity based on sun angle
-        self.sun_intensity = max(0.0, self.sun_direction.y * 1.5 + 0.2)
+        self.sun_intensity = max(0.0, sun_y * 1.5 + 0.2)
     
     def update(self, delta_time: float) -> None:
         """Update atmospheric conditions based on time and weather."""
-        # Update time
-        self.time_of_day += delta_time * self.time_scale / 3600.0  # Convert to hours
-        if self.time_of_day >= 24.0:
-            self.time_of_day -= 24.0
+        # Update time; a paused clock leaves the block clean
+        hours = delta_time * self.time_scale / 3600.0
+        if hours:
+            time_of_day = self.time_of_day + hours
+            self.time_of_day = time_of_day - 24.0 if time_of_day >= 24.0 else time_of_day
         
         # Update sun position
         self._update_sun_position()
         
         # Update cloud movement
-        cloud_wind = self.weather['wind']['direction'] * self.weather['wind']['speed'] * 0.01
-        self.weather['clouds']['wind_direction'] += cloud_wind * delta_time
+        weather = self.weather
+        cloud_wind = weather.wind_direction * (weather.wind_speed * 0.01 * delta_time)
+        weather.clouds_wind_direction += cloud_wind
         
         # Update rain/snow based on cloud coverage
-        if self.weather['clouds']['precipitation'] > 0.5:
-            if not self.weather['rain']['enabled'] and not self.weather['snow']['enabled']:
+        if weather.clouds_precipitation > 0.5:
+            if not weather.rain_enabled and not weather.snow_enabled:
                 # Randomly choose between rain and snow based on temperature (simplified)
                 is_snow = random.random() > 0.7  # 30% chance of snow
                 if is_snow:
-                    self.weather['snow']['enabled'] = True
-                    self.weather['snow']['intensity'] = self.weather['clouds']['precipitation']
+                    weather.snow_enabled = True
+                    weather.snow_intensity = weather.clouds_precipitation
                 else:
-                    self.weather['rain']['enabled'] = True
-                    self.weather['rain']['intensity'] = self.weather['clouds']['precipitation']
-        else:
-            self.weather['rain']['enabled'] = False
-            self.weather['snow']['enabled'] = False
+                    weather.rain_enabled = True
+                    weather.rain_intensity = weather.clouds_precipitation
+                self._dirty = True
+        elif weather.rain_enabled or weather.snow_enabled:
+            weather.rain_enabled = False
+            weather.snow_enabled = False
+            self._dirty = True
+        
+        self._repack()
+    
+    def mark_dirty(self) -> None:
+        """Forces a repack after a setting was changed in place.
+        
+        Assigning an attribute marks the block dirty by itself; this is only
+        needed for in-place changes such as fog_color.x = 0.5 or edits to
+        weather fields.
+        """
+        self._dirty = True
+    
+    def _repack(self) -> None:
+        """Copies the current settings into the packed ATMO_DTYPE block."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        block = self._atmo_block[0]
+        weather = self.weather
+        block['rayleigh_scattering'] = tuple(self.rayleigh_scattering)
+        block['rayleigh_scale_height'] = self.rayleigh_scale_height
+        block['mie_scattering'] = tuple(self.mie_scattering)
+        block['mie_scale_height'] = self.mie_scale_height
+        block['sun_direction'] = self.sun_direction
+        block['sun_intensity'] = self.sun_intensity
+        block['sun_color'] = self.sun_color
+        block['mie_direction'] = self.mie_direction
+        block['moon_direction'] = self._moon_direction
+        block['moon_intensity'] = self.moon_intensity
+        block['fog_color'] = tuple(self.fog_color)
+        block['fog_density'] = self.fog_density
+        block['wind_direction'] = weather.wind_direction
+        block['wind_speed'] = weather.wind_speed
+        block['fog_height_falloff'] = self.fog_height_falloff
+        block['planet_radius'] = self.planet_radius
+        block['atmosphere_radius'] = self.atmosphere_radius
+        block['time'] = self.time_of_day
+        block['cloud_coverage'] = weather.clouds_coverage
+        block['cloud_density'] = weather.clouds_density
+        block['rain_intensity'] = weather.rain_intensity if weather.rain_enabled else 0.0
+        block['snow_intensity'] = weather.snow_intensity if weather.snow_enabled else 0.0
+        if self._atmo_ubo is not None:
+            self._atmo_ubo.write(self._atmo_block)
+    
+    def bind(self, ctx, binding: int = ATMOSPHERE_UBO_BINDING) -> None:
+        """Binds the atmosphere uniform block and the skybox scattering table.
+        
+        Both are created on first use; the table (_sky_scattering_lut) goes to
+        SKY_LUT_TEXTURE_UNIT.
+        """
+        if self._atmo_ubo is None:
+            self._atmo_ubo = ctx.buffer(reserve=ATMO_DTYPE.itemsize)
+            self._dirty = True
+        if self._sky_lut is None:
+            lut = _sky_scattering_lut()
+            self._sky_lut = ctx.texture(lut.shape[1::-1], 4, lut.tobytes(), dtype='f2')
+            self._sky_lut.repeat_x = self._sky_lut.repeat_y = False
+        self._repack()
+        self._atmo_ubo.bind_to_uniform_block(binding)
+        self._sky_lut.use(SKY_LUT_TEXTURE_UNIT)
     
     def get_atmosphere_uniforms(self) -> Dict[str, Any]:
-        """Get shader uniforms for atmospheric effects."""
+        """Get shader uniforms for atmospheric effects.
+        
+        Deprecated: builds a new dict on every call; use bind() instead.
+        """
         return {
             'u_Atmosphere.rayleigh_scattering': tuple(self.rayleigh_scattering),
             'u_Atmosphere.mie_scattering': tuple(self.mie_scattering),
@@ -581,14 +1211,46 @@ class AtmosphereSettings:
             'u_Atmosphere.fog_color': tuple(self.fog_color),
             'u_Atmosphere.fog_height_falloff': self.fog_height_falloff,
             'u_Atmosphere.time': self.time_of_day,
-            'u_Atmosphere.cloud_coverage': self.weather['clouds']['coverage'],
-            'u_Atmosphere.cloud_density': self.weather['clouds']['density'],
-            'u_Atmosphere.wind_direction': tuple(self.weather['wind']['direction']),
-            'u_Atmosphere.wind_speed': self.weather['wind']['speed'],
-            'u_Atmosphere.rain_intensity': self.weather['rain']['intensity'] if self.weather['rain']['enabled'] else 0.0,
-            'u_Atmosphere.snow_intensity': self.weather['snow']['intensity'] if self.weather['snow']['enabled'] else 0.0,
+            'u_Atmosphere.cloud_coverage': self.weather.clouds_coverage,
+            'u_Atmosphere.cloud_density': self.weather.clouds_density,
+            'u_Atmosphere.wind_direction': tuple(self.weather.wind_direction),
+            'u_Atmosphere.wind_speed': self.weather.wind_speed,
+            'u_Atmosphere.rain_intensity': self.weather.rain_intensity if self.weather.rain_enabled else 0.0,
+            'u_Atmosphere.snow_intensity': self.weather.snow_intensity if self.weather.snow_enabled else 0.0,
         }
 
+# Uniform block binding point of the SSAO sample kernel (SSAOKernel in SSAO_FRAGMENT_SHADER)
+SSAO_KERNEL_UBO_BINDING = 3
+
+# Uniform block binding point of the bloom settings (BloomParams in shaders.BLOOM_PARAMS_BLOCK)
+BLOOM_UBO_BINDING = 4
+
+# BloomParams in std140 layout
+BLOOM_PARAMS_DTYPE = np.dtype([
+    ('tent', 'f4', 4), ('threshold', 'f4'), ('knee', 'f4'), ('_pad', 'f4', 2),
+])
+
+def _pack_bloom_params(params: np.ndarray, threshold: float, knee: float, spread: float) -> np.ndarray:
+    """Fills a BLOOM_PARAMS_DTYPE row in place.
+    
+    spread is the outer weight s of the 1D upsample kernel [s, 1 - 2s, s]:
+    0.25 is the [1, 2, 1] / 4 tent, smaller values keep the bloom tighter.
+    """
+    centre = 1.0 - 2.0 * spread
+    params['tent'] = (centre * centre, centre * spread, spread * spread, 0.0)
+    params['threshold'] = threshold
+    params['knee'] = knee
+    return params
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Normalizes float32 vectors along the last axis in place."""
+    norm = np.sqrt(np.einsum('...i,...i->...', vectors, vectors), dtype=np.float32)
+    np.divide(vectors, norm[..., None], out=vectors)
+    return vectors
+
+# PostProcessor programs compiled from another program's entry in shaders.SHADERS
+_POST_SHADER_SOURCES = {'bloom_first_pass': 'bloom_downsample', 'ssao_blur_vertical': 'ssao_blur'}
+
 class PostProcessor:
     """Handles post-processing effects for HDR rendering."""
     
@@ -610,14 +1272,22 @@ class PostProcessor:
         TAA = auto()           # Temporal Anti-Aliasing
         SHARPEN = auto()
         
-    def __init__(self, width: int, height: int, hdr_enabled: bool = True):
+    # params entries that are compiled into the programs as #defines (see _shader_defines)
+    DEFINE_PARAMS = ('tone_mapper', 'fast_gamma', 'aces_full', 'ssao_kernel_size', 'ssao_radius',
+                     'ssao_blur_radius')
+    
+    def __init__(self, width: int, height: int, hdr_enabled: bool = True,
+                 ctx: Optional[moderngl.Context] = None):
         """Initialize the post-processor.
         
         Args:
             width: Viewport width in pixels
             height: Viewport height in pixels
             hdr_enabled: Whether to use HDR rendering
+            ctx: ModernGL context to create resources in; by default one is
+                attached to the current OpenGL context
         """
+        self.ctx = ctx if ctx is not None else moderngl.create_context()
         self.width = width
         self.height = height
         self.hdr_enabled = hdr_enabled
@@ -642,18 +1312,24 @@ class PostProcessor:
         self.params = {
             'exposure': 1.0,  # Camera exposure (stops)
             'white_point': 1.0,  # White point for tone mapping
+            'tone_mapper': 'aces',  # 'aces' or 'reinhard', compiled into the composite pass
+            'fast_gamma': False,  # Approximate the composite's gamma pow (shaders.GAMMA_FUNCTIONS)
+            'aces_full': False,  # Matrix ACES fit instead of the per-channel one (shaders.ACES_FUNCTIONS)
             'bloom_threshold': 1.0,  # Brightness threshold for bloom
             'bloom_intensity': 0.04,  # Bloom effect intensity
             'bloom_radius': 0.6,  # Bloom effect radius
             'bloom_knee': 0.1,  # Bloom soft threshold knee
+            'bloom_spread': 0.25,  # Outer weight of the upsample tent, see _pack_bloom_params
             'ssr_intensity': 0.8,  # Screen-space reflections intensity
             'ssr_ray_step': 0.1,  # Ray step size for SSR
             'ssr_max_steps': 32,  # Maximum ray steps for SSR
             'ssr_binary_search_steps': 8,  # Binary search steps for SSR
             'ssr_thickness': 0.1,  # Thickness for depth testing in SSR
             'ssao_radius': 0.5,  # SSAO effect radius
+            'ssao_kernel_size': 64,  # SSAO samples, compiled in; the kernel buffer is built once at init
             'ssao_bias': 0.025,  # SSAO depth bias
             'ssao_power': 2.0,  # SSAO power
+            'ssao_blur_radius': 4,  # Taps on each side of the bilateral SSAO blur, per axis
             'dof_focus_distance': 10.0,  # Depth of field focus distance
             'dof_aperture': 1.0,  # Depth of field aperture (f-stop)
             'dof_focal_length': 0.05,  # Depth of field focal length
@@ -668,58 +1344,267 @@ class PostProcessor:
             'brightness': 1.0,  # Color grading brightness
             'temperature': 0.0,  # Color temperature (-1.0 to 1.0)
             'tint': 0.0,  # Color tint (-1.0 to 1.0)
+            'volumetric_max_z_binding': 8,  # Texture unit of the max-Z texture in the volumetric shader
         }
         
+        # Volumetric lighting: one compute dispatch over all depth slices, skipping
+        # froxels behind the per-tile max depth (max_z_downsample times smaller)
+        self.volumetric_single_pass = True
+        self.max_z_downsample = 8
+        self.max_z_size = (-(-width // self.max_z_downsample), -(-height // self.max_z_downsample))
+        
+        # SSAO and its blur run at half resolution into R8 targets, a quarter of
+        # the fragments; 'ssao_upsample' applies the result at full resolution.
+        # The 4x4 noise texture tiles over the half-resolution target
+        self.ssao_size = (max(1, width // 2), max(1, height // 2))
+        self.ssao_noise_scale = (self.ssao_size[0] / 4.0, self.ssao_size[1] / 4.0)
+        
+        # Bloom runs on one half-resolution R11F_G11F_B10F mip chain: a downsample
+        # dispatch per level, then an additive upsample dispatch per level back to mip 0
+        self.bloom_size = (max(1, width // 2), max(1, height // 2))
+        self.bloom_mip_count = max(1, min(7, int(math.log2(max(1, min(self.bloom_size))))))
+        
+        # Compiled programs keyed by (shader_name, frozenset(defines.items())); the
+        # defines come from effects_enabled, so a program is only rebuilt when the
+        # toggles it depends on change
+        self._programs: Dict[Tuple[str, frozenset], Any] = {}
+        
+        # BloomParams block of the bloom compute shaders, packed once per frame
+        self._bloom_params = np.zeros(1, dtype=BLOOM_PARAMS_DTYPE)
+        self._bloom_ubo = self.ctx.buffer(reserve=BLOOM_PARAMS_DTYPE.itemsize)
+        
+        # Buffer-less VAOs drawing the fullscreen triangle, one per program
+        self._fullscreen_vaos: Dict[Any, Any] = {}
+        self._start_time = time.perf_counter()
+        
+        # Enabled passes of apply_effects, rebuilt when effects_enabled changes
+        self._active_passes: List[Callable[[Any, Any, Any, Any], Any]] = []
+        self._active_toggles: Optional[Tuple[bool, ...]] = None
+        
+        # effects_enabled and DEFINE_PARAMS values the programs were last loaded for
+        self._loaded_variant: Optional[Tuple[Any, ...]] = None
+        
         # Initialize shaders and framebuffers
         self._init_resources()
     
     def _init_resources(self) -> None:
         """Initialize OpenGL resources for post-processing."""
-        # Create HDR framebuffer
-        self.hdr_fbo = self._create_hdr_framebuffer()
+        # Full-screen passes alternate between two HDR targets; read_idx is the
+        # one holding the latest image
+        self.pingpong = [self._create_hdr_framebuffer(), self._create_hdr_framebuffer()]
+        self.read_idx = 0
+        
+        # Create the bloom mip chain texture
+        self.bloom_texture = self._create_bloom_texture()
+        
+        # Create the half-resolution SSAO targets
+        self.ssao_targets = self._create_ssao_targets()
         
-        # Create ping-pong framebuffers for bloom
-        self.pingpong_fbos = [
-            self._create_pingpong_framebuffer(),
-            self._create_pingpong_framebuffer()
-        ]
+        # Create the depth of field near/far field targets
+        self.dof_targets = self._create_dof_targets()
         
-        # Create SSAO framebuffer
-        self.ssao_fbo = self._create_ssao_framebuffer()
+        # Create max-depth texture used to cull volumetric froxels
+        self.max_z_texture = self._create_max_z_texture()
         
         # Load shaders
         self._load_shaders()
         
-        # Generate SSAO noise texture
-        self._generate_ssao_noise()
+        # Generate the SSAO noise texture and sample kernel once; neither
+        # changes between frames
+        self.ssao_noise = self._generate_ssao_noise()
+        self.ssao_kernel = self._generate_ssao_kernel(self._shader_defines('ssao')['SSAO_KERNEL_SIZE'])
+        self._ssao_kernel_buffer = self._create_ssao_kernel_buffer(self.ssao_kernel)
     
     def _create_hdr_framebuffer(self) -> Any:
-        """Create HDR framebuffer with color and depth attachments."""
+        """Create a full-resolution RGBA16F framebuffer with a single color attachment.
+        
+        Completeness is checked here once, not per pass.
+        """
         # Implementation depends on your rendering backend (ModernGL, PyOpenGL, etc.)
         pass
     
-    def _create_pingpong_framebuffer(self) -> Any:
-        """Create a ping-pong framebuffer for bloom and other effects."""
+    def _create_bloom_texture(self) -> Any:
+        """Create the R11F_G11F_B10F bloom_size texture with bloom_mip_count mip levels.
+        
+        Half the size of RGBA16F; the bloom compute shaders bind its levels
+        as r11f_g11f_b10f images.
+        """
+        texture = self.ctx.texture(self.bloom_size, 3, dtype='f4', internal_format=GL_R11F_G11F_B10F)
+        texture.build_mipmaps(0, self.bloom_mip_count - 1)
+        texture.filter = (moderngl.LINEAR_MIPMAP_LINEAR, moderngl.LINEAR)
+        texture.repeat_x = texture.repeat_y = False
+        return texture
+    
+    def _create_ssao_targets(self) -> Any:
+        """Create the two ssao_size R8 targets for SSAO and its separable blur.
+        
+        The raw occlusion goes to the first, the horizontal blur to the second
+        and the vertical blur back to the first, which 'ssao_upsample' reads.
+        """
+        pass
+    
+    def _create_dof_targets(self) -> Any:
+        """Create the half-resolution near and far field R11F_G11F_B10F targets for DOF.
+        
+        They only carry blurred color, so neither needs alpha or 16-bit
+        channels; the circle of confusion is recomputed from depth.
+        """
         pass
     
-    def _create_ssao_framebuffer(self) -> Any:
-        """Create framebuffer for SSAO."""
+    def _pingpong_target(self) -> Any:
+        """Returns the ping-pong framebuffer the next full-screen pass writes into.
+        
+        The pair alternates, so each pass reads the previous pass's output
+        from the other half. The composite pass writes to the screen instead.
+        """
+        self.read_idx ^= 1
+        return self.pingpong[self.read_idx]
+    
+    def _create_max_z_texture(self) -> Any:
+        """Create the R32F max_z_size texture filled by shaders.MAX_Z_DOWNSAMPLE_COMPUTE_SHADER.
+        
+        Built by log2(max_z_downsample) 2x2 max reductions of the depth buffer.
+        """
         pass
     
     def _load_shaders(self) -> None:
-        """Load all post-processing shaders."""
-        # Implementation depends on your shader loading system
-        pass
+        """Load all post-processing shaders.
+        
+        Bloom uses the 'bloom_downsample' and 'bloom_upsample' compute shaders
+        (16x16 workgroups) from shaders.SHADERS; the thresholded first
+        downsample is a separate BLOOM_FIRST_PASS variant. The SSAO blur is
+        'ssao_blur' followed by its SSAO_BLUR_VERTICAL variant, both at
+        ssao_size, and 'ssao_upsample' applies it. apply_effects calls it
+        again when a toggle or a DEFINE_PARAMS value changes; only variants
+        not already cached are compiled.
+        """
+        self.composite_shader_source = self._compile_composite_post_shader()
+        for name in ('composite', 'ssao', 'ssao_blur', 'ssao_blur_vertical', 'ssao_upsample', 'fxaa',
+                     'bloom_first_pass', 'bloom_downsample', 'bloom_upsample'):
+            self._get_program(name)
+    
+    def _shader_defines(self, name: str) -> Dict[str, Any]:
+        """Returns the #define constants a post-processing program is specialized with."""
+        effects = self.effects_enabled
+        params = self.params
+        if name == 'composite':
+            return {
+                'ENABLE_BLOOM': effects['bloom'],
+                'ENABLE_CA': effects['chromatic_aberration'],
+                'ENABLE_SHARPEN': effects['sharpen'],
+                'ENABLE_VIGNETTE': effects['vignette'],
+                'ENABLE_GRAIN': effects['film_grain'],
+                'TONE_MAP_REINHARD': params['tone_mapper'] == 'reinhard',
+                'FAST_GAMMA': params['fast_gamma'],
+                'ACES_FULL': params['aces_full'],
+            }
+        if name == 'ssao':
+            return {'SSAO_KERNEL_SIZE': int(params['ssao_kernel_size']), 'SSAO_RADIUS': float(params['ssao_radius'])}
+        if name == 'ssao_blur':
+            return {'SSAO_BLUR_RADIUS': int(params['ssao_blur_radius'])}
+        if name == 'ssao_blur_vertical':
+            return {'SSAO_BLUR_RADIUS': int(params['ssao_blur_radius']), 'SSAO_BLUR_VERTICAL': True}
+        if name == 'bloom_first_pass':
+            return {'BLOOM_FIRST_PASS': True}
+        return {}
+    
+    def _get_program(self, name: str) -> Any:
+        """Returns the program for name specialized with its current defines."""
+        defines = self._shader_defines(name)
+        key = (name, frozenset(defines.items()))
+        program = self._programs.get(key)
+        if program is None:
+            program = self._programs[key] = self._compile_program(name, defines)
+        return program
+    
+    def _compile_program(self, name: str, defines: Dict[str, Any]) -> Any:
+        """Compile shaders.SHADERS[name] with shaders.with_defines applied to each stage.
+        
+        'bloom_first_pass' is built from the 'bloom_downsample' sources and
+        'ssao_blur_vertical' from the 'ssao_blur' ones.
+        """
+        from . import shaders as shader_defs
+        stages = shader_defs.SHADERS[_POST_SHADER_SOURCES.get(name, name)]
+        if 'compute' in stages:
+            return self.ctx.compute_shader(with_defines(stages['compute'], defines))
+        fragment = stages.get('fragment')
+        return self.ctx.program(vertex_shader=with_defines(stages['vertex'], defines),
+                                fragment_shader=with_defines(fragment, defines) if fragment else None)
+    
+    def _compile_composite_post_shader(self) -> str:
+        """Returns the fragment source of the fused composite pass.
+        
+        Bloom blending, chromatic aberration, sharpening, tone mapping,
+        color grading, vignette and film grain all run in this one
+        full-screen pass (shaders.COMPOSITE_FRAGMENT_SHADER), drawn with
+        the fullscreen quad vertex shader. Disabled effects are compiled
+        out rather than branched over.
+        """
+        return with_defines(COMPOSITE_FRAGMENT_SHADER, self._shader_defines('composite'))
+    
+    def _composite_uniforms(self, time: float = 0.0) -> Dict[str, Any]:
+        """Returns the composite shader's uniform values for the current settings."""
+        params = self.params
+        return {
+            'u_Time': time,
+            'u_Exposure': params['exposure'],
+            'u_BloomIntensity': params['bloom_intensity'],
+            'u_ChromaticAberration': params['chromatic_aberration_intensity'],
+            'u_SharpenStrength': params['sharpen_strength'],
+            'u_Contrast': params['contrast'],
+            'u_Saturation': params['saturation'],
+            'u_Brightness': params['brightness'],
+            'u_Temperature': params['temperature'],
+            'u_Tint': params['tint'],
+            'u_VignetteIntensity': params['vignette_intensity'],
+            'u_VignetteSoftness': params['vignette_softness'],
+            'u_FilmGrainIntensity': params['film_grain_intensity'],
+        }
     
-    def _generate_ssao_noise(self) -> None:
-        """Generate noise texture for SSAO."""
-        # Generate random rotation vectors
-        noise = np.random.rand(4, 4, 3).astype(np.float32) * 2.0 - 1.0
-        # Normalize to get vectors on a sphere
-        noise = noise / np.linalg.norm(noise, axis=2, keepdims=True)
-        # Create texture
+    def _generate_ssao_noise(self) -> np.ndarray:
+        """Returns the 4x4 SSAO noise texture data as float32 (4, 4, 3).
+        
+        Unit rotation vectors around the tangent-space z axis (z = 0).
+        """
+        # Gaussian samples are uniform in direction once normalized
+        rng = np.random.default_rng(0)
+        noise = rng.standard_normal((16, 3), dtype=np.float32)
+        noise[:, 2] = 0.0
+        _normalize_rows(noise)
+        # Create texture (4x4 RGB32F, repeat wrap)
         # Implementation depends on your rendering backend
-        pass
+        return noise.reshape(4, 4, 3)
+    
+    def _generate_ssao_kernel(self, k: int = 64) -> np.ndarray:
+        """Returns k SSAO samples in the tangent-space +z hemisphere as float32 (k, 3).
+        
+        Directions follow a Fibonacci lattice, which covers the hemisphere
+        evenly without random clumping; lengths grow as lerp(0.1, 1, (i/k)^2)
+        so nearby occluders weigh more.
+        """
+        i = np.arange(k, dtype=np.float32)
+        z = 1.0 - i / max(k - 1, 1)
+        r = np.sqrt(1.0 - z * z)
+        theta = np.float32(math.pi * (3.0 - math.sqrt(5.0))) * i
+        scale = i / k
+        scale *= scale
+        scale *= 0.9
+        scale += 0.1
+        kernel = np.empty((k, 3), dtype=np.float32)
+        kernel[:, 0] = np.cos(theta) * r * scale
+        kernel[:, 1] = np.sin(theta) * r * scale
+        kernel[:, 2] = z * scale
+        return kernel
+    
+    def _create_ssao_kernel_buffer(self, kernel: np.ndarray) -> Any:
+        """Create the SSAOKernel uniform buffer (SSAO_KERNEL_UBO_BINDING).
+        
+        std140 pads each vec3 array element to 16 bytes, so kernel is
+        uploaded as (k, 4) rows with w = 0.
+        """
+        rows = np.zeros((len(kernel), 4), dtype=np.float32)
+        rows[:, :3] = kernel
+        return self.ctx.buffer(rows.tobytes())
     
     def apply_effects(self, scene_texture: Any, depth_texture: Any, 
                      velocity_texture: Any, camera: Any) -> Any:
@@ -734,167 +1619,228 @@ class PostProcessor:
         Returns:
             Processed final image
         """
-        # Start with the original HDR scene
+        # Compile the program variants the settings need only when they changed
+        toggles = tuple(self.effects_enabled.values())
+        variant = toggles + tuple(self.params[name] for name in self.DEFINE_PARAMS)
+        if variant != self._loaded_variant:
+            self._load_shaders()
+            self._loaded_variant = variant
+        
+        # Rebuild the pass list only when a toggle changed
+        if toggles != self._active_toggles:
+            self._active_passes = self._build_active_passes()
+            self._active_toggles = toggles
+        
+        # Start with the original HDR scene; each full-screen pass renders
+        # into _pingpong_target() and returns that target's texture
         current_target = scene_texture
+        for apply_pass in self._active_passes:
+            current_target = apply_pass(current_target, depth_texture, velocity_texture, camera)
         
-        # Apply SSAO if enabled
-        if self.effects_enabled['ssao']:
-            current_target = self._apply_ssao(current_target, depth_texture, camera)
-        
-        # Apply SSR if enabled
-        if self.effects_enabled['ssr']:
-            current_target = self._apply_ssr(current_target, depth_texture, camera)
-        
-        # Apply bloom if enabled
-        if self.effects_enabled['bloom']:
-            current_target = self._apply_bloom(current_target)
-        
-        # Apply depth of field if enabled
-        if self.effects_enabled['dof']:
-            current_target = self._apply_dof(current_target, depth_texture, camera)
-        
-        # Apply motion blur if enabled
-        if self.effects_enabled['motion_blur'] and velocity_texture is not None:
-            current_target = self._apply_motion_blur(current_target, velocity_texture)
-        
-        # Apply lens flares if enabled
-        if self.effects_enabled['lens_flares']:
-            current_target = self._apply_lens_flares(current_target, depth_texture, camera)
-        
-        # Apply color grading and tone mapping
-        current_target = self._apply_color_grading(current_target)
-        
-        # Apply film grain if enabled
-        if self.effects_enabled['film_grain']:
-            current_target = self._apply_film_grain(current_target)
-        
-        # Apply vignette if enabled
-        if self.effects_enabled['vignette']:
-            current_target = self._apply_vignette(current_target)
-        
-        # Apply chromatic aberration if enabled
-        if self.effects_enabled['chromatic_aberration']:
-            current_target = self._apply_chromatic_aberration(current_target)
-        
-        # Apply sharpening if enabled
-        if self.effects_enabled['sharpen']:
-            current_target = self._apply_sharpen(current_target)
-        
-        # Apply anti-aliasing
-        if self.effects_enabled['taa']:
-            current_target = self._apply_taa(current_target, velocity_texture)
-        elif self.effects_enabled['fxaa']:
-            current_target = self._apply_fxaa(current_target)
+        # Bloom, chromatic aberration, sharpening, tone mapping, color grading,
+        # vignette and film grain in one pass
+        return self._apply_composite(current_target)
+    
+    def _build_active_passes(self) -> List[Callable[[Any, Any, Any, Any], Any]]:
+        """Returns the enabled passes before the composite, in order.
         
-        return current_target
+        Each takes (source, depth, velocity, camera) and returns the new image.
+        """
+        effects = self.effects_enabled
+        passes = []
+        
+        if effects['ssao']:
+            passes.append(lambda source, depth, velocity, camera: self._apply_ssao(source, depth, camera))
+        if effects['ssr']:
+            passes.append(lambda source, depth, velocity, camera: self._apply_ssr(source, depth, camera))
+        if effects['bloom']:
+            # Builds the mip chain the composite pass adds; the image is unchanged
+            def bloom(source, depth, velocity, camera):
+                self._apply_bloom(source)
+                return source
+            passes.append(bloom)
+        if effects['dof']:
+            passes.append(lambda source, depth, velocity, camera: self._apply_dof(source, depth, camera))
+        if effects['motion_blur']:
+            passes.append(lambda source, depth, velocity, camera: (
+                source if velocity is None else self._apply_motion_blur(source, velocity)))
+        if effects['lens_flares']:
+            passes.append(lambda source, depth, velocity, camera: self._apply_lens_flares(source, depth, camera))
+        
+        # Anti-aliasing
+        if effects['taa']:
+            passes.append(lambda source, depth, velocity, camera: self._apply_taa(source, velocity))
+        elif effects['fxaa']:
+            passes.append(lambda source, depth, velocity, camera: self._apply_fxaa(source))
+        return passes
     
     def _apply_bloom(self, source_texture: Any) -> Any:
         """Apply bloom effect to the source texture."""
-        # Extract bright areas
-        threshold = self.params['bloom_threshold']
-        bright_pixels = self._extract_bright_pixels(source_texture, threshold)
-        
-        # Blur the bright areas
-        blurred = self._blur_texture(bright_pixels, self.params['bloom_radius'])
-        
-        # Blend with original
-        return self._blend_textures(source_texture, blurred, self.params['bloom_intensity'])
+        params = self.params
+        _pack_bloom_params(self._bloom_params, params['bloom_threshold'], params['bloom_knee'],
+                           params['bloom_spread'])
+        self._bloom_ubo.write(self._bloom_params)
+        self._bloom_ubo.bind_to_uniform_block(BLOOM_UBO_BINDING)
+        
+        # Downsample the scene into mip 0 (thresholded), then down the chain
+        self._dispatch_bloom('bloom_first_pass', source_texture, 0, 0)
+        for level in range(1, self.bloom_mip_count):
+            self._dispatch_bloom('bloom_downsample', self.bloom_texture, level - 1, level)
+        
+        # Upsample back up, adding each level into the one above it
+        for level in range(self.bloom_mip_count - 1, 0, -1):
+            self._dispatch_bloom('bloom_upsample', self.bloom_texture, level, level - 1)
+        
+        # Blended into the scene by the composite pass
+        return self.bloom_texture
+    
+    def _dispatch_bloom(self, shader_name: str, source_texture: Any,
+                        source_level: int, target_level: int) -> None:
+        """Run one bloom compute pass from source_level into bloom_texture mip target_level.
+        
+        shader_name is looked up with _get_program. Downsample passes cover the target level in 16x16 groups; upsample
+        passes cover the source level, each invocation writing 2x2 texels.
+        """
+        program = self._get_program(shader_name)
+        program['u_SourceLevel'] = source_level
+        source_texture.use(0)
+        upsample = shader_name == 'bloom_upsample'
+        self.bloom_texture.bind_to_image(1, read=upsample, write=True, level=target_level,
+                                         format=GL_R11F_G11F_B10F)
+        width, height = self.bloom_size
+        level = source_level if upsample else target_level
+        width, height = max(1, width >> level), max(1, height >> level)
+        program.run(-(-width // 16), -(-height // 16))
+        self.ctx.memory_barrier()
     
     def _apply_ssao(self, source_texture: Any, depth_texture: Any, camera: Any) -> Any:
-        """Apply screen-space ambient occlusion."""
+        """Apply screen-space ambient occlusion.
+        
+        Occlusion is computed at ssao_size (u_NoiseScale = ssao_noise_scale)
+        and blurred by the 'ssao_blur' and 'ssao_blur_vertical' passes
+        (2 * ssao_blur_radius + 1 taps each instead of a square kernel) in
+        ssao_targets. 'ssao_upsample' then darkens the source at full
+        resolution with nearest-depth upsampling.
+        """
         # Implementation of SSAO
-        pass
+        return source_texture
     
     def _apply_ssr(self, source_texture: Any, depth_texture: Any, camera: Any) -> Any:
         """Apply screen-space reflections."""
         # Implementation of SSR
-        pass
+        return source_texture
     
     def _apply_dof(self, source_texture: Any, depth_texture: Any, camera: Any) -> Any:
-        """Apply depth of field effect."""
+        """Apply depth of field effect, blurring into dof_targets before the merge."""
         # Implementation of depth of field
-        pass
+        return source_texture
     
     def _apply_motion_blur(self, source_texture: Any, velocity_texture: Any) -> Any:
         """Apply motion blur based on velocity buffer."""
         # Implementation of motion blur
-        pass
+        return source_texture
     
     def _apply_lens_flares(self, source_texture: Any, depth_texture: Any, camera: Any) -> Any:
         """Apply lens flare effects from bright light sources."""
         # Implementation of lens flares
-        pass
-    
-    def _apply_color_grading(self, source_texture: Any) -> Any:
-        """Apply color grading and tone mapping."""
-        # Implementation of color grading and tone mapping
-        pass
-    
-    def _apply_film_grain(self, source_texture: Any) -> Any:
-        """Apply film grain effect."""
-        # Implementation of film grain
-        pass
-    
-    def _apply_vignette(self, source_texture: Any) -> Any:
-        """Apply vignette effect."""
-        # Implementation of vignette
-        pass
-    
-    def _apply_chromatic_aberration(self, source_texture: Any) -> Any:
-        """Apply chromatic aberration effect."""
-        # Implementation of chromatic aberration
-        pass
+        return source_texture
     
-    def _apply_sharpen(self, source_texture: Any) -> Any:
-        """Apply sharpening effect."""
-        # Implementation of sharpening
-        pass
+    def _apply_composite(self, source_texture: Any) -> Any:
+        """Run the composite pass over the HDR source and bloom_texture.
+        
+        Uses the program built from _compile_composite_post_shader with
+        _composite_uniforms() and draws into the back buffer, which it returns.
+        """
+        program = self._get_program('composite')
+        for name, value in self._composite_uniforms(time.perf_counter() - self._start_time).items():
+            if name in program:
+                program[name] = value
+        if 'u_Scene' in program:
+            program['u_Scene'] = 0
+        if 'u_Bloom' in program:
+            program['u_Bloom'] = 1
+        source_texture.use(0)
+        self.bloom_texture.use(1)
+        
+        vao = self._fullscreen_vaos.get(program)
+        if vao is None:
+            vao = self._fullscreen_vaos[program] = self.ctx.vertex_array(program, [])
+        self.ctx.screen.use()
+        vao.render(moderngl.TRIANGLES, vertices=3)
+        return self.ctx.screen
     
     def _apply_fxaa(self, source_texture: Any) -> Any:
-        """Apply FXAA (Fast Approximate Anti-Aliasing)."""
+        """Apply FXAA (Fast Approximate Anti-Aliasing) with the 'fxaa' program."""
         # Implementation of FXAA
-        pass
+        return source_texture
     
     def _apply_taa(self, source_texture: Any, velocity_texture: Any) -> Any:
         """Apply TAA (Temporal Anti-Aliasing)."""
         # Implementation of TAA
-        pass
+        return source_texture
 
 import numpy as np
 from OpenGL.GL import *
 from OpenGL.GL.shaders import compileShader, compileProgram
+from OpenGL.GL.ARB.bindless_texture import (glGetTextureHandleARB, glMakeTextureHandleResidentARB,
+                                             glMakeTextureHandleNonResidentARB,
+                                             glProgramUniformHandleui64ARB)
+from OpenGL.error import GLError
 import glm
 import os
+import ctypes
+import hashlib
+import struct
+import tempfile
 from typing import Dict, Any, Optional, List, Tuple, Union
 
+# Linked program binaries, keyed by a hash of the sources and the GL driver
+SHADER_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'wrench', 'shaders')
+
 class ShaderProgram:
-    """Helper class for managing OpenGL shader programs."""
+    """Helper class for managing OpenGL shader programs.
+    
+    Linked programs are cached in SHADER_CACHE_DIR with glGetProgramBinary,
+    so later runs on the same driver load them with glProgramBinary instead
+    of compiling and linking.
+    """
     
-    def __init__(self, vertex_shader: str, fragment_shader: str, geometry_shader: str = None):
+    def __init__(self, vertex_shader: Optional[str], fragment_shader: Optional[str],
+                 geometry_shader: str = None, defines: Dict[str, Any] = None,
+                 compute_shader: str = None):
         """Compile and link shader program.
         
         Args:
-            vertex_shader: Vertex shader source code
-            fragment_shader: Fragment shader source code
+            vertex_shader: Vertex shader source code (None for compute programs)
+            fragment_shader: Fragment shader source code (None for compute programs
+                and depth-only passes such as shadow maps)
             geometry_shader: Optional geometry shader source code
+            defines: Optional #define constants inserted after #version in every stage
+            compute_shader: Compute shader source code, used instead of the other stages
         """
         self.program = glCreateProgram()
+        self.uniforms: Dict[str, int] = {}  # Name -> location, filled once linked
+        stages = [(with_defines(source, defines), shader_type) for source, shader_type in (
+            (vertex_shader, GL_VERTEX_SHADER),
+            (fragment_shader, GL_FRAGMENT_SHADER),
+            (geometry_shader, GL_GEOMETRY_SHADER),
+            (compute_shader, GL_COMPUTE_SHADER),
+        ) if source]
+        
+        # Defines are already part of the sources, so they are covered by the key
+        cache_path = self._binary_cache_path(*(f"{shader_type}:{source}" for source, shader_type in stages))
+        if cache_path is not None and self._load_binary(cache_path):
+            self._cache_uniform_locations()
+            return
         
-        # Compile shaders
-        vertex = self._compile_shader(vertex_shader, GL_VERTEX_SHADER)
-        fragment = self._compile_shader(fragment_shader, GL_FRAGMENT_SHADER)
-        geometry = None
-        
-        if geometry_shader:
-            geometry = self._compile_shader(geometry_shader, GL_GEOMETRY_SHADER)
-        
-        # Attach shaders
-        glAttachShader(self.program, vertex)
-        glAttachShader(self.program, fragment)
-        if geometry:
-            glAttachShader(self.program, geometry)
+        # Compile and attach shaders
+        shaders = [self._compile_shader(source, shader_type) for source, shader_type in stages]
+        for shader in shaders:
+            glAttachShader(self.program, shader)
         
         # Link program
+        if cache_path is not None:
+            glProgramParameteri(self.program, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
         glLinkProgram(self.program)
         
         # Check for linking errors
@@ -904,10 +1850,83 @@ class ShaderProgram:
             raise RuntimeError(f"Shader program linking error: {info}")
         
         # Clean up shaders
-        glDeleteShader(vertex)
-        glDeleteShader(fragment)
-        if geometry:
-            glDeleteShader(geometry)
+        for shader in shaders:
+            glDeleteShader(shader)
+        
+        if cache_path is not None:
+            self._save_binary(cache_path)
+        self._cache_uniform_locations()
+    
+    def _cache_uniform_locations(self) -> None:
+        """Looks up every active uniform once so setters never query the driver."""
+        for index in range(glGetProgramiv(self.program, GL_ACTIVE_UNIFORMS)):
+            name, _, _ = glGetActiveUniform(self.program, index)
+            name = name.decode() if isinstance(name, bytes) else name
+            location = glGetUniformLocation(self.program, name)
+            if location < 0:
+                continue  # Uniform block members have no location
+            self.uniforms[name] = location
+            if name.endswith('[0]'):
+                self.uniforms[name[:-3]] = location
+    
+    @staticmethod
+    def _binary_cache_path(*sources: Optional[str]) -> Optional[str]:
+        """Returns the cache file for these sources on the current driver.
+        
+        Returns None when the driver supports no program binary formats.
+        """
+        if not glGetIntegerv(GL_NUM_PROGRAM_BINARY_FORMATS):
+            return None
+        digest = hashlib.sha1()
+        for source in sources:
+            digest.update((source or '').encode())
+            digest.update(b'\0')
+        for name in (GL_VENDOR, GL_RENDERER, GL_VERSION):
+            digest.update(glGetString(name) or b'')
+            digest.update(b'\0')
+        return os.path.join(SHADER_CACHE_DIR, f"{digest.hexdigest()}.bin")
+    
+    def _load_binary(self, path: str) -> bool:
+        """Loads a cached program binary, deleting the file if the driver rejects it."""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return False
+        if len(data) > 4:
+            binary_format, = struct.unpack_from('<I', data)
+            try:
+                glProgramBinary(self.program, binary_format, data[4:], len(data) - 4)
+                if glGetProgramiv(self.program, GL_LINK_STATUS):
+                    return True
+            except GLError:
+                pass
+        # Stale or corrupt entry (e.g. after a driver update); relink from source
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return False
+    
+    def _save_binary(self, path: str) -> None:
+        """Writes the linked program binary to path atomically."""
+        length = glGetProgramiv(self.program, GL_PROGRAM_BINARY_LENGTH)
+        if not length:
+            return
+        binary = np.empty(length, dtype=np.uint8)
+        written = np.zeros(1, dtype=np.int32)
+        binary_format = np.zeros(1, dtype=np.uint32)
+        glGetProgramBinary(self.program, length, written, binary_format, binary)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(struct.pack('<I', int(binary_format[0])))
+                f.write(binary[:int(written[0])].tobytes())
+            os.replace(tmp_path, path)
+        except OSError:
+            # The cache is an optimization; an unwritable directory is not an error
+            pass
     
     def _compile_shader(self, source: str, shader_type: int) -> int:
         """Compile a shader from source."""
@@ -922,51 +1941,464 @@ class ShaderProgram:
             
         return shader
     
+    def uniform_location(self, name: str) -> int:
+        """Returns a uniform's location, or -1 if the program has no such uniform.
+        
+        Names not found at link time (e.g. 'u_Lights[3]') are queried once
+        and remembered.
+        """
+        try:
+            return self.uniforms[name]
+        except KeyError:
+            location = self.uniforms[name] = glGetUniformLocation(self.program, name)
+            return location
+    
     def use(self) -> None:
         """Use this shader program."""
         glUseProgram(self.program)
     
     def set_bool(self, name: str, value: bool) -> None:
         """Set a boolean uniform."""
-        glUniform1i(glGetUniformLocation(self.program, name), int(value))
+        glUniform1i(self.uniform_location(name), int(value))
     
     def set_int(self, name: str, value: int) -> None:
         """Set an integer uniform."""
-        glUniform1i(glGetUniformLocation(self.program, name), value)
+        glUniform1i(self.uniform_location(name), value)
     
     def set_float(self, name: str, value: float) -> None:
         """Set a float uniform."""
-        glUniform1f(glGetUniformLocation(self.program, name), value)
+        glUniform1f(self.uniform_location(name), value)
     
     def set_vec2(self, name: str, value: Tuple[float, float]) -> None:
         """Set a 2D vector uniform."""
-        glUniform2f(glGetUniformLocation(self.program, name), *value)
+        glUniform2f(self.uniform_location(name), *value)
     
     def set_vec3(self, name: str, value: Tuple[float, float, float]) -> None:
         """Set a 3D vector uniform."""
-        glUniform3f(glGetUniformLocation(self.program, name), *value)
+        glUniform3f(self.uniform_location(name), *value)
     
     def set_vec4(self, name: str, value: Tuple[float, float, float, float]) -> None:
         """Set a 4D vector uniform."""
-        glUniform4f(glGetUniformLocation(self.program, name), *value)
+        glUniform4f(self.uniform_location(name), *value)
     
     def set_mat2(self, name: str, value: np.ndarray) -> None:
         """Set a 2x2 matrix uniform."""
-        glUniformMatrix2fv(glGetUniformLocation(self.program, name), 1, GL_FALSE, value)
+        glUniformMatrix2fv(self.uniform_location(name), 1, GL_FALSE, value)
     
     def set_mat3(self, name: str, value: np.ndarray) -> None:
         """Set a 3x3 matrix uniform."""
-        glUniformMatrix3fv(glGetUniformLocation(self.program, name), 1, GL_FALSE, value)
+        glUniformMatrix3fv(self.uniform_location(name), 1, GL_FALSE, value)
     
     def set_mat4(self, name: str, value: np.ndarray) -> None:
         """Set a 4x4 matrix uniform."""
-        glUniformMatrix4fv(glGetUniformLocation(self.program, name), 1, GL_FALSE, value)
+        glUniformMatrix4fv(self.uniform_location(name), 1, GL_FALSE, value)
+    
+    def set_mat4_by_id(self, location: int, value: np.ndarray) -> None:
+        """Set a 4x4 matrix uniform by a location from uniform_location()."""
+        glUniformMatrix4fv(location, 1, GL_FALSE, value)
     
     def delete(self) -> None:
         """Delete the shader program."""
         glDeleteProgram(self.program)
 
 
+# Storage buffer binding point of the per-object table (shaders.OBJECT_TABLE_BLOCK)
+OBJECT_SSBO_BINDING = 3
+
+# Frames of per-object rows in flight; the CPU fills one slot while the GPU reads the others
+OBJECT_RING_FRAMES = 3
+
+# One row per drawn object in std430 layout; mat3 columns are padded to vec4
+OBJECT_DTYPE = np.dtype([
+    ('model', 'f4', (4, 4)), ('normal_matrix', 'f4', (3, 4)),
+    ('material_id', 'u4'), ('texture_mask', 'u4'), ('_pad', 'u4', 2),
+])
+
+# Material maps bound by the geometry pass, in texture unit order
+GEOMETRY_TEXTURE_MAPS = ('albedo_map', 'normal_map', 'metallic_map', 'roughness_map', 'ao_map')
+GEOMETRY_SAMPLER_UNIFORMS = ('u_Material.albedoMap', 'u_Material.normalMap', 'u_Material.metallicMap',
+                             'u_Material.roughnessMap', 'u_Material.aoMap')
+
+
+# glMultiDrawElementsIndirect command layout (DrawElementsIndirectCommand)
+DRAW_COMMAND_DTYPE = np.dtype([
+    ('count', 'u4'), ('instance_count', 'u4'), ('first_index', 'u4'),
+    ('base_vertex', 'i4'), ('base_instance', 'u4'),
+])
+
+# Floats per mesh vertex: position, normal, uv, tangent, bitangent (PBR_VERTEX_SHADER locations 0-4)
+MESH_VERTEX_FLOATS = 14
+
+# MeshPool's packed vertex, 24 bytes instead of 56: half-float position (w pads
+# it to 4-byte alignment) and uv, signed normalized 10:10:10:2 directions.
+# The shader inputs stay vec3/vec2; vertex fetch expands them.
+PACKED_VERTEX_DTYPE = np.dtype([
+    ('position', 'f2', 4),
+    ('normal', 'u4'),
+    ('uv', 'f2', 2),
+    ('tangent', 'u4'),
+    ('bitangent', 'u4'),
+])
+# Field, component count, type and normalized flag per attribute location
+PACKED_VERTEX_ATTRIBUTES = (
+    ('position', 3, GL_HALF_FLOAT, GL_FALSE),
+    ('normal', 4, GL_INT_2_10_10_10_REV, GL_TRUE),
+    ('uv', 2, GL_HALF_FLOAT, GL_FALSE),
+    ('tangent', 4, GL_INT_2_10_10_10_REV, GL_TRUE),
+    ('bitangent', 4, GL_INT_2_10_10_10_REV, GL_TRUE),
+)
+
+# Per-mesh row of MeshPool: index range in the shared buffers and local bounds
+MESH_RANGE_DTYPE = np.dtype([
+    ('first_index', 'u4'), ('base_vertex', 'i4'), ('count', 'u4'),
+    ('center', 'f4', 3), ('extent', 'f4', 3),
+])
+
+# Clustered lighting: screen tiles x logarithmic depth slices (shaders.LIGHT_CLUSTER_BLOCK)
+CLUSTER_GRID = (16, 9, 24)
+CLUSTER_COUNT = CLUSTER_GRID[0] * CLUSTER_GRID[1] * CLUSTER_GRID[2]
+
+# Lights kept per cluster when the lists are built on the GPU
+MAX_CLUSTER_LIGHTS = 128
+
+# #defines of the lighting and light cluster shaders
+CLUSTER_SHADER_DEFINES = {
+    'CLUSTER_GRID_X': CLUSTER_GRID[0], 'CLUSTER_GRID_Y': CLUSTER_GRID[1],
+    'CLUSTER_GRID_Z': CLUSTER_GRID[2], 'MAX_CLUSTER_LIGHTS': MAX_CLUSTER_LIGHTS,
+}
+
+# Storage buffer binding points of the light table, cluster table and cluster light indices
+LIGHT_SSBO_BINDING = 4
+CLUSTER_SSBO_BINDING = 5
+CLUSTER_LIGHTS_SSBO_BINDING = 6
+
+# First texture unit of u_ShadowMaps in the lighting shader when bindless textures are unavailable
+SHADOW_MAP_BINDING = 10
+
+# Per-cluster range of light indices
+CLUSTER_DTYPE = np.dtype([('offset', 'u4'), ('count', 'u4')])
+
+
+class PersistentRing:
+    """Persistently mapped buffer of OBJECT_RING_FRAMES slots of dtype rows.
+    
+    Coherent mapping means rows written through self.rows are visible to the
+    GPU without flushes; fence() after the draws reading a slot and wait()
+    before rewriting it.
+    """
+    
+    def __init__(self, target: int, dtype: np.dtype, capacity: int):
+        self.target = target
+        self.dtype = dtype
+        self.rows = None
+        self.buffer = 0
+        self.capacity = 0
+        self._fences = [None] * OBJECT_RING_FRAMES
+        self.reserve(capacity)
+    
+    def reserve(self, capacity: int) -> None:
+        """(Re)creates the buffer when slots hold fewer than capacity rows."""
+        if capacity <= self.capacity:
+            return
+        if self.rows is not None:
+            # Growing: wait for every in-flight frame before unmapping
+            glFinish()
+            self.release()
+        
+        # Whole multiples of 64 rows keep slot offsets aligned for glBindBufferRange
+        capacity = -(-capacity // 64) * 64
+        size = OBJECT_RING_FRAMES * capacity * self.dtype.itemsize
+        flags = GL_MAP_WRITE_BIT | GL_MAP_PERSISTENT_BIT | GL_MAP_COHERENT_BIT
+        self.buffer = glGenBuffers(1)
+        glBindBuffer(self.target, self.buffer)
+        glBufferStorage(self.target, size, None, flags)
+        address = glMapBufferRange(self.target, 0, size, flags)
+        glBindBuffer(self.target, 0)
+        
+        mapped = np.ctypeslib.as_array((ctypes.c_ubyte * size).from_address(address))
+        self.rows = mapped.view(self.dtype).reshape(OBJECT_RING_FRAMES, capacity)
+        self.capacity = capacity
+    
+    def slot_offset(self, slot: int) -> int:
+        """Byte offset of a slot in the buffer."""
+        return slot * self.capacity * self.dtype.itemsize
+    
+    def wait(self, slot: int) -> None:
+        """Blocks until the GPU has finished reading a slot."""
+        fence = self._fences[slot]
+        if fence is None:
+            return
+        while glClientWaitSync(fence, GL_SYNC_FLUSH_COMMANDS_BIT, 1000000) == GL_TIMEOUT_EXPIRED:
+            pass
+        glDeleteSync(fence)
+        self._fences[slot] = None
+    
+    def fence(self, slot: int) -> None:
+        """Marks a slot busy until the commands issued so far have run."""
+        self._fences[slot] = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+    
+    def release(self) -> None:
+        """Unmaps and deletes the buffer."""
+        for fence in self._fences:
+            if fence is not None:
+                glDeleteSync(fence)
+        self._fences = [None] * OBJECT_RING_FRAMES
+        self.rows = None
+        self.capacity = 0
+        glBindBuffer(self.target, self.buffer)
+        glUnmapBuffer(self.target)
+        glBindBuffer(self.target, 0)
+        glDeleteBuffers(1, [self.buffer])
+
+
+
+class TextureBlitter:
+    """Runs fragment shaders over the whole viewport with one fullscreen triangle.
+    
+    The triangle comes from gl_VertexID in FULLSCREEN_TRIANGLE_VERTEX_SHADER,
+    so only an empty VAO is bound. Fragment shaders read v_TexCoords; by
+    default the source texture is copied.
+    """
+    
+    def __init__(self):
+        self._vao = glGenVertexArrays(1)
+        self._programs: Dict[Tuple[str, frozenset], ShaderProgram] = {}
+    
+    def program(self, fragment_shader: str = BLIT_FRAGMENT_SHADER,
+                defines: Optional[Dict[str, Any]] = None) -> ShaderProgram:
+        """Returns the program for a fragment shader, compiling it on first use."""
+        key = (fragment_shader, frozenset((defines or {}).items()))
+        program = self._programs.get(key)
+        if program is None:
+            program = self._programs[key] = ShaderProgram(
+                FULLSCREEN_TRIANGLE_VERTEX_SHADER, fragment_shader, defines=defines)
+        return program
+    
+    def blit(self, textures: Tuple[int, ...] = (), program: Optional[ShaderProgram] = None) -> None:
+        """Draws program (a plain copy by default) into the bound framebuffer.
+        
+        textures are bound to units 0, 1, ... in order; set any other
+        uniforms after program.use() before calling.
+        """
+        if program is None:
+            program = self.program()
+        program.use()
+        if textures:
+            glBindTextures(0, len(textures), list(textures))
+        glBindVertexArray(self._vao)
+        glDrawArrays(GL_TRIANGLES, 0, 3)
+        glBindVertexArray(0)
+    
+    def delete(self) -> None:
+        """Deletes the VAO and compiled programs."""
+        for program in self._programs.values():
+            program.delete()
+        self._programs.clear()
+        glDeleteVertexArrays(1, [self._vao])
+
+def _pack_directions(vectors: np.ndarray) -> np.ndarray:
+    """Packs (N, 3) directions into GL_INT_2_10_10_10_REV words, normalizing them first."""
+    length = np.linalg.norm(vectors, axis=1, keepdims=True)
+    q = np.rint(vectors / np.maximum(length, 1e-12) * 511.0).astype(np.int32) & 0x3FF
+    return (q[:, 0] | (q[:, 1] << 10) | (q[:, 2] << 20)).astype(np.uint32)
+
+
+class MeshPool:
+    """Shared vertex and index buffers holding every mesh drawn by the geometry pass.
+    
+    Meshes provide vertices (float32, MESH_VERTEX_FLOATS per vertex) and
+    uint32 indices. Vertices are stored as PACKED_VERTEX_DTYPE. Each mesh
+    gets a row of ranges, so any set of meshes can be drawn from one VAO
+    with glMultiDrawElementsIndirect.
+    """
+    
+    def __init__(self):
+        self.ranges = np.zeros(64, dtype=MESH_RANGE_DTYPE)
+        self._vertices = np.zeros(1024, dtype=PACKED_VERTEX_DTYPE)
+        self._indices = np.zeros(4096, dtype=np.uint32)
+        self._vertex_count = 0
+        self._index_count = 0
+        self._slots: Dict[int, int] = {}  # id(mesh) -> row of ranges
+        self._meshes: List[Any] = []  # Keeps ids in _slots from being reused
+        self._vao = None
+        self._uploaded = (0, 0)  # Vertex and index counts already on the GPU
+        self._uploaded_capacity = (0, 0)
+    
+    def add(self, mesh: Any) -> int:
+        """Returns the row of a mesh in ranges, appending its data on first use."""
+        slot = self._slots.get(id(mesh))
+        if slot is not None:
+            return slot
+        vertices = np.asarray(mesh.vertices, dtype=np.float32).reshape(-1, MESH_VERTEX_FLOATS)
+        indices = np.asarray(mesh.indices, dtype=np.uint32).ravel()
+        
+        slot = len(self._meshes)
+        if slot == len(self.ranges):
+            self.ranges = np.concatenate((self.ranges, np.zeros_like(self.ranges)))
+        packed = np.zeros(len(vertices), dtype=PACKED_VERTEX_DTYPE)
+        packed['position'][:, :3] = vertices[:, 0:3]
+        packed['normal'] = _pack_directions(vertices[:, 3:6])
+        packed['uv'] = vertices[:, 6:8]
+        packed['tangent'] = _pack_directions(vertices[:, 8:11])
+        packed['bitangent'] = _pack_directions(vertices[:, 11:14])
+        self._vertices = self._append(self._vertices, self._vertex_count, packed)
+        self._indices = self._append(self._indices, self._index_count, indices)
+        
+        lo = vertices[:, :3].min(axis=0)
+        hi = vertices[:, :3].max(axis=0)
+        self.ranges[slot] = (self._index_count, self._vertex_count, len(indices),
+                             (lo + hi) * 0.5, (hi - lo) * 0.5)
+        self._vertex_count += len(vertices)
+        self._index_count += len(indices)
+        self._slots[id(mesh)] = slot
+        self._meshes.append(mesh)
+        return slot
+    
+    @staticmethod
+    def _append(array: np.ndarray, count: int, values: np.ndarray) -> np.ndarray:
+        """Writes values after the first count rows of array, doubling it if needed."""
+        needed = count + len(values)
+        if needed > len(array):
+            grown = np.zeros((max(needed, 2 * len(array)),) + array.shape[1:], dtype=array.dtype)
+            grown[:count] = array[:count]
+            array = grown
+        array[count:needed] = values
+        return array
+    
+    def upload(self) -> None:
+        """Sends meshes added since the last upload to the GPU."""
+        if self._vao is None:
+            self._vao = glGenVertexArrays(1)
+            self._vbo, self._ibo = glGenBuffers(2)
+            glBindVertexArray(self._vao)
+            glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
+            stride = PACKED_VERTEX_DTYPE.itemsize
+            for location, (name, size, gl_type, normalized) in enumerate(PACKED_VERTEX_ATTRIBUTES):
+                glEnableVertexAttribArray(location)
+                glVertexAttribPointer(location, size, gl_type, normalized, stride,
+                                      ctypes.c_void_p(PACKED_VERTEX_DTYPE.fields[name][1]))
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self._ibo)
+            glBindVertexArray(0)
+        
+        counts = (self._vertex_count, self._index_count)
+        if counts == self._uploaded:
+            return
+        capacity = (len(self._vertices), len(self._indices))
+        for target, name, data, start, count in (
+                (GL_ARRAY_BUFFER, self._vbo, self._vertices, self._uploaded[0], counts[0]),
+                (GL_ELEMENT_ARRAY_BUFFER, self._ibo, self._indices, self._uploaded[1], counts[1])):
+            glBindBuffer(target, name)
+            if capacity != self._uploaded_capacity:
+                glBufferData(target, data.nbytes, data, GL_STATIC_DRAW)
+            else:
+                row_size = data.itemsize * data[0].size
+                glBufferSubData(target, start * row_size, (count - start) * row_size, data[start:count])
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self._uploaded = counts
+        self._uploaded_capacity = capacity
+    
+    def bind(self) -> None:
+        """Binds the VAO over the shared buffers."""
+        glBindVertexArray(self._vao)
+    
+    def release(self) -> None:
+        """Deletes the GPU buffers; the meshes stay and are uploaded again on next use."""
+        if self._vao is None:
+            return
+        glDeleteVertexArrays(1, [self._vao])
+        glDeleteBuffers(2, [self._vbo, self._ibo])
+        self._vao = None
+        self._uploaded = (0, 0)
+        self._uploaded_capacity = (0, 0)
+
+
+MESH_POOL = MeshPool()
+
+
+def _frustum_planes(view_projection: np.ndarray) -> np.ndarray:
+    """Returns the (6, 4) left, right, bottom, top, near, far planes of a row-major matrix.
+    
+    Planes are unnormalized; points with dot(plane[:3], p) + plane[3] >= 0 are inside.
+    """
+    m = view_projection
+    return np.stack((m[3] + m[0], m[3] - m[0], m[3] + m[1],
+                     m[3] - m[1], m[3] + m[2], m[3] - m[2]))
+
+
+def _world_aabbs(models: np.ndarray, centers: np.ndarray, extents: np.ndarray) -> np.ndarray:
+    """Returns (N, 6) world-space min|max bounds of local AABBs moved by row-major models.
+    
+    Centres are transformed and extents go through the absolute rotation-scale part.
+    """
+    basis = models[:, :3, :3]
+    world_centers = np.einsum('nij,nj->ni', basis, centers) + models[:, :3, 3]
+    world_extents = np.einsum('nij,nj->ni', np.abs(basis), extents)
+    return np.concatenate((world_centers - world_extents, world_centers + world_extents), axis=1)
+
+
+def _cull_aabbs(aabbs: np.ndarray, planes: np.ndarray) -> np.ndarray:
+    """Returns which packed (N, 6) min|max boxes touch the frustum planes.
+    
+    A box is outside when its positive vertex, the corner furthest along a
+    plane's normal, is behind that plane. All boxes and planes are tested at once.
+    """
+    normals = planes[:, :3]
+    positive = np.where(normals > 0.0, aabbs[:, None, 3:], aabbs[:, None, :3])
+    distances = np.einsum('npk,pk->np', positive, normals) + planes[:, 3]
+    return (distances >= 0.0).all(axis=1)
+
+
+def _assign_light_clusters(centers: np.ndarray, radii: np.ndarray, projection: np.ndarray,
+                           near: float, far: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Bins view-space light spheres into the CLUSTER_GRID cells they may touch.
+    
+    Returns the (CLUSTER_COUNT,) light count of every cluster and, grouped by
+    cluster in index order, which of the spheres each cluster holds. Each
+    sphere's view-space box is projected with the row-major perspective
+    projection to a range of tiles and logarithmic depth slices.
+    """
+    grid_x, grid_y, grid_z = CLUSTER_GRID
+    depth = -centers[:, 2]
+    near_depth = np.maximum(depth - radii, near)
+    far_depth = np.minimum(depth + radii, far)
+    lit = np.flatnonzero(near_depth <= far_depth)
+    centers, radii = centers[lit], radii[lit]
+    near_depth, far_depth = near_depth[lit], far_depth[lit]
+    
+    # x / depth is most extreme at the nearest or furthest depth of the box
+    cells = []
+    inside = np.ones(len(lit), dtype=bool)
+    for axis, count in ((0, grid_x), (1, grid_y)):
+        low, high = centers[:, axis] - radii, centers[:, axis] + radii
+        scale, offset = projection[axis, axis], projection[axis, 2]
+        ndc_low = scale * np.minimum(low / near_depth, low / far_depth) - offset
+        ndc_high = scale * np.maximum(high / near_depth, high / far_depth) - offset
+        inside &= (ndc_low <= 1.0) & (ndc_high >= -1.0)
+        cells.append((np.clip(((ndc_low * 0.5 + 0.5) * count).astype(np.int64), 0, count - 1),
+                      np.clip(((ndc_high * 0.5 + 0.5) * count).astype(np.int64), 0, count - 1)))
+    slice_scale = grid_z / math.log(far / near)
+    cells.append((np.clip((np.log(near_depth / near) * slice_scale).astype(np.int64), 0, grid_z - 1),
+                  np.clip((np.log(far_depth / near) * slice_scale).astype(np.int64), 0, grid_z - 1)))
+    
+    keep = np.flatnonzero(inside)
+    lit = lit[keep]
+    (x0, x1), (y0, y1), (z0, z1) = ((first[keep], last[keep]) for first, last in cells)
+    width, height = x1 - x0 + 1, y1 - y0 + 1
+    spans = width * height * (z1 - z0 + 1)
+    
+    # One (cluster, light) pair per covered cell: expand each light's span and
+    # decompose the running index within it into x, y, z steps
+    light = np.repeat(np.arange(len(lit)), spans)
+    step = np.arange(len(light)) - np.repeat(np.cumsum(spans) - spans, spans)
+    x = x0[light] + step % width[light]
+    step //= width[light]
+    y = y0[light] + step % height[light]
+    z = z0[light] + step // height[light]
+    cluster = x + grid_x * (y + grid_y * z)
+    
+    order = np.argsort(cluster, kind='stable')
+    return np.bincount(cluster, minlength=CLUSTER_COUNT), lit[light[order]]
+
 class HDRRenderer:
     """Advanced HDR rendering system with PBR, atmospheric effects, and post-processing.
     
@@ -974,6 +2406,34 @@ class HDRRenderer:
     materials, lighting, atmospheric effects, and post-processing into a cohesive system.
     """
     
+    # Frames between stat prints when debug['print_stats'] is set (about 10 Hz at 60 fps)
+    STATS_PRINT_INTERVAL = 6
+    
+    # Material maps whose on/off combinations are compiled at startup, and the
+    # most variants _warm_pipeline_cache compiles
+    WARM_TEXTURE_MAPS = ('albedo_map', 'normal_map', 'metallic_map', 'roughness_map', 'ao_map')
+    WARM_VARIANT_BUDGET = 32
+    
+    # Keep every HDR color target RGBA16F instead of packed R11F_G11F_B10F
+    # (like three.js' forceHalfFloat), e.g. when an effect needs the extra precision
+    force_half = False
+    
+    # Weight of the bloom pyramid in the final composite
+    bloom_intensity = 0.04
+    
+    # Outer weight of the bloom upsample tent, see _pack_bloom_params
+    bloom_spread = 0.25
+    
+    # Tone curve of the final composite, 'aces' or 'reinhard'
+    tone_mapper = 'aces'
+    
+    # Tone mapping in the final composite; off shows the linear scene as rendered
+    tone_mapping_enabled = True
+    
+    # Build the per-cluster light lists with a compute shader; False bins lights
+    # on the CPU instead (_assign_light_clusters), e.g. without compute shaders
+    gpu_light_clusters = True
+    
     def __init__(self, width: int, height: int, hdr_enabled: bool = True):
         """Initialize the HDR renderer.
         
@@ -989,6 +2449,18 @@ class HDRRenderer:
         self.frame_count = 0
         self.time = 0.0
         
+        # Lighting and shadow setup
+        self.lights: List[Light] = []
+        self.ambient_light = (0.03, 0.03, 0.03)
+        
+        # Sky and fog; the lighting pass binds its uniform block
+        self.atmosphere = AtmosphereSettings()
+        
+        # Per-frame model matrices as given and transposed for GL, grown as
+        # needed so render_scene does not allocate them every frame
+        self._model_scratch = np.empty((0, 4, 4), dtype=np.float32)
+        self._model_rows = np.empty((0, 4, 4), dtype=np.float32)
+        
         # Initialize OpenGL
         self._init_opengl()
         
@@ -1004,6 +2476,9 @@ class HDRRenderer:
         # Initialize default resources
         self._init_default_resources()
         
+        # Initialize the forward pipeline
+        self._init_forward_pipeline()
+        
         # Initialize statistics
         self.stats = {
             'draw_calls': 0,
@@ -1023,7 +2498,56 @@ class HDRRenderer:
             'show_shadow_cascades': False,
             'show_ssao': False,
             'show_light_volumes': False,
+            'print_stats': False,  # Print stats to stdout every STATS_PRINT_INTERVAL frames
         }
+        
+        # Compile common material variants and the light matrix kernels now
+        # rather than on first use. Material programs are keyed by
+        # Material.defines_key and belong to this renderer's context
+        self._program_cache: Dict[int, ShaderProgram] = {}
+        self._warm_pipeline_cache()
+        _warm_up_math()
+    
+    def _compile_material_program(self, defines: Dict[str, str]) -> ShaderProgram:
+        """Builds the PBR program for a material's defines (see Material.get_shader_program)."""
+        from . import shaders as shader_defs
+        return ShaderProgram(shader_defs.PBR_VERTEX_SHADER, shader_defs.PBR_FRAGMENT_SHADER,
+                             defines=defines)
+    
+    def material_program(self, material: 'Material') -> ShaderProgram:
+        """Returns this renderer's PBR program for a material's defines."""
+        return material.get_shader_program(self._program_cache, self._compile_material_program)
+    
+    def _warm_pipeline_cache(self) -> None:
+        """Compiles the common material shader variants and draws each once.
+        
+        Covers opaque, one-sided standard materials with every combination of
+        WARM_TEXTURE_MAPS, up to WARM_VARIANT_BUDGET variants. Programs go into
+        the cache Material.get_shader_program is given, so first use of a material
+        does not compile; with the program binary cache later launches only
+        load them. A three-vertex draw into the G-buffer with an empty VAO makes
+        the driver build each program's pipeline state now too.
+        """
+        bits = [_MATERIAL_TEXTURE_FIELDS.index(name) for name in self.WARM_TEXTURE_MAPS]
+        base_key = int(MaterialType.STANDARD) << _MATERIAL_TYPE_SHIFT
+        
+        vao = glGenVertexArrays(1)
+        glBindVertexArray(vao)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.g_buffer['fbo'])
+        for combo in range(min(1 << len(bits), self.WARM_VARIANT_BUDGET)):
+            key = base_key
+            for i, bit in enumerate(bits):
+                if combo >> i & 1:
+                    key |= 1 << bit
+            program = self._program_cache.get(key)
+            if program is None:
+                program = self._program_cache[key] = self._compile_material_program(_shader_defines(key))
+            program.use()
+            glDrawArrays(GL_TRIANGLES, 0, 3)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glBindVertexArray(0)
+        glDeleteVertexArrays(1, [vao])
+        glUseProgram(0)
     
     def _load_shaders(self) -> Dict[str, ShaderProgram]:
         """Load and compile all shaders."""
@@ -1040,8 +2564,15 @@ class HDRRenderer:
             
             # Lighting shader
             shader_programs['lighting'] = ShaderProgram(
-                vertex_shader=shader_defs.LIGHTING_VERTEX_SHADER,
-                fragment_shader=shader_defs.LIGHTING_FRAGMENT_SHADER
+                vertex_shader=shader_defs.FULLSCREEN_TRIANGLE_VERTEX_SHADER,
+                fragment_shader=shader_defs.LIGHTING_FRAGMENT_SHADER,
+                defines=self._lighting_defines(shadows=True, spot_lights=True)
+            )
+            
+            # Per-cluster light lists, one invocation per cluster
+            shader_programs['light_clusters'] = ShaderProgram(
+                None, None, defines=CLUSTER_SHADER_DEFINES,
+                compute_shader=shader_defs.LIGHT_CLUSTER_COMPUTE_SHADER
             )
             
             # Skybox shader
@@ -1050,31 +2581,52 @@ class HDRRenderer:
                 fragment_shader=shader_defs.SKYBOX_FRAGMENT_SHADER
             )
             
-            # Shadow map shader
+            # Shadow map shader; depth only, so it links without a fragment stage
             shader_programs['shadow_map'] = ShaderProgram(
                 vertex_shader=shader_defs.SHADOW_MAP_VERTEX_SHADER,
-                fragment_shader=shader_defs.SHADOW_MAP_FRAGMENT_SHADER
+                fragment_shader=None
             )
             
             # Post-processing shaders
             shader_programs['post'] = ShaderProgram(
-                vertex_shader=shader_defs.FULLSCREEN_QUAD_VERTEX_SHADER,
-                fragment_shader=shader_defs.FULLSCREEN_QUAD_VERTEX_SHADER  # Dummy fragment shader
+                vertex_shader=shader_defs.FULLSCREEN_TRIANGLE_VERTEX_SHADER,
+                fragment_shader=shader_defs.BLIT_FRAGMENT_SHADER
+            )
+            
+            shader_programs['fxaa'] = ShaderProgram(
+                vertex_shader=shader_defs.FULLSCREEN_TRIANGLE_VERTEX_SHADER,
+                fragment_shader=shader_defs.FXAA_FRAGMENT_SHADER
+            )
+            
+            # Bloom pyramid compute shaders; the first downsample also thresholds
+            shader_programs['bloom_first_pass'] = ShaderProgram(
+                None, None, defines={'BLOOM_FIRST_PASS': True},
+                compute_shader=shader_defs.BLOOM_DOWNSAMPLE_COMPUTE_SHADER
+            )
+            
+            shader_programs['bloom_downsample'] = ShaderProgram(
+                None, None, compute_shader=shader_defs.BLOOM_DOWNSAMPLE_COMPUTE_SHADER
             )
             
-            shader_programs['bloom'] = ShaderProgram(
-                vertex_shader=shader_defs.FULLSCREEN_QUAD_VERTEX_SHADER,
-                fragment_shader=shader_defs.BLOOM_FRAGMENT_SHADER
+            shader_programs['bloom_upsample'] = ShaderProgram(
+                None, None, compute_shader=shader_defs.BLOOM_UPSAMPLE_COMPUTE_SHADER
             )
             
             shader_programs['ssao'] = ShaderProgram(
-                vertex_shader=shader_defs.FULLSCREEN_QUAD_VERTEX_SHADER,
+                vertex_shader=shader_defs.FULLSCREEN_TRIANGLE_VERTEX_SHADER,
                 fragment_shader=shader_defs.SSAO_FRAGMENT_SHADER
             )
             
-            shader_programs['tone_mapping'] = ShaderProgram(
-                vertex_shader=shader_defs.FULLSCREEN_QUAD_VERTEX_SHADER,
-                fragment_shader=shader_defs.TONE_MAPPING_FRAGMENT_SHADER
+            # Separable bilateral SSAO blur, horizontal then vertical
+            shader_programs['ssao_blur'] = ShaderProgram(
+                vertex_shader=shader_defs.FULLSCREEN_TRIANGLE_VERTEX_SHADER,
+                fragment_shader=shader_defs.SSAO_BLUR_FRAGMENT_SHADER
+            )
+            
+            shader_programs['ssao_blur_vertical'] = ShaderProgram(
+                vertex_shader=shader_defs.FULLSCREEN_TRIANGLE_VERTEX_SHADER,
+                fragment_shader=shader_defs.SSAO_BLUR_FRAGMENT_SHADER,
+                defines={'SSAO_BLUR_VERTICAL': True}
             )
             
             # Debug shaders
@@ -1112,20 +2664,44 @@ class HDRRenderer:
         # Set clear color and depth
         glClearColor(0.1, 0.1, 0.1, 1.0)
         glClearDepth(1.0)
+        
+        # moderngl view of the same context, used to upload MATERIAL_TABLE
+        self.ctx = moderngl.create_context()
+        
+        # Shadow maps are passed as resident handles (see _set_sampler) where supported
+        self.bindless_textures = 'GL_ARB_bindless_texture' in self.ctx.extensions
+        self._texture_handles: Dict[int, int] = {}
+        
+        # Persistently mapped per-object rows and indirect draw commands for the geometry pass
+        self._frame_idx = 0
+        self._object_ring = PersistentRing(GL_SHADER_STORAGE_BUFFER, OBJECT_DTYPE, 64)
+        self._command_ring = PersistentRing(GL_DRAW_INDIRECT_BUFFER, DRAW_COMMAND_DTYPE, 64)
+        
+        # Light table and per-cluster light lists for the lighting pass, in the same frame slots
+        self._light_ring = PersistentRing(GL_SHADER_STORAGE_BUFFER, LIGHT_DTYPE, MAX_LIGHTS)
+        self._cluster_ring = PersistentRing(GL_SHADER_STORAGE_BUFFER, CLUSTER_DTYPE, CLUSTER_COUNT)
+        self._cluster_light_ring = PersistentRing(GL_SHADER_STORAGE_BUFFER, np.dtype(np.uint32), 1024)
+        
+        # Enabled, visible lights of the last scene light list (see _active_lights)
+        self._scene_lights: Tuple[Light, ...] = ()
+        self._active_lights_version = -1
+        self._active_light_list: List[Light] = []
     
     def _init_framebuffers(self) -> None:
         """Initialize framebuffers for deferred rendering and post-processing."""
         # G-buffer for deferred rendering
         self.g_buffer = self._create_gbuffer()
         
-        # HDR framebuffer for lighting
-        self.hdr_fbo = self._create_hdr_framebuffer()
+        # Lighting and full-screen passes alternate between two HDR targets;
+        # _pingpong_read is the one holding the latest image. Without HDR the
+        # values are display-referred and 8 bits per channel are enough
+        pingpong_format = GL_RGBA16F if self.hdr_enabled or self.force_half else GL_RGBA8
+        self.pingpong = [self._create_color_target(self.width, self.height, pingpong_format)
+                         for _ in range(2)]
+        self._pingpong_read = 0
         
-        # Bloom framebuffers
-        self.bloom_fbos = self._create_bloom_framebuffers()
-        
-        # SSAO framebuffer
-        self.ssao_fbo = self._create_ssao_framebuffer()
+        # Bloom mip chain
+        self.bloom = self._create_bloom_framebuffers()
     
     def _init_render_passes(self) -> None:
         """Initialize render passes for the rendering pipeline."""
@@ -1145,8 +2721,11 @@ class HDRRenderer:
         # Create default material
         self.default_material = self._create_default_material()
         
-        # Create fullscreen quad VAO
-        self.quad_vao = self._create_quad_vao()
+        # Empty VAO for the gl_VertexID fullscreen triangle (_render_quad)
+        self.quad_vao = glGenVertexArrays(1)
+        
+        # Fullscreen-triangle passes without a vertex buffer
+        self.blitter = TextureBlitter()
         
         # Create cube VAO for skybox
         self.cube_vao = self._create_cube_vao()
@@ -1160,39 +2739,38 @@ class HDRRenderer:
         # Create textures
         textures = {}
         
-        # Position texture (RGBA16F)
-        textures['gPosition'] = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, textures['gPosition'])
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA16F, self.width, self.height, 0, GL_RGBA, GL_FLOAT, None)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
-        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, textures['gPosition'], 0)
-        
-        # Normal texture (RGB16F)
+        # Octahedral-encoded normal texture (RG16)
         textures['gNormal'] = glGenTextures(1)
         glBindTexture(GL_TEXTURE_2D, textures['gNormal'])
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB16F, self.width, self.height, 0, GL_RGB, GL_FLOAT, None)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RG16, self.width, self.height, 0, GL_RG, GL_UNSIGNED_SHORT, None)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
-        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT1, GL_TEXTURE_2D, textures['gNormal'], 0)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, textures['gNormal'], 0)
         
-        # Albedo + Specular (RGBA8)
+        # Albedo + Specular (sRGB8 + linear alpha); sRGB spends the 8 bits where
+        # dark albedo needs them and is decoded to linear by the sampler
         textures['gAlbedoSpec'] = glGenTextures(1)
         glBindTexture(GL_TEXTURE_2D, textures['gAlbedoSpec'])
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, self.width, self.height, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_SRGB8_ALPHA8, self.width, self.height, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
-        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT2, GL_TEXTURE_2D, textures['gAlbedoSpec'], 0)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT1, GL_TEXTURE_2D, textures['gAlbedoSpec'], 0)
         
         # Tell OpenGL which color attachments we'll use for rendering
-        attachments = [GL_COLOR_ATTACHMENT0, GL_COLOR_ATTACHMENT1, GL_COLOR_ATTACHMENT2]
+        attachments = [GL_COLOR_ATTACHMENT0, GL_COLOR_ATTACHMENT1]
         glDrawBuffers(len(attachments), (GLenum * len(attachments))(*attachments))
         
-        # Create and attach depth buffer
-        rbo = glGenRenderbuffers(1)
-        glBindRenderbuffer(GL_RENDERBUFFER, rbo)
-        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT, self.width, self.height)
-        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, rbo)
+        # Sampleable depth texture; positions are reconstructed from it instead
+        # of being stored in a colour attachment
+        textures['gDepth'] = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, textures['gDepth'])
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_DEPTH_COMPONENT24, self.width, self.height, 0,
+                     GL_DEPTH_COMPONENT, GL_FLOAT, None)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_TEXTURE_2D, textures['gDepth'], 0)
         
         # Check if framebuffer is complete
         if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
@@ -1202,42 +2780,154 @@ class HDRRenderer:
         
         return {
             'fbo': fbo,
-            'textures': textures,
-            'rbo': rbo
+            'textures': textures
         }
     
-    def _create_hdr_framebuffer(self) -> Dict[str, Any]:
-        """Create HDR framebuffer for lighting."""
-        # Create FBO
+    def _create_color_target(self, width: int, height: int, internal_format: int) -> Dict[str, Any]:
+        """Create a framebuffer with one linearly filtered color texture.
+        
+        Completeness is checked here once, not per pass.
+        """
         fbo = glGenFramebuffers(1)
         glBindFramebuffer(GL_FRAMEBUFFER, fbo)
         
-        # Create HDR color buffer
         color_buffer = glGenTextures(1)
         glBindTexture(GL_TEXTURE_2D, color_buffer)
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA16F, self.width, self.height, 0, GL_RGBA, GL_FLOAT, None)
+        glTexStorage2D(GL_TEXTURE_2D, 1, internal_format, width, height)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
         glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, color_buffer, 0)
         
-        # Create depth buffer
-        rbo = glGenRenderbuffers(1)
-        glBindRenderbuffer(GL_RENDERBUFFER, rbo)
-        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT, self.width, self.height)
-        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, rbo)
-        
         # Check if framebuffer is complete
         if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
-            raise RuntimeError("HDR framebuffer not complete!")
+            raise RuntimeError("Color target framebuffer not complete!")
         
         glBindFramebuffer(GL_FRAMEBUFFER, 0)
         
         return {
             'fbo': fbo,
-            'color_buffer': color_buffer,
-            'rbo': rbo
+            'color_buffer': color_buffer
+        }
+    
+    def _pingpong_pass(self) -> int:
+        """Binds the ping-pong target not holding the latest image and returns that image.
+        
+        The bound target becomes the latest image once the caller has drawn
+        into it, so consecutive passes alternate between the pair.
+        """
+        source = self.pingpong[self._pingpong_read]['color_buffer']
+        self._pingpong_read ^= 1
+        glBindFramebuffer(GL_FRAMEBUFFER, self.pingpong[self._pingpong_read]['fbo'])
+        return source
+    
+    def _create_bloom_framebuffers(self) -> Dict[str, Any]:
+        """Create the half-resolution R11F_G11F_B10F bloom mip chain.
+        
+        One immutable texture holds every level (about a sixth of a full
+        resolution RGBA16F buffer in total). The bloom compute shaders write
+        its levels as images, so no framebuffers are needed.
+        """
+        size = (max(1, self.width // 2), max(1, self.height // 2))
+        levels = max(1, min(6, int(math.log2(min(size)))))
+        
+        texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, texture)
+        glTexStorage2D(GL_TEXTURE_2D, levels, GL_R11F_G11F_B10F, *size)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        
+        params_ubo = glGenBuffers(1)
+        glBindBuffer(GL_UNIFORM_BUFFER, params_ubo)
+        glBufferData(GL_UNIFORM_BUFFER, BLOOM_PARAMS_DTYPE.itemsize, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+        
+        return {
+            'texture': texture,
+            'size': size,
+            'levels': levels,
+            'params': np.zeros(1, dtype=BLOOM_PARAMS_DTYPE),
+            'params_ubo': params_ubo
         }
     
+    def _apply_bloom_pyramid(self, source_texture: int, threshold: float = 1.0,
+                             knee: float = 0.1, spread: float = 0.25) -> int:
+        """Build the bloom pyramid from an HDR texture and return the bloom texture.
+        
+        Each level is downsampled from the one above it (13 taps, Karis
+        average on the first pass), then the levels are tent-upsampled and
+        added back up the chain. Mip 0 holds the result. The threshold and
+        tent weights (see _pack_bloom_params) go to the BloomParams block once
+        per call, so the passes only set their source level.
+        """
+        texture = self.bloom['texture']
+        levels = self.bloom['levels']
+        
+        params = _pack_bloom_params(self.bloom['params'], threshold, knee, spread)
+        glBindBuffer(GL_UNIFORM_BUFFER, self.bloom['params_ubo'])
+        glBufferSubData(GL_UNIFORM_BUFFER, 0, params.nbytes, params)
+        glBindBufferBase(GL_UNIFORM_BUFFER, BLOOM_UBO_BINDING, self.bloom['params_ubo'])
+        
+        # Downsample: scene -> mip 0 -> ... -> mip levels - 1
+        for level in range(levels):
+            shader = self.shaders['bloom_first_pass' if level == 0 else 'bloom_downsample']
+            shader.use()
+            shader.set_int('u_SourceLevel', 0 if level == 0 else level - 1)
+            glActiveTexture(GL_TEXTURE0)
+            glBindTexture(GL_TEXTURE_2D, source_texture if level == 0 else texture)
+            glBindImageTexture(1, texture, level, GL_FALSE, 0, GL_WRITE_ONLY, GL_R11F_G11F_B10F)
+            width, height = self._bloom_level_size(level)
+            glDispatchCompute(-(-width // 16), -(-height // 16), 1)
+            glMemoryBarrier(GL_TEXTURE_FETCH_BARRIER_BIT | GL_SHADER_IMAGE_ACCESS_BARRIER_BIT)
+        
+        # Upsample: add each level into the one above it
+        shader = self.shaders['bloom_upsample']
+        shader.use()
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_2D, texture)
+        for level in range(levels - 1, 0, -1):
+            shader.set_int('u_SourceLevel', level)
+            glBindImageTexture(1, texture, level - 1, GL_FALSE, 0, GL_READ_WRITE, GL_R11F_G11F_B10F)
+            width, height = self._bloom_level_size(level)
+            glDispatchCompute(-(-width // 16), -(-height // 16), 1)
+            glMemoryBarrier(GL_TEXTURE_FETCH_BARRIER_BIT | GL_SHADER_IMAGE_ACCESS_BARRIER_BIT)
+        
+        return texture
+    
+    def _bloom_level_size(self, level: int) -> Tuple[int, int]:
+        """Returns the size of a bloom mip level."""
+        width, height = self.bloom['size']
+        return max(1, width >> level), max(1, height >> level)
+    
+    def _render_post_processing(self, scene, camera):
+        """Apply post-processing to the lit HDR buffer.
+        
+        The lighting pass writes linear HDR. The bloom pyramid is built from
+        it, then one composite pass (shaders.COMPOSITE_FRAGMENT_SHADER) adds
+        the bloom, tone maps, gamma-corrects and writes the default framebuffer.
+        """
+        scene_texture = self.pingpong[self._pingpong_read]['color_buffer']
+        bloom_texture = self._apply_bloom_pyramid(scene_texture)
+        
+        shader = self.blitter.program(COMPOSITE_FRAGMENT_SHADER, {
+            'ENABLE_BLOOM': True, 'TONE_MAP_REINHARD': self.tone_mapper == 'reinhard'})
+        shader.use()
+        shader.set_int('u_Scene', 0)
+        shader.set_int('u_Bloom', 1)
+        shader.set_float('u_Exposure', HDR_EXPOSURE)
+        shader.set_float('u_BloomIntensity', self.bloom_intensity)
+        # Neutral color grading
+        shader.set_float('u_Contrast', 1.0)
+        shader.set_float('u_Saturation', 1.0)
+        shader.set_float('u_Brightness', 1.0)
+        
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        self.blitter.blit((scene_texture, bloom_texture), program=shader)
+    
     def _render_geometry_pass(self, scene, camera):
         """Render the geometry pass for deferred rendering.
         
@@ -1257,98 +2947,121 @@ class HDRRenderer:
         glEnable(GL_CULL_FACE)
         glCullFace(GL_BACK)
         
+        # Encode linear albedo into the sRGB gAlbedoSpec attachment on write
+        glEnable(GL_FRAMEBUFFER_SRGB)
+        
         # Get view and projection matrices
         view_matrix = camera.get_view_matrix()
         projection_matrix = camera.get_projection_matrix()
         
-        # Use the geometry shader
-        shader = self.shaders['geometry']
+        # The PBR program writes the G-buffer; per-object data comes from the object table
+        shader = self.shaders['pbr']
         shader.use()
         
-        # Set view and projection matrices
-        shader.set_mat4('view', view_matrix)
-        shader.set_mat4('projection', projection_matrix)
-        
-        # Render all objects in the scene
-        for obj in scene.get_objects():
-            # Skip objects that don't have a mesh or are not visible
-            if not hasattr(obj, 'mesh') or not obj.visible:
-                continue
-                
-            # Get model matrix
-            model_matrix = obj.get_transform_matrix()
-            normal_matrix = glm.transpose(glm.inverse(glm.mat3(view_matrix * model_matrix)))
-            
-            # Set model and normal matrices
-            shader.set_mat4('model', model_matrix)
-            shader.set_mat3('normalMatrix', normal_matrix)
-            
-            # Set material properties
-            material = obj.material if hasattr(obj, 'material') else self.default_material
-            shader.set_vec3('material.albedo', material.albedo)
-            shader.set_float('material.metallic', material.metallic)
-            shader.set_float('material.roughness', material.roughness)
-            shader.set_float('material.ao', material.ao)
-            shader.set_vec3('material.emission', material.emission)
-            shader.set_float('material.emission_strength', material.emission_strength)
-            
-            # Bind textures if they exist
-            if material.albedo_map is not None:
-                glActiveTexture(GL_TEXTURE0)
-                glBindTexture(GL_TEXTURE_2D, material.albedo_map)
-                shader.set_int('material.albedoMap', 0)
-                shader.set_bool('material.hasAlbedoMap', True)
-            else:
-                shader.set_bool('material.hasAlbedoMap', False)
-                
-            if material.normal_map is not None:
-                glActiveTexture(GL_TEXTURE1)
-                glBindTexture(GL_TEXTURE_2D, material.normal_map)
-                shader.set_int('material.normalMap', 1)
-                shader.set_bool('material.hasNormalMap', True)
-            else:
-                shader.set_bool('material.hasNormalMap', False)
-                
-            if material.metallic_map is not None:
-                glActiveTexture(GL_TEXTURE2)
-                glBindTexture(GL_TEXTURE_2D, material.metallic_map)
-                shader.set_int('material.metallicMap', 2)
-                shader.set_bool('material.hasMetallicMap', True)
-            else:
-                shader.set_bool('material.hasMetallicMap', False)
-                
-            if material.roughness_map is not None:
-                glActiveTexture(GL_TEXTURE3)
-                glBindTexture(GL_TEXTURE_2D, material.roughness_map)
-                shader.set_int('material.roughnessMap', 3)
-                shader.set_bool('material.hasRoughnessMap', True)
-            else:
-                shader.set_bool('material.hasRoughnessMap', False)
-                
-            if material.ao_map is not None:
-                glActiveTexture(GL_TEXTURE4)
-                glBindTexture(GL_TEXTURE_2D, material.ao_map)
-                shader.set_int('material.aoMap', 4)
-                shader.set_bool('material.hasAOMap', True)
+        # Set per-frame uniforms
+        shader.set_mat4('u_View', view_matrix)
+        shader.set_mat4('u_Projection', projection_matrix)
+        for unit, name in enumerate(GEOMETRY_SAMPLER_UNIFORMS):
+            shader.set_int(name, unit)
+        
+        # Visible objects, with their meshes in the shared pool
+        default_material = self.default_material
+        objects = [obj for obj in scene.get_objects() if hasattr(obj, 'mesh') and obj.visible]
+        mesh_slots = np.fromiter((MESH_POOL.add(obj.mesh) for obj in objects),
+                                 dtype=np.intp, count=len(objects))
+        models = np.array([obj.get_transform_matrix() for obj in objects],
+                          dtype=np.float32).reshape(-1, 4, 4)
+        
+        # Frustum culling on packed world bounds; only visible objects are
+        # looked at again, sorted by material so each texture set is bound once
+        ranges = MESH_POOL.ranges[mesh_slots]
+        aabbs = _world_aabbs(models, ranges['center'], ranges['extent'])
+        planes = _frustum_planes(np.array(projection_matrix * view_matrix, dtype=np.float32))
+        keep = np.flatnonzero(_cull_aabbs(aabbs, planes))
+        materials = [getattr(objects[i], 'material', default_material) for i in keep.tolist()]
+        material_ids = np.fromiter((material.material_id for material in materials),
+                                   dtype=np.int64, count=len(materials))
+        by_material = np.argsort(material_ids, kind='stable')
+        order = keep[by_material]
+        materials = [materials[i] for i in by_material.tolist()]
+        material_ids = material_ids[by_material]
+        count = len(order)
+        
+        # Fill this frame's slots of the mapped rings once the GPU is done with them
+        self._object_ring.reserve(count)
+        self._command_ring.reserve(count)
+        slot = self._frame_idx
+        self._object_ring.wait(slot)
+        self._command_ring.wait(slot)
+        rows = self._object_ring.rows[slot, :count]
+        
+        # Rows hold column-major matrices, so the world-space normal matrix
+        # transpose(inverse(mat3(model))) is stored as inverse(mat3(model))
+        models = models[order]
+        rows['model'] = models.transpose(0, 2, 1)
+        rows['normal_matrix'][:, :, :3] = np.linalg.inv(models[:, :3, :3])
+        rows['material_id'] = material_ids
+        
+        # One indirect command per object; base_instance is its row in the object table
+        commands = self._command_ring.rows[slot, :count]
+        ranges = ranges[order]
+        commands['count'] = ranges['count']
+        commands['instance_count'] = 1
+        commands['first_index'] = ranges['first_index']
+        commands['base_vertex'] = ranges['base_vertex']
+        commands['base_instance'] = np.arange(count, dtype=np.uint32)
+        
+        # Runs of materials sharing the same maps are drawn with one call each
+        groups = []
+        starts = np.flatnonzero(np.diff(material_ids, prepend=-1))
+        for start, end in zip(starts.tolist(), starts[1:].tolist() + [count]):
+            material = materials[start]
+            textures = tuple(getattr(material, name) for name in GEOMETRY_TEXTURE_MAPS)
+            rows['texture_mask'][start:end] = sum(
+                1 << unit for unit, texture in enumerate(textures) if texture is not None)
+            if groups and groups[-1][2] == textures:
+                groups[-1][1] = end
             else:
-                shader.set_bool('material.hasAOMap', False)
-            
-            # Draw the mesh
-            obj.mesh.draw()
-            
-            # Update statistics
-            self.stats['draw_calls'] += 1
-            self.stats['triangles'] += len(obj.mesh.indices) // 3
+                groups.append([start, end, textures])
+        
+        glBindBufferRange(GL_SHADER_STORAGE_BUFFER, OBJECT_SSBO_BINDING, self._object_ring.buffer,
+                          self._object_ring.slot_offset(slot), self._object_ring.capacity * OBJECT_DTYPE.itemsize)
+        
+        # Material parameters come from the shared material table
+        MATERIAL_TABLE.upload(self.ctx)
+        MATERIAL_TABLE.bind()
+        
+        MESH_POOL.upload()
+        MESH_POOL.bind()
+        glBindBuffer(GL_DRAW_INDIRECT_BUFFER, self._command_ring.buffer)
+        command_offset = self._command_ring.slot_offset(slot)
+        for start, end, textures in groups:
+            # One multi-bind per run; units without a map are unbound (texture_mask skips them)
+            glBindTextures(0, len(textures), [texture or 0 for texture in textures])
+            glMultiDrawElementsIndirect(
+                GL_TRIANGLES, GL_UNSIGNED_INT,
+                ctypes.c_void_p(command_offset + start * DRAW_COMMAND_DTYPE.itemsize), end - start, 0)
+        glBindBuffer(GL_DRAW_INDIRECT_BUFFER, 0)
+        glBindVertexArray(0)
+        
+        # Update statistics
+        self.stats['draw_calls'] += len(groups)
+        self.stats['triangles'] += int(commands['count'].sum()) // 3
+        
+        # The slots can be rewritten once these draws have run
+        self._object_ring.fence(slot)
+        self._command_ring.fence(slot)
         
         # Unbind the G-buffer
         glBindFramebuffer(GL_FRAMEBUFFER, 0)
         
         # Restore OpenGL state
+        glDisable(GL_FRAMEBUFFER_SRGB)
         glDisable(GL_CULL_FACE)
         glDisable(GL_DEPTH_TEST)
     
-    def render_scene(self, scene, camera, shadow_maps=None):
-        """Render the entire scene using the HDR pipeline.
+    def render_scene_deferred(self, scene, camera, shadow_maps=None):
+        """Render the entire scene using the deferred HDR pipeline.
         
         This is the main rendering function that coordinates all the render passes:
         1. Geometry pass: Render scene geometry into G-buffer
@@ -1364,10 +3077,13 @@ class HDRRenderer:
         # Start timing the frame
         frame_start_time = time.time()
         
-        # Reset statistics
+        # Reset statistics; the lighting pass sets lights_processed
         self.stats['draw_calls'] = 0
         self.stats['triangles'] = 0
-        self.stats['lights_processed'] = 0
+        self.frame_count += 1
+        
+        # Advance to the next slot of the per-object ring
+        self._frame_idx = (self._frame_idx + 1) % OBJECT_RING_FRAMES
         
         # Update camera matrices
         camera.update()
@@ -1389,8 +3105,8 @@ class HDRRenderer:
         # Update frame time
         self.stats['frame_time'] = (time.time() - frame_start_time) * 1000  # in ms
         
-        # Print debug info (can be toggled)
-        if hasattr(self, 'debug') and self.debug:
+        # Print debug info (opt-in, throttled so stdout is not flushed every frame)
+        if self.debug['print_stats'] and self.frame_count % self.STATS_PRINT_INTERVAL == 0:
             self._print_debug_info()
     
     def _print_debug_info(self):
@@ -1400,204 +3116,241 @@ class HDRRenderer:
               f"Triangles: {self.stats['triangles']} | "
               f"Lights: {self.stats['lights_processed']}", end='\r')
     
-    def cleanup(self):
-        """Clean up OpenGL resources."""
-        # Clean up shaders
-        for shader in self.shaders.values():
-            if hasattr(shader, 'delete'):
-                shader.delete()
-        
-        # Clean up framebuffers
-        if hasattr(self, 'g_buffer'):
-            glDeleteFramebuffers(1, [self.g_buffer['fbo']])
-            glDeleteTextures(list(self.g_buffer['textures'].values()))
-            glDeleteRenderbuffers(1, [self.g_buffer['rbo']])
-        
-        if hasattr(self, 'hdr_fbo'):
-            glDeleteFramebuffers(1, [self.hdr_fbo['fbo']])
-            glDeleteTextures([self.hdr_fbo['color_buffer']])
-            glDeleteRenderbuffers(1, [self.hdr_fbo['rbo']])
-        
-        if hasattr(self, 'bloom_fbo'):
-            glDeleteFramebuffers(2, self.bloom_fbo['pingpong_fbos'])
-            glDeleteTextures(self.bloom_fbo['pingpong_buffers'])
-        
-        # Clean up VAOs and VBOs
-        if hasattr(self, 'quad_vao'):
-            glDeleteVertexArrays(1, [self.quad_vao])
-        
-        # Clean up other OpenGL resources
-        glBindFramebuffer(GL_FRAMEBUFFER, 0)
-        glUseProgram(0)
-    
     def _render_lighting_pass(self, scene, camera, shadow_maps=None):
         """Render the lighting pass using the G-buffer.
         
         This pass calculates direct and indirect lighting using the G-buffer data
-        and applies it to the scene.
+        and applies it to the scene. Lights are binned into CLUSTER_GRID view
+        clusters on the CPU and one fullscreen draw shades each pixel with only
+        the lights of its cluster, so no per-light blending is needed.
         
         Args:
             scene: The scene containing lights and objects
             camera: The camera to render from
             shadow_maps: Optional dictionary of shadow maps from shadow pass
         """
-        # Bind the HDR framebuffer and clear it
-        glBindFramebuffer(GL_FRAMEBUFFER, self.hdr_fbo['fbo'])
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        
-        # Enable additive blending for multiple lights
-        glEnable(GL_BLEND)
-        glBlendEquation(GL_FUNC_ADD)
-        glBlendFunc(GL_ONE, GL_ONE)
-        
-        # Use the lighting shader
-        shader = self.shaders['lighting']
+        # Light into the first ping-pong target and clear it
+        self._pingpong_read = 0
+        glBindFramebuffer(GL_FRAMEBUFFER, self.pingpong[0]['fbo'])
+        glClear(GL_COLOR_BUFFER_BIT)
+        
+        # Visible lights write their rows; culled ones keep stale rows nothing indexes
+        frustum = getattr(camera, 'frustum', None)
+        lights = [light for light in self._active_lights(scene) if light.update(self.frame_count, frustum)]
+        for light in lights:
+            # IES profiles go into IES_ATLAS on first use, so the row gets its layer
+            if light.ies_profile is not None:
+                light.ies_profile.to_texture(self.ctx)
+            light.get_light_data()
+        
+        # The directional shadow map, if any, is u_ShadowMaps[0] for the first caster
+        caster = None
+        if shadow_maps and 'directional' in shadow_maps:
+            caster = next((light for light in lights if light.casts_shadows
+                           and light.light_type == LightType.DIRECTIONAL), None)
+            if caster is not None:
+                LIGHT_POOL.buf['shadow_map_index'][caster.light_index] = 0
+        
+        # Use the lighting shader specialized for this frame's lights
+        spot_lights = any(light.light_type == LightType.SPOT for light in lights)
+        shader = self._lighting_program(caster is not None, spot_lights)
         shader.use()
         
-        # Set G-buffer textures
-        glActiveTexture(GL_TEXTURE0)
-        glBindTexture(GL_TEXTURE_2D, self.g_buffer['textures']['gPosition'])
-        shader.set_int('gPosition', 0)
-        
-        glActiveTexture(GL_TEXTURE1)
-        glBindTexture(GL_TEXTURE_2D, self.g_buffer['textures']['gNormal'])
+        # Set G-buffer textures with one multi-bind; world positions come from depth
+        gbuffer = self.g_buffer['textures']
+        glBindTextures(0, 3, [gbuffer['gDepth'], gbuffer['gNormal'], gbuffer['gAlbedoSpec']])
+        shader.set_int('gDepth', 0)
         shader.set_int('gNormal', 1)
-        
-        glActiveTexture(GL_TEXTURE2)
-        glBindTexture(GL_TEXTURE_2D, self.g_buffer['textures']['gAlbedoSpec'])
         shader.set_int('gAlbedoSpec', 2)
-        
-        glActiveTexture(GL_TEXTURE3)
-        glBindTexture(GL_TEXTURE_2D, self.g_buffer['textures']['gMetallicRoughnessAO'])
-        shader.set_int('gMetallicRoughnessAO', 3)
+        shader.set_mat4('u_InvViewProjection',
+                        glm.inverse(camera.get_projection_matrix() * camera.get_view_matrix()))
         
         # Set camera position
-        shader.set_vec3('viewPos', camera.position)
+        shader.set_vec3('u_ViewPos', camera.position)
         
-        # Set shadow map if available
-        if shadow_maps and 'directional' in shadow_maps:
-            glActiveTexture(GL_TEXTURE4)
-            glBindTexture(GL_TEXTURE_2D, shadow_maps['directional'])
-            shader.set_int('shadowMap', 4)
-            shader.set_bool('useShadows', True)
-            
-            # Set shadow matrix if available
+        if caster is not None:
+            self._set_sampler(shader, 'u_ShadowMaps[0]', shadow_maps['directional'], SHADOW_MAP_BINDING)
             if 'shadow_matrix' in shadow_maps:
-                shader.set_mat4('lightSpaceMatrix', shadow_maps['shadow_matrix'])
-        else:
-            shader.set_bool('useShadows', False)
+                shader.set_mat4('u_LightSpaceMatrices[0]', shadow_maps['shadow_matrix'])
+            shader.set_int('u_NumShadowMaps', 1)
         
         # Set IBL maps if available
         if hasattr(self, 'irradiance_map') and hasattr(self, 'prefilter_map') and hasattr(self, 'brdf_lut'):
-            glActiveTexture(GL_TEXTURE5)
-            glBindTexture(GL_TEXTURE_CUBE_MAP, self.irradiance_map)
+            # Multi-bind picks each texture's own target (cube maps and the 2D LUT)
+            glBindTextures(5, 3, [self.irradiance_map, self.prefilter_map, self.brdf_lut])
             shader.set_int('irradianceMap', 5)
-            
-            glActiveTexture(GL_TEXTURE6)
-            glBindTexture(GL_TEXTURE_CUBE_MAP, self.prefilter_map)
             shader.set_int('prefilterMap', 6)
-            
-            glActiveTexture(GL_TEXTURE7)
-            glBindTexture(GL_TEXTURE_2D, self.brdf_lut)
             shader.set_int('brdfLUT', 7)
             
             shader.set_bool('useIBL', True)
         else:
             shader.set_bool('useIBL', False)
         
-        # Render lights
-        for i, light in enumerate(scene.get_lights()):
-            # Skip disabled lights
-            if not light.enabled:
-                continue
-                
-            # Set light properties based on type
-            if light.type == LightType.DIRECTIONAL:
-                shader.set_int('light.type', 0)
-                shader.set_vec3('light.direction', light.direction)
-            elif light.type == LightType.POINT:
-                shader.set_int('light.type', 1)
-                shader.set_vec3('light.position', light.position)
-                shader.set_float('light.constant', light.constant)
-                shader.set_float('light.linear', light.linear)
-                shader.set_float('light.quadratic', light.quadratic)
-            elif light.type == LightType.SPOT:
-                shader.set_int('light.type', 2)
-                shader.set_vec3('light.position', light.position)
-                shader.set_vec3('light.direction', light.direction)
-                shader.set_float('light.cutOff', light.cut_off)
-                shader.set_float('light.outerCutOff', light.outer_cut_off)
-                shader.set_float('light.constant', light.constant)
-                shader.set_float('light.linear', light.linear)
-                shader.set_float('light.quadratic', light.quadratic)
-            
-            # Set common light properties
-            shader.set_vec3('light.color', light.color)
-            shader.set_float('light.intensity', light.intensity)
-            
-            # For area lights
-            if light.type == LightType.AREA:
-                shader.set_vec3('light.position', light.position)
-                shader.set_vec3('light.right', light.right)
-                shader.set_vec3('light.up', light.up)
-                shader.set_float('light.width', light.width)
-                shader.set_float('light.height', light.height)
-            
-            # Render fullscreen quad for each light
-            self._render_quad()
-            
-            # Update statistics
-            self.stats['lights_processed'] += 1
+        # Bin lights into clusters; near and far come back out of the perspective projection
+        projection = np.array(camera.get_projection_matrix(), dtype=np.float32)
+        near = projection[2, 3] / (projection[2, 2] - 1.0)
+        far = projection[2, 3] / (projection[2, 2] + 1.0)
+        slot = self._frame_idx
+        global_count = self._build_light_clusters(lights, camera, projection, near, far, slot)
+        shader.use()
+        shader.set_mat4('u_View', camera.get_view_matrix())
+        glUniform1ui(shader.uniform_location('u_NumGlobalLights'), global_count)
+        slice_scale = CLUSTER_GRID[2] / math.log(far / near)
+        shader.set_vec2('u_ClusterDepthScaleBias', (slice_scale, -math.log(near) * slice_scale))
+        
+        # Height fog reads u_Atmosphere
+        self.atmosphere.bind(self.ctx)
         
-        # Disable blending for next pass
-        glDisable(GL_BLEND)
+        # Point and spot lights with IES profiles sample the atlas
+        IES_ATLAS.use()
         
-        # Unbind textures
-        for i in range(8):
-            glActiveTexture(GL_TEXTURE0 + i)
-            glBindTexture(GL_TEXTURE_2D, 0)
-            glBindTexture(GL_TEXTURE_CUBE_MAP, 0)
+        # Every pixel is shaded once with its cluster's lights
+        self.blitter.blit(program=shader)
+        
+        for ring in (self._light_ring, self._cluster_ring, self._cluster_light_ring):
+            ring.fence(slot)
+        
+        self.stats['lights_processed'] = len(lights)
+        
+        # Unbind textures; a null list clears every target of the units
+        glBindTextures(0, 8, None)
         
         # Unbind framebuffer
         glBindFramebuffer(GL_FRAMEBUFFER, 0)
     
+    def _active_lights(self, scene) -> List[Light]:
+        """Returns the enabled, visible lights of scene.get_lights().
+        
+        LIGHT_POOL tracks each light's flags, so the filtered list is only
+        rebuilt when a flag changes or the scene's lights differ from last
+        frame's. Lights are compared by identity, so replacing an element in
+        place is seen; disabled lights are otherwise never looked at.
+        """
+        lights = scene.get_lights()
+        previous = self._scene_lights
+        if (LIGHT_POOL.version != self._active_lights_version or len(lights) != len(previous)
+                or not all(map(operator.is_, lights, previous))):
+            active = LIGHT_POOL.active
+            self._active_light_list = [light for light in lights if active[light.light_index]]
+            self._scene_lights = tuple(lights)
+            self._active_lights_version = LIGHT_POOL.version
+        return self._active_light_list
+    
+    def _lighting_program(self, shadows: bool, spot_lights: bool) -> ShaderProgram:
+        """Returns the lighting shader specialized for a frame's lights.
+        
+        Shadow sampling and the spot cone falloff are compiled out (SHADOWS,
+        SPOT_LIGHTS) when no light needs them. 'lighting' has both; other
+        variants are compiled on first use and kept in self.shaders.
+        """
+        name = 'lighting' + ('' if shadows else '_no_shadows') + ('' if spot_lights else '_no_spot')
+        shader = self.shaders.get(name)
+        if shader is None:
+            from . import shaders as shader_defs
+            shader = self.shaders[name] = ShaderProgram(
+                vertex_shader=shader_defs.FULLSCREEN_TRIANGLE_VERTEX_SHADER,
+                fragment_shader=shader_defs.LIGHTING_FRAGMENT_SHADER,
+                defines=self._lighting_defines(shadows, spot_lights)
+            )
+        return shader
+    
+    def _lighting_defines(self, shadows: bool, spot_lights: bool) -> Dict[str, Any]:
+        """#defines of a LIGHTING_FRAGMENT_SHADER variant."""
+        return dict(CLUSTER_SHADER_DEFINES, BINDLESS_TEXTURES=self.bindless_textures,
+                    SHADOWS=shadows, SPOT_LIGHTS=spot_lights)
+    
+    def _set_sampler(self, shader: ShaderProgram, name: str, texture: int, unit: int) -> None:
+        """Points a sampler uniform at a texture.
+        
+        With bindless_textures the texture's handle is made resident on first
+        use and written to the uniform, so no texture unit is bound; otherwise
+        the texture is bound to unit, which the shader's layout binding names.
+        """
+        if not self.bindless_textures:
+            glBindTextures(unit, 1, [texture])
+            return
+        handle = self._texture_handles.get(texture)
+        if handle is None:
+            handle = self._texture_handles[texture] = glGetTextureHandleARB(texture)
+            glMakeTextureHandleResidentARB(handle)
+        glProgramUniformHandleui64ARB(shader.program, shader.uniform_location(name), handle)
+    
+    def _build_light_clusters(self, lights: List[Light], camera, projection: np.ndarray,
+                              near: float, far: float, slot: int) -> int:
+        """Fills and binds this frame's light table and cluster light lists.
+        
+        Directional lights lead the index list and are returned as its global
+        count. With gpu_light_clusters the other lights follow as candidates
+        and the 'light_clusters' compute shader bins them, MAX_CLUSTER_LIGHTS
+        per cluster; otherwise _assign_light_clusters bins them on the CPU.
+        """
+        directional = [light.light_index for light in lights if light.light_type == LightType.DIRECTIONAL]
+        local = [light for light in lights if light.light_type != LightType.DIRECTIONAL]
+        slots = np.fromiter((light.light_index for light in local), dtype=np.uint32, count=len(local))
+        global_count = len(directional)
+        
+        if self.gpu_light_clusters:
+            index_count = global_count + len(local) + CLUSTER_COUNT * MAX_CLUSTER_LIGHTS
+        else:
+            view = np.array(camera.get_view_matrix(), dtype=np.float32)
+            positions = np.array([light.position for light in local], dtype=np.float32).reshape(-1, 3)
+            centers = positions @ view[:3, :3].T + view[:3, 3]
+            radii = np.fromiter((light.range for light in local), dtype=np.float32, count=len(local))
+            counts, members = _assign_light_clusters(centers, radii, projection, near, far)
+            index_count = global_count + len(members)
+        
+        # The whole light pool is uploaded so lists can index it by light_index
+        light_data = LIGHT_POOL.data
+        self._light_ring.reserve(len(light_data))
+        self._cluster_light_ring.reserve(index_count)
+        for ring in (self._light_ring, self._cluster_ring, self._cluster_light_ring):
+            ring.wait(slot)
+        self._light_ring.rows[slot, :len(light_data)] = light_data
+        indices = self._cluster_light_ring.rows[slot]
+        indices[:global_count] = directional
+        for binding, ring in ((LIGHT_SSBO_BINDING, self._light_ring),
+                              (CLUSTER_SSBO_BINDING, self._cluster_ring),
+                              (CLUSTER_LIGHTS_SSBO_BINDING, self._cluster_light_ring)):
+            glBindBufferRange(GL_SHADER_STORAGE_BUFFER, binding, ring.buffer,
+                              ring.slot_offset(slot), ring.capacity * ring.dtype.itemsize)
+        
+        if not self.gpu_light_clusters:
+            clusters = self._cluster_ring.rows[slot]
+            clusters['count'] = counts
+            clusters['offset'] = global_count + np.cumsum(counts) - counts
+            indices[global_count:index_count] = slots[members]
+            return global_count
+        
+        indices[global_count:global_count + len(local)] = slots
+        shader = self.shaders['light_clusters']
+        shader.use()
+        shader.set_mat4('u_View', camera.get_view_matrix())
+        shader.set_mat4('u_InverseProjection', glm.inverse(camera.get_projection_matrix()))
+        shader.set_vec2('u_DepthRange', (near, far))
+        glUniform1ui(shader.uniform_location('u_NumGlobalLights'), global_count)
+        glUniform1ui(shader.uniform_location('u_NumCandidates'), len(local))
+        grid_x, grid_y, grid_z = CLUSTER_GRID
+        glDispatchCompute(-(-grid_x // 8), -(-grid_y // 8), -(-grid_z // 4))
+        glMemoryBarrier(GL_SHADER_STORAGE_BARRIER_BIT)
+        return global_count
+    
     def _render_quad(self):
-        """Render a fullscreen quad for post-processing effects."""
+        """Render a fullscreen triangle for post-processing effects.
+        
+        Programs use FULLSCREEN_TRIANGLE_VERTEX_SHADER, which builds the
+        vertices from gl_VertexID, so the VAO has no buffers. One triangle
+        also avoids shading the pixels along a quad's diagonal twice.
+        """
         if not hasattr(self, 'quad_vao'):
-            # Initialize quad VAO if it doesn't exist
-            quad_vertices = np.array([
-                # positions        # texture Coords
-                -1.0,  1.0, 0.0,  0.0, 1.0,
-                -1.0, -1.0, 0.0,  0.0, 0.0,
-                 1.0,  1.0, 0.0,  1.0, 1.0,
-                 1.0, -1.0, 0.0,  1.0, 0.0,
-            ], dtype='f4')
-            
             self.quad_vao = glGenVertexArrays(1)
-            vbo = glGenBuffers(1)
-            
-            glBindVertexArray(self.quad_vao)
-            glBindBuffer(GL_ARRAY_BUFFER, vbo)
-            glBufferData(GL_ARRAY_BUFFER, quad_vertices.nbytes, quad_vertices, GL_STATIC_DRAW)
-            
-            # Position attribute
-            glEnableVertexAttribArray(0)
-            glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 5 * 4, ctypes.c_void_p(0))
-            # Texture coord attribute
-            glEnableVertexAttribArray(1)
-            glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, 5 * 4, ctypes.c_void_p(3 * 4))
-            
-            glBindVertexArray(0)
-        
-        # Render the quad
         glBindVertexArray(self.quad_vao)
-        glDrawArrays(GL_TRIANGLE_STRIP, 0, 4)
+        glDrawArrays(GL_TRIANGLES, 0, 3)
         glBindVertexArray(0)
+    
+    def _init_forward_pipeline(self) -> None:
+        """Create the moderngl forward pipeline's targets, settings and programs."""
         self._create_framebuffers()
-        
-        # Lighting and shadow setup
-        self.lights: List[Light] = []
-        self.ambient_light = (0.03, 0.03, 0.03)
+        self._screen_format_matches_hdr = self._screen_matches_hdr_color()
         
         # Post-processing effects
         self.bloom_enabled = True
@@ -1605,45 +3358,74 @@ class HDRRenderer:
         self.bloom_strength = 1.5
         self.bloom_radius = 4.0
         
+        # Tone mapping exposure
+        self.exposure = HDR_EXPOSURE
+        
         # Atmospheric effects
         self.atmosphere_enabled = True
         self.fog_density = 0.01
         self.fog_color = (0.5, 0.6, 0.7)
         
         # Load shaders
-        self._load_shaders()
+        self._load_forward_shaders()
+    
+    def _create_color_texture(self, alpha: bool = False) -> moderngl.Texture:
+        """Creates a screen-sized color texture at the precision the pipeline needs.
+        
+        Without HDR the values are already tone-mapped, so 8-bit UNORM is
+        enough. HDR targets are packed R11F_G11F_B10F unless they need alpha
+        or force_half is set, in which case they are RGBA16F.
+        """
+        size = (self.width, self.height)
+        if not self.hdr_enabled:
+            texture = self.ctx.texture(size, 4 if alpha else 3, dtype='f1')
+        elif alpha or self.force_half:
+            texture = self.ctx.texture(size, 4, dtype='f2')
+        else:
+            texture = self.ctx.texture(size, 3, dtype='f4', internal_format=GL_R11F_G11F_B10F)
+        texture.filter = (moderngl.LINEAR, moderngl.LINEAR)
+        return texture
     
     def _create_framebuffers(self):
         """Create framebuffers for HDR rendering and post-processing."""
         # Main HDR framebuffer
-        self.hdr_color = self.ctx.texture((self.width, self.height), 4, dtype='f2')
+        self.hdr_color = self._create_color_texture(alpha=True)
         self.depth_buffer = self.ctx.depth_texture((self.width, self.height))
         self.hdr_fbo = self.ctx.framebuffer(
             color_attachments=[self.hdr_color],
             depth_attachment=self.depth_buffer
         )
         
-        # Bloom effect buffers
-        self.bloom_textures = []
-        for i in range(2):
-            tex = self.ctx.texture((self.width, self.height), 4, dtype='f2')
-            tex.filter = (moderngl.LINEAR, moderngl.LINEAR)
-            self.bloom_textures.append(tex)
-        
-        self.bloom_fbo = self.ctx.framebuffer(color_attachments=self.bloom_textures)
-        
-        # Ping-pong framebuffers for blur
-        self.pingpong_fbos = []
-        self.pingpong_textures = []
-        for i in range(2):
-            tex = self.ctx.texture((self.width, self.height), 4, dtype='f2')
+        # Bloom pyramid at 1/2 to 1/64 resolution. The bloom compute shaders
+        # write the levels as r11f_g11f_b10f images, so no framebuffers are needed
+        self.bloom_mips: List[moderngl.Texture] = []
+        for i in range(1, 7):
+            size = (max(1, self.width >> i), max(1, self.height >> i))
+            tex = self.ctx.texture(size, 3, dtype='f4', internal_format=GL_R11F_G11F_B10F)
             tex.filter = (moderngl.LINEAR, moderngl.LINEAR)
-            fbo = self.ctx.framebuffer(color_attachments=[tex])
-            self.pingpong_textures.append(tex)
-            self.pingpong_fbos.append(fbo)
+            tex.repeat_x = tex.repeat_y = False
+            self.bloom_mips.append(tex)
     
-    def _load_shaders(self):
-        """Load and compile shaders."""
+    def _screen_matches_hdr_color(self) -> bool:
+        """Whether the back buffer stores color the way hdr_color does and has depth.
+        
+        When it does and no post-processing reads the scene, render_scene
+        draws straight into the back buffer instead of copying hdr_fbo there.
+        """
+        if self.ctx.screen is None:
+            return False
+        self.ctx.screen.use()
+        component = glGetFramebufferAttachmentParameteriv(
+            GL_FRAMEBUFFER, GL_BACK_LEFT, GL_FRAMEBUFFER_ATTACHMENT_COMPONENT_TYPE)
+        red_bits = glGetFramebufferAttachmentParameteriv(
+            GL_FRAMEBUFFER, GL_BACK_LEFT, GL_FRAMEBUFFER_ATTACHMENT_RED_SIZE)
+        depth_bits = glGetFramebufferAttachmentParameteriv(
+            GL_FRAMEBUFFER, GL_DEPTH, GL_FRAMEBUFFER_ATTACHMENT_DEPTH_SIZE)
+        expected = (GL_FLOAT, 16) if self.hdr_enabled else (GL_UNSIGNED_NORMALIZED, 8)
+        return (component, red_bits) == expected and depth_bits > 0
+    
+    def _load_forward_shaders(self):
+        """Load and compile the forward pipeline's moderngl programs."""
         # Vertex shader for basic rendering
         self.shader_basic = self.ctx.program(
             vertex_shader="""
@@ -1657,12 +3439,16 @@ class HDRRenderer:
             out vec2 TexCoords;
             
             uniform mat4 model;
-            uniform mat4 view;
-            uniform mat4 projection;
+            uniform mat3 normalMatrix;  // transpose(inverse(mat3(model))), computed per frame on the CPU
+            layout (std140) uniform Camera {
+                mat4 view;
+                mat4 projection;
+                vec4 viewPos;
+            };
             
             void main() {
                 FragPos = vec3(model * vec4(aPos, 1.0));
-                Normal = mat3(transpose(inverse(model))) * aNormal;
+                Normal = normalMatrix * aNormal;
                 TexCoords = aTexCoords;
                 gl_Position = projection * view * vec4(FragPos, 1.0);
             }
@@ -1675,7 +3461,11 @@ class HDRRenderer:
             in vec3 Normal;
             in vec2 TexCoords;
             
-            uniform vec3 viewPos;
+            layout (std140) uniform Camera {
+                mat4 view;
+                mat4 projection;
+                vec4 viewPos;
+            };
             uniform vec3 albedo;
             uniform float metallic;
             uniform float roughness;
@@ -1686,11 +3476,34 @@ class HDRRenderer:
             uniform samplerCube prefilterMap;
             uniform sampler2D brdfLUT;
             
-            // Lights
+            // Lights: LIGHT_DTYPE rows, written in one block upload per frame
             #define MAX_LIGHTS 32
-            uniform int numLights;
-            uniform vec3 lightPositions[MAX_LIGHTS];
-            uniform vec3 lightColors[MAX_LIGHTS];
+            struct LightData {
+                vec4 position;  // w = 0 for directional lights
+                vec4 direction;
+                vec4 color;
+                vec4 attenuation;
+                vec4 area_size;
+                int type;
+                int shadow_map_index;
+                int ies_texture_index;
+                float volumetric;
+                float intensity;
+                float range;
+                float inner_angle;
+                float outer_angle;
+                float shadow_bias;
+                float shadow_normal_bias;
+                float shadow_softness;
+                float volumetric_intensity;
+            };
+            layout (std140) uniform Lights {
+                LightData lights[MAX_LIGHTS];
+            };
+            layout (std140) uniform Scene {
+                vec4 ambientLight;
+                int numLights;
+            };
             
             const float PI = 3.14159265359;
             
@@ -1699,7 +3512,7 @@ class HDRRenderer:
             void main() {
                 // PBR shading calculations
                 vec3 N = normalize(Normal);
-                vec3 V = normalize(viewPos - FragPos);
+                vec3 V = normalize(viewPos.xyz - FragPos);
                 
                 // Calculate reflectance at normal incidence
                 vec3 F0 = vec3(0.04);
@@ -1708,71 +3521,81 @@ class HDRRenderer:
                 // Reflectance equation
                 vec3 Lo = vec3(0.0);
                 
-                // Calculate per-light radiance
+                // Calculate per-light radiance (diffuse only until the PBR functions land)
                 for(int i = 0; i < numLights; i++) {
-                    // Calculate per-light radiance
-                    // ...
+                    vec3 L = lights[i].position.w == 0.0 ? -lights[i].direction.xyz
+                                                         : lights[i].position.xyz - FragPos;
+                    float distance = lights[i].position.w == 0.0 ? 0.0 : length(L);
+                    L = normalize(L);
+                    float attenuation = 1.0 / dot(lights[i].attenuation.xyz,
+                                                  vec3(1.0, distance, distance * distance));
+                    vec3 radiance = lights[i].color.rgb * lights[i].intensity * attenuation;
+                    vec3 kD = (vec3(1.0) - F0) * (1.0 - metallic);
+                    Lo += kD * albedo / PI * radiance * max(dot(N, L), 0.0);
                 }
                 
                 // Add ambient IBL
-                vec3 ambient = vec3(0.03) * albedo * ao;
+                vec3 ambient = ambientLight.rgb * albedo * ao;
                 
+                // Linear HDR; shader_composite tone maps after bloom
                 vec3 color = ambient + Lo;
                 
-                // HDR tone mapping
-                color = color / (color + vec3(1.0));
-                // Gamma correction
-                color = pow(color, vec3(1.0/2.2));
-                
                 FragColor = vec4(color, 1.0);
             }
             """
         )
         
-        # Post-processing shaders
-        self.shader_bloom = self.ctx.program(
-            vertex_shader="""
-            #version 330 core
-            layout (location = 0) in vec2 aPos;
-            layout (location = 1) in vec2 aTexCoords;
-            
-            out vec2 TexCoords;
-            
-            void main() {
-                gl_Position = vec4(aPos, 0.0, 1.0);
-                TexCoords = aTexCoords;
-            }
-            """,
-            fragment_shader="""
-            #version 330 core
+        # Per-frame data for shader_basic's uniform blocks, filled once per frame in
+        # render_scene; the matrices are transposed into reused buffers, which is
+        # column-major for GL. Each buffer keeps its binding point for the whole run
+        self.light_ubo = self.ctx.buffer(reserve=32 * LIGHT_DTYPE.itemsize)
+        self.shader_basic['Lights'].binding = 0
+        self.light_ubo.bind_to_uniform_block(0)
+        self._light_rows = np.zeros(32, dtype=LIGHT_DTYPE)
+        self._camera_block = np.zeros(1, dtype=[
+            ('view', 'f4', (4, 4)), ('projection', 'f4', (4, 4)), ('view_pos', 'f4', 4)])
+        self.camera_ubo = self.ctx.buffer(reserve=self._camera_block.nbytes)
+        self.shader_basic['Camera'].binding = 1
+        self.camera_ubo.bind_to_uniform_block(1)
+        self._scene_block = np.zeros(1, dtype=[('ambient', 'f4', 4), ('num_lights', 'i4'), ('_pad', 'i4', 3)])
+        self.scene_ubo = self.ctx.buffer(reserve=self._scene_block.nbytes)
+        self.shader_basic['Scene'].binding = 2
+        self.scene_ubo.bind_to_uniform_block(2)
+        
+        # Bloom pyramid passes; the first downsample also thresholds
+        from . import shaders as shader_defs
+        self.shader_bloom_first_pass = self.ctx.compute_shader(with_defines(
+            shader_defs.BLOOM_DOWNSAMPLE_COMPUTE_SHADER, {'BLOOM_FIRST_PASS': True}))
+        self.shader_bloom_downsample = self.ctx.compute_shader(shader_defs.BLOOM_DOWNSAMPLE_COMPUTE_SHADER)
+        self.shader_bloom_upsample = self.ctx.compute_shader(shader_defs.BLOOM_UPSAMPLE_COMPUTE_SHADER)
+        self._bloom_params = np.zeros(1, dtype=BLOOM_PARAMS_DTYPE)
+        self.bloom_ubo = self.ctx.buffer(reserve=BLOOM_PARAMS_DTYPE.itemsize)
+        
+        # Final composite: scene plus bloom, tone mapped and gamma-corrected in one pass
+        self.shader_composite = self.ctx.program(
+            vertex_shader=FULLSCREEN_TRIANGLE_VERTEX_SHADER,
+            fragment_shader="""#version 460 core
+            in vec2 v_TexCoords;
             out vec4 FragColor;
             
-            in vec2 TexCoords;
-            
-            uniform sampler2D image;
-            uniform bool horizontal;
-            uniform float weight[5] = float[] (0.227027, 0.1945946, 0.1216216, 0.054054, 0.016216);
-            
+            uniform sampler2D uHDR;
+            uniform sampler2D uBloom;
+            uniform float uBloomStrength;
+            uniform float uExposure;
+            uniform bool uToneMap;
+            """ + shader_defs.ACES_FUNCTIONS + shader_defs.GAMMA_FUNCTIONS + """
             void main() {
-                vec2 tex_offset = 1.0 / textureSize(image, 0);
-                vec3 result = texture(image, TexCoords).rgb * weight[0];
-                
-                if(horizontal) {
-                    for(int i = 1; i < 5; ++i) {
-                        result += texture(image, TexCoords + vec2(tex_offset.x * i, 0.0)).rgb * weight[i];
-                        result += texture(image, TexCoords - vec2(tex_offset.x * i, 0.0)).rgb * weight[i];
-                    }
-                } else {
-                    for(int i = 1; i < 5; ++i) {
-                        result += texture(image, TexCoords + vec2(0.0, tex_offset.y * i)).rgb * weight[i];
-                        result += texture(image, TexCoords - vec2(0.0, tex_offset.y * i)).rgb * weight[i];
-                    }
+                vec3 color = texture(uHDR, v_TexCoords).rgb + uBloomStrength * texture(uBloom, v_TexCoords).rgb;
+                if (uToneMap) {
+                    color = GammaEncode(ACESFitted(color * uExposure));
                 }
-                
-                FragColor = vec4(result, 1.0);
+                FragColor = vec4(color, 1.0);
             }
             """
         )
+        self.shader_composite['uHDR'] = 0
+        self.shader_composite['uBloom'] = 1
+        self._composite_vao = self.ctx.vertex_array(self.shader_composite, [])
     
     def add_light(self, light: Light) -> None:
         """Add a light source to the scene."""
@@ -1785,31 +3608,96 @@ class HDRRenderer:
     
     def render_scene(self, scene, camera) -> None:
         """Render the entire scene with HDR and post-processing effects."""
-        # Bind HDR framebuffer
-        self.hdr_fbo.use()
+        # Start timing the frame
+        frame_start_time = time.time()
+        self.frame_count += 1
+        
+        # Without bloom or tone mapping there is no composite pass, so when the back
+        # buffer has hdr_color's format the intermediate target and its copy are skipped
+        direct = (self._screen_format_matches_hdr and not self.bloom_enabled
+                  and not self.tone_mapping_enabled)
+        target = self.ctx.screen if direct else self.hdr_fbo
+        target.use()
         self.ctx.clear(0.0, 0.0, 0.0, 1.0)
         
-        # Set up camera matrices
-        view = camera.get_view_matrix()
-        projection = camera.get_projection_matrix()
-        
-        # Render all objects in the scene
-        for obj in scene.objects:
-            self._render_object(obj, view, projection)
+        self._begin_frame(camera)
+        
+        # Model and normal matrices for every object in one batch; the column-major
+        # normal matrix transpose(inverse(mat3(model))) is inverse(mat3(model)) in row-major
+        objects = scene.objects
+        count = len(objects)
+        if count:
+            if count > len(self._model_rows):
+                self._model_scratch = np.empty((2 * count, 4, 4), dtype=np.float32)
+                self._model_rows = np.empty_like(self._model_scratch)
+            matrices = self._model_scratch[:count]
+            np.stack([obj.transform.get_matrix() for obj in objects], out=matrices)
+            normal_matrices = np.linalg.inv(matrices[:, :3, :3])
+            models = self._model_rows[:count]
+            np.copyto(models, matrices.transpose(0, 2, 1))
+            
+            # Render all objects in the scene
+            for obj, model, normal_matrix in zip(objects, models, normal_matrices):
+                self._render_object(obj, model, normal_matrix)
+        self.stats['draw_calls'] = count
+        
+        if not direct:
+            # Apply post-processing effects
+            self._apply_post_processing()
+            
+            # Bloom, tone mapping and gamma in one pass into the back buffer
+            self.ctx.screen.use()
+            self.hdr_color.use(0)
+            self.bloom_mips[0].use(1)
+            self.shader_composite['uBloomStrength'] = self.bloom_strength if self.bloom_enabled else 0.0
+            self.shader_composite['uExposure'] = self.exposure
+            self.shader_composite['uToneMap'] = self.tone_mapping_enabled
+            self._composite_vao.render(moderngl.TRIANGLES, vertices=3)
         
-        # Apply post-processing effects
-        self._apply_post_processing()
+        # Update frame time
+        self.stats['frame_time'] = (time.time() - frame_start_time) * 1000  # in ms
         
-        # Blit to default framebuffer
-        self.ctx.screen.use()
-        self.ctx.copy_framebuffer(self.hdr_fbo, self.ctx.screen)
+        # Print debug info (opt-in, throttled so stdout is not flushed every frame)
+        if self.debug['print_stats'] and self.frame_count % self.STATS_PRINT_INTERVAL == 0:
+            self._print_debug_info()
     
-    def _render_object(self, obj, view, projection):
-        """Render a single object with PBR materials."""
+    def _begin_frame(self, camera) -> None:
+        """Upload the per-frame Camera, Lights and Scene blocks.
+        
+        Everything shared by all draws (matrices, viewPos, light rows, light
+        count and ambient) is written here once, leaving _render_object only
+        the model matrices and material.
+        """
+        block = self._camera_block
+        np.copyto(block['view'][0], camera.get_view_matrix().T)
+        np.copyto(block['projection'][0], camera.get_projection_matrix().T)
+        block['view_pos'][0, :3] = camera.position
+        self.camera_ubo.write(block)
+        
+        # Every light's row goes up in a single buffer write
+        lights = self.lights[:32]
+        if lights:
+            for light in lights:
+                light.get_light_data()
+            rows = self._light_rows[:len(lights)]
+            np.take(LIGHT_POOL.buf, [light.light_index for light in lights], out=rows)
+            self.light_ubo.write(rows)
+        
+        scene_block = self._scene_block
+        scene_block['ambient'][0, :3] = self.ambient_light
+        scene_block['num_lights'] = len(lights)
+        self.stats['lights_processed'] = len(lights)
+        self.scene_ubo.write(scene_block)
+    
+    def _render_object(self, obj, model, normal_matrix):
+        """Render a single object with PBR materials.
+        
+        model and normal_matrix are contiguous float32 rows of the per-frame
+        batch, already in column-major order, so they are written without copies.
+        """
         # Set up shader uniforms
-        self.shader_basic['model'].write(obj.transform.get_matrix().T.astype('f4').tobytes())
-        self.shader_basic['view'].write(view.T.astype('f4').tobytes())
-        self.shader_basic['projection'].write(projection.T.astype('f4').tobytes())
+        self.shader_basic['model'].write(model)
+        self.shader_basic['normalMatrix'].write(normal_matrix)
         
         # Set material properties
         material = obj.material
@@ -1822,25 +3710,40 @@ class HDRRenderer:
         obj.mesh.render(self.shader_basic)
     
     def _apply_bloom(self):
-        """Apply bloom effect to the rendered scene."""
+        """Apply bloom effect to the rendered scene.
+        
+        The scene is downsampled through bloom_mips (13 taps, thresholded on
+        the first pass), then each level is tent-upsampled and added into the
+        one above, leaving the result in bloom_mips[0] for shader_composite.
+        Every level has a quarter of the pixels of the previous one, so the
+        pyramid costs about a third more than one pass over its first level.
+        """
         if not self.bloom_enabled:
             return
-            
-        # Extract bright areas
-        self.bloom_fbo.use()
-        # ... bloom extraction shader ...
-        
-        # Blur bright areas
-        horizontal = True
-        for i in range(10):  # Number of blur passes
-            self.pingpong_fbos[horizontal].use()
-            self.shader_bloom['horizontal'].value = horizontal
-            # ... render quad with blur shader ...
-            horizontal = not horizontal
-        
-        # Combine with original
-        self.ctx.screen.use()
-        # ... combine shader ...
+        
+        _pack_bloom_params(self._bloom_params, self.bloom_threshold, 0.1, self.bloom_spread)
+        self.bloom_ubo.write(self._bloom_params)
+        self.bloom_ubo.bind_to_uniform_block(BLOOM_UBO_BINDING)
+        
+        # Downsample: scene -> mip 0 -> ... -> last mip
+        source = self.hdr_color
+        for level, mip in enumerate(self.bloom_mips):
+            shader = self.shader_bloom_first_pass if level == 0 else self.shader_bloom_downsample
+            shader['u_SourceLevel'] = 0
+            source.use(0)
+            mip.bind_to_image(1, read=False, write=True, format=GL_R11F_G11F_B10F)
+            shader.run(-(-mip.width // 16), -(-mip.height // 16))
+            self.ctx.memory_barrier()
+            source = mip
+        
+        # Upsample: add each level into the one above it
+        shader = self.shader_bloom_upsample
+        shader['u_SourceLevel'] = 0
+        for source, target in zip(self.bloom_mips[:0:-1], self.bloom_mips[-2::-1]):
+            source.use(0)
+            target.bind_to_image(1, read=True, write=True, format=GL_R11F_G11F_B10F)
+            shader.run(-(-source.width // 16), -(-source.height // 16))
+            self.ctx.memory_barrier()
     
     def _apply_post_processing(self):
         """Apply all post-processing effects."""
@@ -1848,11 +3751,59 @@ class HDRRenderer:
         # ... other post-processing effects ...
     
     def cleanup(self):
-        """Clean up resources."""
+        """Clean up OpenGL resources."""
+        # Clean up shaders
+        for shader in self.shaders.values():
+            if hasattr(shader, 'delete'):
+                shader.delete()
+        for program in self._program_cache.values():
+            program.delete()
+        self._program_cache.clear()
+        
+        # Clean up framebuffers
+        if hasattr(self, 'g_buffer'):
+            glDeleteFramebuffers(1, [self.g_buffer['fbo']])
+            glDeleteTextures(list(self.g_buffer['textures'].values()))
+        
+        if hasattr(self, 'pingpong'):
+            glDeleteFramebuffers(2, [target['fbo'] for target in self.pingpong])
+            glDeleteTextures([target['color_buffer'] for target in self.pingpong])
+        
+        if hasattr(self, 'bloom'):
+            glDeleteTextures([self.bloom['texture']])
+            glDeleteBuffers(1, [self.bloom['params_ubo']])
+        
+        if getattr(self, '_object_ring', None) is not None:
+            glFinish()
+            self._object_ring.release()
+            self._command_ring.release()
+            self._light_ring.release()
+            self._cluster_ring.release()
+            self._cluster_light_ring.release()
+        
+        for handle in getattr(self, '_texture_handles', {}).values():
+            glMakeTextureHandleNonResidentARB(handle)
+        
+        if hasattr(self, 'blitter'):
+            self.blitter.delete()
+        
+        # Clean up VAOs and VBOs
+        if hasattr(self, 'quad_vao'):
+            glDeleteVertexArrays(1, [self.quad_vao])
+        MESH_POOL.release()
+        
+        # Clean up other OpenGL resources
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glUseProgram(0)
+        
+        # Clean up the forward pipeline
         self.hdr_fbo.release()
-        self.bloom_fbo.release()
-        for fbo in self.pingpong_fbos:
-            fbo.release()
+        self.light_ubo.release()
+        self.camera_ubo.release()
+        self.scene_ubo.release()
+        self.bloom_ubo.release()
+        for tex in self.bloom_mips:
+            tex.release()
         self.ctx.release()
 
 # Example usage:
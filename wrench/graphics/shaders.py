@@ -4,206 +4,463 @@ Shader definitions for the Wrench HDR renderer.
 This module contains all shader code used by the HDR renderer,
 including PBR materials, lighting, post-processing, and effects.
 """
+from typing import Any, Dict, Optional
+
+def with_defines(source: str, defines: Optional[Dict[str, Any]] = None) -> str:
+    """Returns source with a #define line per entry inserted after #version.
+    
+    True defines a bare flag, False and None leave the name undefined, and
+    any other value is written after the name. Baking per-configuration
+    constants in lets the driver fold them and drop dead branches.
+    """
+    if not defines:
+        return source
+    lines = []
+    for name, value in defines.items():
+        if value is True:
+            lines.append(f"#define {name}")
+        elif value is not False and value is not None:
+            lines.append(f"#define {name} {value!r}" if isinstance(value, float) else f"#define {name} {value}")
+    version, newline, body = source.partition('\n')
+    if not version.startswith('#version'):
+        return '\n'.join(lines) + '\n' + source
+    return version + newline + '\n'.join(lines) + '\n' + body
 
 # =============================================================================
 # PBR Shaders
 # =============================================================================
 
+# Per-object transforms written once per frame by HDRRenderer._render_geometry_pass
+# (see OBJECT_DTYPE). Objects are drawn with glMultiDrawElementsIndirect and each
+# command's base instance is its row, so vertex shaders read objects[gl_BaseInstance]
+# and pass the per-object values on as flat varyings. Bit i of texture_mask is set when
+# texture unit i (albedo, normal, metallic, roughness, ao) holds a map.
+OBJECT_TABLE_BLOCK = """
+struct ObjectData {
+    mat4 model;
+    mat3 normal_matrix;
+    uint material_id;
+    uint texture_mask;
+};
+
+layout (std430, binding = 3) readonly buffer ObjectTable {
+    ObjectData objects[];
+};
+"""
+
+# Material table filled by MaterialTable.upload (see MATERIAL_DTYPE), indexed by material id
+MATERIAL_TABLE_BLOCK = """
+struct MaterialData {
+    vec3 albedo;
+    float metallic;
+    vec3 emission;
+    float emission_strength;
+    vec3 subsurface_color;
+    float subsurface;
+    vec3 subsurface_radius;
+    float subsurface_ior;
+    vec2 uv_scale;
+    vec2 uv_offset;
+    float roughness;
+    float ao;
+    float subsurface_anisotropy;
+    float clearcoat;
+    float clearcoat_roughness;
+    float sheen;
+    float sheen_tint;
+    float sheen_roughness;
+    float anisotropic;
+    float anisotropic_rotation;
+    float transmission;
+    float ior;
+    float thickness;
+    float displacement_strength;
+    float displacement_midlevel;
+    float detail_scale;
+    float alpha_cutoff;
+};
+
+layout (std430, binding = 1) readonly buffer MaterialTable {
+    MaterialData materials[];
+};
+"""
+
 PBR_VERTEX_SHADER = """#version 460 core
 layout (location = 0) in vec3 a_Position;
 layout (location = 1) in vec3 a_Normal;
 layout (location = 2) in vec2 a_TexCoords;
 layout (location = 3) in vec3 a_Tangent;
 layout (location = 4) in vec3 a_Bitangent;
-
+""" + OBJECT_TABLE_BLOCK + """
 // Outputs to fragment shader
 out vec3 v_FragPos;
 out vec2 v_TexCoords;
 out vec3 v_Normal;
 out mat3 v_TBN;
+flat out uint v_MaterialId;
+flat out uint v_TextureMask;
 
-// Uniforms
-uniform mat4 u_Model;
+// Per-frame uniforms; transforms come from the object table
 uniform mat4 u_View;
 uniform mat4 u_Projection;
-uniform mat3 u_NormalMatrix;
 
 void main() {
+    ObjectData obj = objects[gl_BaseInstance];
+    
     // Calculate vertex position in world space
-    vec4 worldPos = u_Model * vec4(a_Position, 1.0);
+    vec4 worldPos = obj.model * vec4(a_Position, 1.0);
     v_FragPos = worldPos.xyz;
     
     // Pass texture coordinates
     v_TexCoords = a_TexCoords;
     
     // Transform normal to world space
-    v_Normal = normalize(u_NormalMatrix * a_Normal);
+    v_Normal = normalize(obj.normal_matrix * a_Normal);
     
     // Calculate TBN matrix for normal mapping
-    vec3 T = normalize(u_NormalMatrix * a_Tangent);
-    vec3 B = normalize(u_NormalMatrix * a_Bitangent);
+    vec3 T = normalize(obj.normal_matrix * a_Tangent);
+    vec3 B = normalize(obj.normal_matrix * a_Bitangent);
     vec3 N = v_Normal;
     v_TBN = mat3(T, B, N);
     
+    v_MaterialId = obj.material_id;
+    v_TextureMask = obj.texture_mask;
+    
     // Final vertex position
     gl_Position = u_Projection * u_View * worldPos;
 }
 """
 
+# Octahedral unit-normal encoding for the two-channel RG16 gNormal target
+OCTAHEDRAL_NORMALS = """
+vec2 OctWrap(vec2 v) {
+    return (1.0 - abs(v.yx)) * vec2(v.x >= 0.0 ? 1.0 : -1.0, v.y >= 0.0 ? 1.0 : -1.0);
+}
+
+// Unit vector -> [0, 1]^2
+vec2 OctEncode(vec3 n) {
+    n /= abs(n.x) + abs(n.y) + abs(n.z);
+    n.xy = n.z >= 0.0 ? n.xy : OctWrap(n.xy);
+    return n.xy * 0.5 + 0.5;
+}
+
+// [0, 1]^2 -> unit vector
+vec3 OctDecode(vec2 f) {
+    f = f * 2.0 - 1.0;
+    vec3 n = vec3(f, 1.0 - abs(f.x) - abs(f.y));
+    float t = clamp(-n.z, 0.0, 1.0);
+    n.xy += vec2(n.x >= 0.0 ? -t : t, n.y >= 0.0 ? -t : t);
+    return normalize(n);
+}
+"""
+
 PBR_FRAGMENT_SHADER = """#version 460 core
 // Inputs from vertex shader
 in vec3 v_FragPos;
 in vec2 v_TexCoords;
 in vec3 v_Normal;
 in mat3 v_TBN;
-
-// Outputs
-layout (location = 0) out vec4 gPosition;
-layout (location = 1) out vec4 gNormal;
-layout (location = 2) out vec4 gAlbedoSpec;
-
-// Material properties
-struct Material {
-    // Base color
+flat in uint v_MaterialId;  // Row in materials[]
+flat in uint v_TextureMask;  // Bit i set when texture unit i holds a map
+
+// Outputs; position is reconstructed from the depth buffer (DEPTH_RECONSTRUCTION)
+layout (location = 0) out vec2 gNormal;  // Octahedral (OCTAHEDRAL_NORMALS)
+layout (location = 1) out vec4 gAlbedoSpec;  // Linear albedo, stored as sRGB
+""" + MATERIAL_TABLE_BLOCK + """
+// Material maps, bound to units 0-4 by the geometry pass; parameters come from materials[]
+struct MaterialMaps {
     sampler2D albedoMap;
-    vec4 albedoColor;
-    
-    // Normal map
     sampler2D normalMap;
-    float normalStrength;
-    
-    // PBR maps
     sampler2D metallicMap;
     sampler2D roughnessMap;
     sampler2D aoMap;
-    
-    // Material properties
-    float metallic;
-    float roughness;
-    float ao;
-    
-    // Emissive
-    sampler2D emissiveMap;
-    vec3 emissiveColor;
-    float emissiveIntensity;
-    
-    // Clearcoat
-    float clearcoat;
-    float clearcoatRoughness;
-    
-    // Subsurface scattering
-    float subsurface;
-    vec3 subsurfaceColor;
-    
-    // Sheen
-    float sheen;
-    vec3 sheenTint;
-    
-    // Anisotropy
-    float anisotropy;
-    float anisotropyRotation;
-    
-    // IOR
-    float ior;
-    
-    // Transmission
-    float transmission;
-    
-    // Alpha
-    float alpha;
-    float alphaCutoff;
-    
-    // UV tiling and offset
-    vec2 uvScale;
-    vec2 uvOffset;
 };
 
 // Uniforms
-uniform Material u_Material;
+uniform MaterialMaps u_Material;
 uniform vec3 u_ViewPos;
+""" + OCTAHEDRAL_NORMALS + """
 
 void main() {
+    MaterialData material = materials[v_MaterialId];
+    
     // Apply UV scaling and offset
-    vec2 texCoords = v_TexCoords * u_Material.uvScale + u_Material.uvOffset;
+    vec2 texCoords = v_TexCoords * material.uv_scale + material.uv_offset;
     
-    // Sample textures
-    vec4 albedo = texture(u_Material.albedoMap, texCoords) * u_Material.albedoColor;
+    // Sample textures; units without a map are unbound, so their bit gates the fetch
+    vec4 albedo = vec4(material.albedo, 1.0);
+    if ((v_TextureMask & 1u) != 0u) {
+        albedo *= texture(u_Material.albedoMap, texCoords);
+    }
     
     // Alpha testing
-    if (albedo.a < u_Material.alphaCutoff) {
+    if (albedo.a < material.alpha_cutoff) {
         discard;
     }
     
     // Sample and decode normal from normal map
     vec3 normal = v_Normal;
-    if (u_Material.normalStrength > 0.0) {
+    if ((v_TextureMask & 2u) != 0u) {
         normal = texture(u_Material.normalMap, texCoords).rgb;
         normal = normalize(normal * 2.0 - 1.0);
         normal = normalize(v_TBN * normal);
-        normal = mix(v_Normal, normal, u_Material.normalStrength);
     }
     
     // Sample PBR maps
-    float metallic = texture(u_Material.metallicMap, texCoords).r * u_Material.metallic;
-    float roughness = texture(u_Material.roughnessMap, texCoords).r * u_Material.roughness;
-    float ao = texture(u_Material.aoMap, texCoords).r * u_Material.ao;
+    float metallic = material.metallic;
+    float roughness = material.roughness;
+    float ao = material.ao;
+    if ((v_TextureMask & 4u) != 0u) {
+        metallic *= texture(u_Material.metallicMap, texCoords).r;
+    }
+    if ((v_TextureMask & 8u) != 0u) {
+        roughness *= texture(u_Material.roughnessMap, texCoords).r;
+    }
+    if ((v_TextureMask & 16u) != 0u) {
+        ao *= texture(u_Material.aoMap, texCoords).r;
+    }
     
     // Store G-buffer
-    gPosition = vec4(v_FragPos, 1.0);
-    gNormal = vec4(normalize(normal) * 0.5 + 0.5, 1.0);
+    gNormal = OctEncode(normalize(normal));
     gAlbedoSpec = vec4(albedo.rgb, metallic);
     
-    // Optional: Store roughness and AO in alpha channels
-    // gNormal.a = roughness;
+    // Optional: Store AO in the alpha channel
     // gAlbedoSpec.a = ao;
 }
 """
 
+# std140 atmosphere block filled by AtmosphereSettings.bind (see ATMO_DTYPE)
+ATMOSPHERE_BLOCK = """
+layout (std140, binding = 2) uniform AtmosphereBlock {
+    vec3 rayleigh_scattering;
+    float rayleigh_scale_height;
+    vec3 mie_scattering;
+    float mie_scale_height;
+    vec3 sun_direction;
+    float sun_intensity;
+    vec3 sun_color;
+    float mie_direction;
+    vec3 moon_direction;
+    float moon_intensity;
+    vec3 fog_color;
+    float fog_density;
+    vec2 wind_direction;
+    float wind_speed;
+    float fog_height_falloff;
+    float planet_radius;
+    float atmosphere_radius;
+    float time;
+    float cloud_coverage;
+    float cloud_density;
+    float rain_intensity;
+    float snow_intensity;
+} u_Atmosphere;
+"""
+
+# IES profile lookup into the atlas filled by LightProfile.to_texture (see IESAtlas)
+IES_SAMPLING = """
+layout (binding = 9) uniform sampler2DArray u_IESAtlas;
+
+// Relative candela (0-1) towards localDir, given in the light's frame (-y = down)
+float SampleIES(int layer, vec3 localDir) {
+    if (layer < 0) {
+        return 1.0;
+    }
+    float vertical = degrees(acos(clamp(-localDir.y, -1.0, 1.0)));
+    float horizontal = mod(degrees(atan(localDir.z, localDir.x)), 360.0);
+    vec2 uv = (vec2(horizontal, vertical) + 0.5) / vec2(360.0, 181.0);
+    return texture(u_IESAtlas, vec3(uv, float(layer))).r;
+}
+"""
+
+# Light rows (see LIGHT_DTYPE) and the per-cluster light lists built by
+# HDRRenderer._render_lighting_pass. The view frustum is split into
+# CLUSTER_GRID_X x CLUSTER_GRID_Y screen tiles and CLUSTER_GRID_Z depth slices,
+# logarithmic in view-space depth. clusters[] holds (offset, count) into
+# clusterLights[], whose first u_NumGlobalLights entries are directional lights.
+LIGHT_CLUSTER_BLOCK = """
+#ifndef CLUSTER_GRID_X
+#define CLUSTER_GRID_X 16
+#endif
+#ifndef CLUSTER_GRID_Y
+#define CLUSTER_GRID_Y 9
+#endif
+#ifndef CLUSTER_GRID_Z
+#define CLUSTER_GRID_Z 24
+#endif
+
+// LightType values
+#define LIGHT_DIRECTIONAL 1
+#define LIGHT_SPOT 3
+
+struct LightData {
+    vec4 position;
+    vec4 direction;
+    vec4 color;
+    vec4 attenuation;
+    vec4 area_size;
+    int type;
+    int shadow_map_index;
+    int ies_texture_index;
+    float volumetric;
+    float intensity;
+    float range;
+    float inner_angle;
+    float outer_angle;
+    float shadow_bias;
+    float shadow_normal_bias;
+    float shadow_softness;
+    float volumetric_intensity;
+};
+
+layout (std430, binding = 4) readonly buffer LightTable {
+    LightData lights[];
+};
+
+// LIGHT_CLUSTER_COMPUTE_SHADER defines this empty to write the lists
+#ifndef CLUSTER_LIST_ACCESS
+#define CLUSTER_LIST_ACCESS readonly
+#endif
+
+layout (std430, binding = 5) CLUSTER_LIST_ACCESS buffer ClusterTable {
+    uvec2 clusters[];
+};
+
+layout (std430, binding = 6) CLUSTER_LIST_ACCESS buffer ClusterLightIndices {
+    uint clusterLights[];
+};
+
+uniform uint u_NumGlobalLights;
+// Depth slice = log(-viewZ) * x + y, i.e. log(depth / near) / log(far / near) * CLUSTER_GRID_Z
+uniform vec2 u_ClusterDepthScaleBias;
+
+uint ClusterIndex(vec2 fragCoord, vec2 viewportSize, float viewZ) {
+    uvec3 cell;
+    cell.xy = uvec2(fragCoord / viewportSize * vec2(CLUSTER_GRID_X, CLUSTER_GRID_Y));
+    cell.z = uint(max(log(-viewZ) * u_ClusterDepthScaleBias.x + u_ClusterDepthScaleBias.y, 0.0));
+    cell = min(cell, uvec3(CLUSTER_GRID_X - 1, CLUSTER_GRID_Y - 1, CLUSTER_GRID_Z - 1));
+    return cell.x + CLUSTER_GRID_X * (cell.y + CLUSTER_GRID_Y * cell.z);
+}
+"""
+
 # =============================================================================
 # Lighting Shaders
 # =============================================================================
 
-LIGHTING_VERTEX_SHADER = """#version 460 core
-layout (location = 0) in vec3 a_Position;
+# Position from the G-buffer depth texture. inverseProjection is
+# inverse(projection) for view space or inverse(projection * view) for world space.
+DEPTH_RECONSTRUCTION = """
+vec3 ReconstructPosition(sampler2D depthTexture, vec2 uv, mat4 inverseProjection) {
+    vec4 clip = vec4(uv * 2.0 - 1.0, texture(depthTexture, uv).r * 2.0 - 1.0, 1.0);
+    vec4 position = inverseProjection * clip;
+    return position.xyz / position.w;
+}
+"""
+
+# Builds the LIGHT_CLUSTER_BLOCK lists on the GPU (HDRRenderer._build_light_clusters)
+LIGHT_CLUSTER_COMPUTE_SHADER = """#version 460 core
+// One invocation per cluster tests every candidate light's view-space range
+// sphere against the cluster's view-space bounding box. clusterLights holds
+// the directional lights, then u_NumCandidates local light indices, then a
+// run of MAX_CLUSTER_LIGHTS entries per cluster. Candidates are staged in
+// shared memory a workgroup's worth at a time.
+layout (local_size_x = 8, local_size_y = 8, local_size_z = 4) in;
+
+#define CLUSTER_LIST_ACCESS
+""" + LIGHT_CLUSTER_BLOCK + """
+#ifndef MAX_CLUSTER_LIGHTS
+#define MAX_CLUSTER_LIGHTS 128
+#endif
 
-uniform mat4 u_Model;
 uniform mat4 u_View;
-uniform mat4 u_Projection;
+uniform mat4 u_InverseProjection;
+uniform vec2 u_DepthRange;  // near, far
+uniform uint u_NumCandidates;
+
+const uint GROUP_SIZE = 8u * 8u * 4u;
+shared vec4 s_spheres[GROUP_SIZE];  // View-space center, range
+shared uint s_indices[GROUP_SIZE];
 
 void main() {
-    gl_Position = u_Projection * u_View * u_Model * vec4(a_Position, 1.0);
+    uvec3 cell = gl_GlobalInvocationID;
+    bool inGrid = all(lessThan(cell, uvec3(CLUSTER_GRID_X, CLUSTER_GRID_Y, CLUSTER_GRID_Z)));
+    
+    // Slice depths, logarithmic between near and far
+    float ratio = u_DepthRange.y / u_DepthRange.x;
+    float nearDepth = u_DepthRange.x * pow(ratio, float(cell.z) / float(CLUSTER_GRID_Z));
+    float farDepth = u_DepthRange.x * pow(ratio, float(cell.z + 1u) / float(CLUSTER_GRID_Z));
+    
+    // Bounds of the tile's corner rays between the two depths
+    vec2 tileMin = vec2(cell.xy) / vec2(CLUSTER_GRID_X, CLUSTER_GRID_Y) * 2.0 - 1.0;
+    vec2 tileMax = vec2(cell.xy + 1u) / vec2(CLUSTER_GRID_X, CLUSTER_GRID_Y) * 2.0 - 1.0;
+    vec3 boxMin = vec3(1e30);
+    vec3 boxMax = vec3(-1e30);
+    for (int i = 0; i < 4; i++) {
+        vec2 ndc = vec2((i & 1) != 0 ? tileMax.x : tileMin.x, (i & 2) != 0 ? tileMax.y : tileMin.y);
+        vec4 corner = u_InverseProjection * vec4(ndc, -1.0, 1.0);
+        vec3 ray = corner.xyz / corner.w;
+        ray /= -ray.z;  // At depth 1
+        boxMin = min(boxMin, min(ray * nearDepth, ray * farDepth));
+        boxMax = max(boxMax, max(ray * nearDepth, ray * farDepth));
+    }
+    
+    uint cluster = cell.x + CLUSTER_GRID_X * (cell.y + CLUSTER_GRID_Y * cell.z);
+    uint offset = u_NumGlobalLights + u_NumCandidates + cluster * MAX_CLUSTER_LIGHTS;
+    uint count = 0u;
+    for (uint base = 0u; base < u_NumCandidates; base += GROUP_SIZE) {
+        uint candidate = base + gl_LocalInvocationIndex;
+        if (candidate < u_NumCandidates) {
+            uint index = clusterLights[u_NumGlobalLights + candidate];
+            s_spheres[gl_LocalInvocationIndex] = vec4(
+                (u_View * vec4(lights[index].position.xyz, 1.0)).xyz, lights[index].range);
+            s_indices[gl_LocalInvocationIndex] = index;
+        }
+        barrier();
+        
+        uint batch = min(GROUP_SIZE, u_NumCandidates - base);
+        for (uint j = 0u; inGrid && j < batch; j++) {
+            vec4 sphere = s_spheres[j];
+            vec3 outside = sphere.xyz - clamp(sphere.xyz, boxMin, boxMax);
+            if (dot(outside, outside) <= sphere.w * sphere.w && count < MAX_CLUSTER_LIGHTS) {
+                clusterLights[offset + count] = s_indices[j];
+                count++;
+            }
+        }
+        barrier();
+    }
+    
+    if (inGrid) {
+        clusters[cluster] = uvec2(offset, count);
+    }
 }
 """
 
+# Fullscreen pass (FULLSCREEN_TRIANGLE_VERTEX_SHADER) shading every pixel with its cluster's lights
 LIGHTING_FRAGMENT_SHADER = """#version 460 core
+#ifdef BINDLESS_TEXTURES
+#extension GL_ARB_bindless_texture : require
+#endif
+// Specialized per frame (HDRRenderer._lighting_program): SHADOWS compiles in
+// shadow map sampling and SPOT_LIGHTS the spot cone falloff
 out vec4 FragColor;
 
 // G-buffer inputs
-uniform sampler2D gPosition;
+uniform sampler2D gDepth;
 uniform sampler2D gNormal;
 uniform sampler2D gAlbedoSpec;
-
-// Shadow maps
-uniform sampler2D u_ShadowMaps[4];
+uniform mat4 u_InvViewProjection;
+uniform mat4 u_View;
+""" + DEPTH_RECONSTRUCTION + OCTAHEDRAL_NORMALS + LIGHT_CLUSTER_BLOCK + ATMOSPHERE_BLOCK + IES_SAMPLING + """
+
+// Shadow maps: resident texture handles with BINDLESS_TEXTURES, units 10-13 otherwise
+#ifdef BINDLESS_TEXTURES
+layout (bindless_sampler) uniform sampler2DShadow u_ShadowMaps[4];
+#else
+layout (binding = 10) uniform sampler2DShadow u_ShadowMaps[4];
+#endif
 uniform int u_NumShadowMaps;
 
-// Light structure
-struct Light {
-    vec3 position;
-    vec3 color;
-    float intensity;
-    float radius;
-    int type;  // 0 = directional, 1 = point, 2 = spot
-    vec3 direction;
-    float innerCutoff;
-    float outerCutoff;
-    bool castShadows;
-    int shadowMapIndex;
-};
-
 // Uniforms
-uniform Light u_Lights[32];
-uniform int u_NumLights;
 uniform vec3 u_ViewPos;
 uniform mat4 u_LightSpaceMatrices[4];
 
@@ -251,45 +508,134 @@ vec3 FresnelSchlick(float cosTheta, vec3 F0) {
 }
 
 // Shadow calculation
-float CalculateShadow(vec4 fragPosLightSpace, sampler2D shadowMap, vec3 normal, vec3 lightDir) {
+float CalculateShadow(vec4 fragPosLightSpace, sampler2DShadow shadowMap, vec3 normal, vec3 lightDir) {
     // Perform perspective divide
     vec3 projCoords = fragPosLightSpace.xyz / fragPosLightSpace.w;
     
     // Transform to [0,1] range
     projCoords = projCoords * 0.5 + 0.5;
     
-    // Get closest depth value from light's perspective
-    float closestDepth = texture(shadowMap, projCoords.xy).r;
-    
-    // Get depth of current fragment from light's perspective
-    float currentDepth = projCoords.z;
+    // Keep shadow at 0.0 when outside the far plane region of the light's frustum
+    if(projCoords.z > 1.0) {
+        return 0.0;
+    }
     
-    // Check if current fragment is in shadow
+    // Depth of current fragment from light's perspective, biased against acne
     float bias = max(0.05 * (1.0 - dot(normal, lightDir)), 0.005);
-    
-    // PCF for softer shadows
+    float refDepth = projCoords.z - bias;
+    
+    // 3x3 PCF from four hardware-compared gathers covering the 4x4 texels
+    // around the sample; edge rows/columns are weighted by the sub-texel
+    // offset so the box slides smoothly instead of snapping to texels.
+    vec2 size = vec2(textureSize(shadowMap, 0));
+    vec2 texelSize = 1.0 / size;
+    vec2 pos = projCoords.xy * size - 0.5;
+    vec2 f = fract(pos);
+    vec2 center = (floor(pos) + 1.0) * texelSize;
+    
+    // Gather order is (-,+), (+,+), (+,-), (-,-) in texel (x, y)
+    vec4 lit = textureGather(shadowMap, center + vec2(-1.0, -1.0) * texelSize, refDepth);
+    float visible = dot(lit, vec4(1.0 - f.x, 1.0, 1.0 - f.y, (1.0 - f.x) * (1.0 - f.y)));
+    lit = textureGather(shadowMap, center + vec2(1.0, -1.0) * texelSize, refDepth);
+    visible += dot(lit, vec4(1.0, f.x, f.x * (1.0 - f.y), 1.0 - f.y));
+    lit = textureGather(shadowMap, center + vec2(-1.0, 1.0) * texelSize, refDepth);
+    visible += dot(lit, vec4((1.0 - f.x) * f.y, f.y, 1.0, 1.0 - f.x));
+    lit = textureGather(shadowMap, center + vec2(1.0, 1.0) * texelSize, refDepth);
+    visible += dot(lit, vec4(f.y, f.x * f.y, f.x, 1.0));
+    
+    return 1.0 - visible / 9.0;
+}
+
+// Outgoing radiance from one light, given the direction towards it and its incoming radiance
+vec3 ShadeLight(LightData light, vec3 lightDir, vec3 radiance, vec3 FragPos, vec3 Normal,
+                vec3 viewDir, vec3 albedo, float metallic, float roughness, vec3 F0) {
+#ifdef SHADOWS
+    // Calculate shadow
     float shadow = 0.0;
-    vec2 texelSize = 1.0 / textureSize(shadowMap, 0);
-    for(int x = -1; x <= 1; ++x) {
-        for(int y = -1; y <= 1; ++y) {
-            float pcfDepth = texture(shadowMap, projCoords.xy + vec2(x, y) * texelSize).r;
-            shadow += currentDepth - bias > pcfDepth ? 1.0 : 0.0;
-        }
+    if(light.shadow_map_index >= 0 && light.shadow_map_index < u_NumShadowMaps) {
+        vec4 fragPosLightSpace = u_LightSpaceMatrices[light.shadow_map_index] * vec4(FragPos, 1.0);
+        shadow = CalculateShadow(fragPosLightSpace, u_ShadowMaps[light.shadow_map_index], Normal, lightDir);
     }
-    shadow /= 9.0;
+#else
+    const float shadow = 0.0;
+#endif
     
-    // Keep shadow at 0.0 when outside the far plane region of the light's frustum
-    if(projCoords.z > 1.0) {
-        shadow = 0.0;
-    }
+    vec3 H = normalize(viewDir + lightDir);
+    
+    // Cook-Torrance BRDF
+    float NDF = DistributionGGX(Normal, H, roughness);
+    float G = GeometrySmith(Normal, viewDir, lightDir, roughness);
+    vec3 F = FresnelSchlick(max(dot(H, viewDir), 0.0), F0);
+    
+    vec3 kS = F;
+    vec3 kD = vec3(1.0) - kS;
+    kD *= 1.0 - metallic;
     
-    return shadow;
+    vec3 numerator = NDF * G * F;
+    float denominator = 4.0 * max(dot(Normal, viewDir), 0.0) * max(dot(Normal, lightDir), 0.0) + 0.001;
+    vec3 specular = numerator / denominator;
+    
+    float NdotL = max(dot(Normal, lightDir), 0.0);
+    return (kD * albedo / PI + specular) * radiance * NdotL * (1.0 - shadow);
+}
+
+// The global lights are all directional
+vec3 ShadeDirectionalLight(LightData light, vec3 FragPos, vec3 Normal, vec3 viewDir,
+                           vec3 albedo, float metallic, float roughness, vec3 F0) {
+    vec3 lightDir = normalize(-light.direction.xyz);
+    vec3 radiance = light.color.rgb * light.intensity;
+    return ShadeLight(light, lightDir, radiance, FragPos, Normal, viewDir, albedo, metallic, roughness, F0);
+}
+
+// Point and spot lights from the cluster lists
+vec3 ShadeLocalLight(LightData light, vec3 FragPos, vec3 Normal, vec3 viewDir,
+                     vec3 albedo, float metallic, float roughness, vec3 F0) {
+    vec3 lightVector = light.position.xyz - FragPos;
+    float distance = length(lightVector);
+    vec3 lightDir = lightVector / max(distance, 0.0001);
+    
+    // Attenuation, windowed to reach zero at the range lights are clustered by
+    float attenuation = 1.0 / dot(light.attenuation.xyz, vec3(1.0, distance, distance * distance));
+    float window = clamp(1.0 - pow(distance / light.range, 4.0), 0.0, 1.0);
+    vec3 radiance = light.color.rgb * light.intensity * attenuation * window * window;
+    
+#ifdef SPOT_LIGHTS
+    if(light.type == LIGHT_SPOT) {
+        // Spotlight intensity
+        float theta = dot(lightDir, normalize(-light.direction.xyz));
+        float epsilon = light.inner_angle - light.outer_angle;
+        radiance *= clamp((theta - light.outer_angle) / epsilon, 0.0, 1.0);
+    }
+#endif
+    
+    // IES profile: the light's frame has -y along light.direction, and x and z
+    // from a basis around it
+    if(light.ies_texture_index >= 0) {
+        vec3 down = normalize(light.direction.xyz);
+        vec3 xAxis = normalize(cross(abs(down.y) < 0.999 ? vec3(0.0, 1.0, 0.0) : vec3(1.0, 0.0, 0.0), down));
+        vec3 zAxis = cross(xAxis, down);
+        radiance *= SampleIES(light.ies_texture_index,
+                              vec3(dot(-lightDir, xAxis), -dot(-lightDir, down), dot(-lightDir, zAxis)));
+    }
+    return ShadeLight(light, lightDir, radiance, FragPos, Normal, viewDir, albedo, metallic, roughness, F0);
+}
+
+// Exponential height fog: density fog_density * exp(-fog_height_falloff * y),
+// integrated in closed form along the ray from the camera to FragPos
+vec3 ApplyFog(vec3 color, vec3 FragPos) {
+    vec3 ray = FragPos - u_ViewPos;
+    float distance = length(ray);
+    float falloff = u_Atmosphere.fog_height_falloff;
+    float rise = ray.y * falloff;
+    float path = abs(rise) > 1e-4 ? (1.0 - exp(-rise)) / rise : 1.0;
+    float depth = u_Atmosphere.fog_density * exp(-falloff * u_ViewPos.y) * distance * path;
+    return mix(u_Atmosphere.fog_color, color, exp(-depth));
 }
 
 void main() {
     // Retrieve data from G-buffer
-    vec3 FragPos = texture(gPosition, gl_FragCoord.xy / textureSize(gPosition, 0)).rgb;
-    vec3 Normal = texture(gNormal, gl_FragCoord.xy / textureSize(gNormal, 0)).rgb * 2.0 - 1.0;
+    vec3 FragPos = ReconstructPosition(gDepth, gl_FragCoord.xy / textureSize(gDepth, 0), u_InvViewProjection);
+    vec3 Normal = OctDecode(texture(gNormal, gl_FragCoord.xy / textureSize(gNormal, 0)).rg);
     vec4 albedoSpec = texture(gAlbedoSpec, gl_FragCoord.xy / textureSize(gAlbedoSpec, 0));
     
     vec3 albedo = albedoSpec.rgb;
@@ -306,83 +652,24 @@ void main() {
     vec3 F0 = vec3(0.04);
     F0 = mix(F0, albedo, metallic);
     
-    // Reflectance equation
+    // Reflectance equation: directional lights lead the index list, then
+    // only the lights assigned to this fragment's cluster are shaded
     vec3 Lo = vec3(0.0);
+    for(uint i = 0u; i < u_NumGlobalLights; i++) {
+        Lo += ShadeDirectionalLight(lights[clusterLights[i]], FragPos, Normal, viewDir, albedo, metallic, roughness, F0);
+    }
     
-    // Calculate per-light radiance
-    for(int i = 0; i < u_NumLights; i++) {
-        Light light = u_Lights[i];
-        
-        // Calculate radiance
-        vec3 lightDir;
-        vec3 radiance;
-        
-        if(light.type == 0) { // Directional light
-            lightDir = normalize(-light.direction);
-            radiance = light.color * light.intensity;
-        } else if(light.type == 1) { // Point light
-            vec3 lightVector = light.position - FragPos;
-            float distance = length(lightVector);
-            lightDir = normalize(lightVector);
-            
-            // Attenuation
-            float attenuation = 1.0 / (1.0 + 0.09 * distance + 0.032 * (distance * distance));
-            radiance = light.color * light.intensity * attenuation;
-        } else { // Spot light
-            vec3 lightVector = light.position - FragPos;
-            float distance = length(lightVector);
-            lightDir = normalize(lightVector);
-            
-            // Attenuation
-            float attenuation = 1.0 / (1.0 + 0.09 * distance + 0.032 * (distance * distance));
-            
-            // Spotlight intensity
-            float theta = dot(lightDir, normalize(-light.direction));
-            float epsilon = light.innerCutoff - light.outerCutoff;
-            float intensity = clamp((theta - light.outerCutoff) / epsilon, 0.0, 1.0);
-            
-            radiance = light.color * light.intensity * attenuation * intensity;
-        }
-        
-        // Calculate shadow
-        float shadow = 0.0;
-        if(light.castShadows && light.shadowMapIndex >= 0 && light.shadowMapIndex < u_NumShadowMaps) {
-            vec4 fragPosLightSpace = u_LightSpaceMatrices[light.shadowMapIndex] * vec4(FragPos, 1.0);
-            shadow = CalculateShadow(fragPosLightSpace, u_ShadowMaps[light.shadowMapIndex], Normal, lightDir);
-        }
-        
-        // Calculate per-light radiance
-        vec3 H = normalize(viewDir + lightDir);
-        
-        // Cook-Torrance BRDF
-        float NDF = DistributionGGX(Normal, H, roughness);
-        float G = GeometrySmith(Normal, viewDir, lightDir, roughness);
-        vec3 F = FresnelSchlick(max(dot(H, viewDir), 0.0), F0);
-        
-        vec3 kS = F;
-        vec3 kD = vec3(1.0) - kS;
-        kD *= 1.0 - metallic;
-        
-        vec3 numerator = NDF * G * F;
-        float denominator = 4.0 * max(dot(Normal, viewDir), 0.0) * max(dot(Normal, lightDir), 0.0) + 0.001;
-        vec3 specular = numerator / denominator;
-        
-        // Add to outgoing radiance Lo
-        float NdotL = max(dot(Normal, lightDir), 0.0);
-        Lo += (kD * albedo / PI + specular) * radiance * NdotL * (1.0 - shadow);
+    float viewZ = (u_View * vec4(FragPos, 1.0)).z;
+    uvec2 cluster = clusters[ClusterIndex(gl_FragCoord.xy, vec2(textureSize(gDepth, 0)), viewZ)];
+    for(uint i = cluster.x; i < cluster.x + cluster.y; i++) {
+        Lo += ShadeLocalLight(lights[clusterLights[i]], FragPos, Normal, viewDir, albedo, metallic, roughness, F0);
     }
     
     // Ambient lighting (IBL would go here)
     vec3 ambient = vec3(0.03) * albedo * ao;
     
-    // Final color
-    vec3 color = ambient + Lo;
-    
-    // HDR tonemapping
-    color = color / (color + vec3(1.0));
-    
-    // Gamma correction
-    color = pow(color, vec3(1.0/2.2));
+    // Final color, linear HDR; tone mapping and gamma happen in the composite pass
+    vec3 color = ApplyFog(ambient + Lo, FragPos);
     
     FragColor = vec4(color, 1.0);
 }
@@ -392,15 +679,20 @@ void main() {
 # Post-Processing Shaders
 # =============================================================================
 
-POST_PROCESSING_VERTEX_SHADER = """#version 460 core
-layout (location = 0) in vec2 a_Position;
-layout (location = 1) in vec2 a_TexCoords;
-
-out vec2 v_TexCoords;
-
-void main() {
-    v_TexCoords = a_TexCoords;
-    gl_Position = vec4(a_Position, 0.0, 1.0);
+# Display gamma encoding shared by the passes that write the back buffer.
+# FAST_GAMMA replaces the pow with three square roots fitted to x^(1/2.2);
+# white stays exact and the error is under 0.31/255 above 1% linear.
+GAMMA_FUNCTIONS = """
+const vec3 INV_GAMMA = vec3(1.0 / 2.2);
+
+vec3 GammaEncode(vec3 color) {
+#ifdef FAST_GAMMA
+    vec3 s1 = sqrt(color);
+    vec3 s2 = sqrt(s1);
+    return 0.7696 * s1 + 0.3431 * s2 - 0.1127 * sqrt(s2);
+#else
+    return pow(color, INV_GAMMA);
+#endif
 }
 """
 
@@ -413,10 +705,8 @@ uniform sampler2D u_Scene;
 uniform sampler2D u_BloomBlur;
 uniform float u_Exposure;
 uniform float u_BloomStrength;
-
+""" + GAMMA_FUNCTIONS + """
 void main() {
-    const float gamma = 2.2;
-    
     // Sample the HDR color buffer and bloom blur texture
     vec3 hdrColor = texture(u_Scene, v_TexCoords).rgb;      
     vec3 bloomColor = texture(u_BloomBlur, v_TexCoords).rgb;
@@ -428,7 +718,7 @@ void main() {
     vec3 result = vec3(1.0) - exp(-hdrColor * u_Exposure);
     
     // Gamma correction
-    result = pow(result, vec3(1.0 / gamma));
+    result = GammaEncode(result);
     
     FragColor = vec4(result, 1.0);
 }
@@ -439,27 +729,37 @@ out float FragColor;
 
 in vec2 v_TexCoords;
 
-uniform sampler2D gPosition;
+uniform sampler2D gDepth;
 uniform sampler2D gNormal;
 uniform sampler2D u_NoiseTexture;
 
+// Kernel size and radius are compile-time constants (see with_defines)
+#ifndef SSAO_KERNEL_SIZE
+#define SSAO_KERNEL_SIZE 64
+#endif
+#ifndef SSAO_RADIUS
+#define SSAO_RADIUS 0.5
+#endif
+
 // Parameters
-uniform vec2 u_NoiseScale;
-uniform int u_KernelSize;
-uniform float u_Radius;
+uniform mat4 u_Projection;
+uniform mat4 u_InvProjection;
+uniform vec2 u_NoiseScale;  // Target size / 4, so the noise texture tiles over it
 uniform float u_Bias;
 uniform float u_Power;
 
-// Array of kernel samples
-uniform vec3 u_Samples[64];
+// Hemisphere kernel samples (xyz), uploaded once by PostProcessor
+layout (std140, binding = 3) uniform SSAOKernel {
+    vec4 u_Samples[SSAO_KERNEL_SIZE];
+};
 
-// Tile noise texture over screen
-vec2 noiseScale = vec2(1920.0/4.0, 1080.0/4.0);
+const float INV_KERNEL_SIZE = 1.0 / float(SSAO_KERNEL_SIZE);
+""" + DEPTH_RECONSTRUCTION + OCTAHEDRAL_NORMALS + """
 
 void main() {
     // Get input for SSAO algorithm
-    vec3 fragPos = texture(gPosition, v_TexCoords).xyz;
-    vec3 normal = normalize(texture(gNormal, v_TexCoords).rgb * 2.0 - 1.0);
+    vec3 fragPos = ReconstructPosition(gDepth, v_TexCoords, u_InvProjection);  // View space
+    vec3 normal = OctDecode(texture(gNormal, v_TexCoords).rg);
     vec3 randomVec = normalize(texture(u_NoiseTexture, v_TexCoords * u_NoiseScale).xyz);
     
     // Create TBN matrix
@@ -469,10 +769,10 @@ void main() {
     
     // Calculate occlusion
     float occlusion = 0.0;
-    for(int i = 0; i < u_KernelSize; ++i) {
+    for(int i = 0; i < SSAO_KERNEL_SIZE; ++i) {
         // Get sample position
-        vec3 samplePos = TBN * u_Samples[i]; // From tangent to view-space
-        samplePos = fragPos + samplePos * u_Radius;
+        vec3 samplePos = TBN * u_Samples[i].xyz; // From tangent to view-space
+        samplePos = fragPos + samplePos * SSAO_RADIUS;
         
         // Project sample position to sample texture
         vec4 offset = vec4(samplePos, 1.0);
@@ -481,27 +781,105 @@ void main() {
         offset.xyz = offset.xyz * 0.5 + 0.5; // Transform to range 0.0 - 1.0
         
         // Get sample depth
-        float sampleDepth = texture(gPosition, offset.xy).z;
+        float sampleDepth = ReconstructPosition(gDepth, offset.xy, u_InvProjection).z;
         
         // Range check & accumulate
-        float rangeCheck = smoothstep(0.0, 1.0, u_Radius / abs(fragPos.z - sampleDepth));
+        float rangeCheck = smoothstep(0.0, 1.0, SSAO_RADIUS / abs(fragPos.z - sampleDepth));
         occlusion += (sampleDepth >= samplePos.z + u_Bias ? 1.0 : 0.0) * rangeCheck;           
     }
     
-    occlusion = 1.0 - (occlusion / u_KernelSize);
+    occlusion = 1.0 - occlusion * INV_KERNEL_SIZE;
     FragColor = pow(occlusion, u_Power);
 }
 """
 
-TONE_MAPPING_FRAGMENT_SHADER = """#version 460 core
+SSAO_BLUR_FRAGMENT_SHADER = """#version 460 core
+// One axis of the separable bilateral SSAO blur: 2 * SSAO_BLUR_RADIUS + 1 taps,
+// each weighted by a Gaussian, depth similarity and normal similarity so
+// occlusion does not bleed across edges. Run horizontally, then again compiled
+// with SSAO_BLUR_VERTICAL on the result.
+out float FragColor;
+
+in vec2 v_TexCoords;
+
+uniform sampler2D u_SSAO;  // Raw occlusion, or the horizontal pass output
+uniform sampler2D gDepth;
+uniform sampler2D gNormal;
+uniform mat4 u_InvProjection;
+
+#ifndef SSAO_BLUR_RADIUS
+#define SSAO_BLUR_RADIUS 4
+#endif
+#ifndef SSAO_BLUR_DEPTH_SIGMA
+#define SSAO_BLUR_DEPTH_SIGMA 0.1
+#endif
+""" + DEPTH_RECONSTRUCTION + OCTAHEDRAL_NORMALS + """
+
+void main() {
+#ifdef SSAO_BLUR_VERTICAL
+    vec2 texelStep = vec2(0.0, 1.0 / float(textureSize(u_SSAO, 0).y));
+#else
+    vec2 texelStep = vec2(1.0 / float(textureSize(u_SSAO, 0).x), 0.0);
+#endif
+    const float sigma = float(SSAO_BLUR_RADIUS) * 0.5 + 0.5;
+    
+    float centerDepth = ReconstructPosition(gDepth, v_TexCoords, u_InvProjection).z;
+    vec3 centerNormal = OctDecode(texture(gNormal, v_TexCoords).rg);
+    
+    // The centre tap has weight 1, so total never reaches zero
+    float occlusion = 0.0;
+    float total = 0.0;
+    for (int i = -SSAO_BLUR_RADIUS; i <= SSAO_BLUR_RADIUS; ++i) {
+        vec2 uv = v_TexCoords + float(i) * texelStep;
+        float depth = ReconstructPosition(gDepth, uv, u_InvProjection).z;
+        vec3 normal = OctDecode(texture(gNormal, uv).rg);
+        float weight = exp(-float(i * i) / (2.0 * sigma * sigma))
+                     * exp(-abs(depth - centerDepth) / SSAO_BLUR_DEPTH_SIGMA)
+                     * max(dot(centerNormal, normal), 0.0);
+        occlusion += texture(u_SSAO, uv).r * weight;
+        total += weight;
+    }
+    FragColor = occlusion / total;
+}
+"""
+
+SSAO_UPSAMPLE_FRAGMENT_SHADER = """#version 460 core
+// Applies the half-resolution, blurred occlusion to the full-resolution scene.
+// Of the four low-resolution texels around each pixel, the one whose depth is
+// nearest the pixel's own is used, so occlusion does not bleed across edges.
 out vec4 FragColor;
 
 in vec2 v_TexCoords;
 
-uniform sampler2D u_HDRBuffer;
-uniform float u_Exposure;
-uniform bool u_UseACES;
+uniform sampler2D u_Scene;
+uniform sampler2D u_SSAO;  // PostProcessor.ssao_size occlusion
+uniform sampler2D gDepth;
+uniform mat4 u_InvProjection;
+""" + DEPTH_RECONSTRUCTION + """
 
+void main() {
+    ivec2 size = textureSize(u_SSAO, 0);
+    ivec2 base = ivec2(floor(v_TexCoords * vec2(size) - 0.5));
+    float depth = ReconstructPosition(gDepth, v_TexCoords, u_InvProjection).z;
+    
+    float occlusion = 1.0;
+    float nearest = 1e30;
+    for (int i = 0; i < 4; ++i) {
+        ivec2 texel = clamp(base + ivec2(i & 1, i >> 1), ivec2(0), size - 1);
+        vec2 uv = (vec2(texel) + 0.5) / vec2(size);
+        float difference = abs(ReconstructPosition(gDepth, uv, u_InvProjection).z - depth);
+        if (difference < nearest) {
+            nearest = difference;
+            occlusion = texelFetch(u_SSAO, texel, 0).r;
+        }
+    }
+    FragColor = vec4(texture(u_Scene, v_TexCoords).rgb * occlusion, 1.0);
+}
+"""
+
+# ACES filmic curve shared by the tone mapping and composite shaders
+ACES_FUNCTIONS = """
+#ifdef ACES_FULL
 // ACES tone mapping curve fit to go from HDR to LDR
 // sRGB => XYZ => D65_2_AP1 => RRT_SAT
 const mat3 ACESInputMat = mat3(
@@ -526,10 +904,31 @@ vec3 RRTAndODTFit(vec3 v) {
 vec3 ACESFitted(vec3 color) {
     color = color * ACESInputMat;
     color = RRTAndODTFit(color);
-    color = ACESOutputMat * color;
+    color = color * ACESOutputMat;
     return clamp(color, 0.0, 1.0);
 }
+#else
+// Narkowicz's per-channel ACES fit, x * (2.51x + 0.03) / (x * (2.43x + 0.59) + 0.14),
+// with his 0.6 input scale folded into the coefficients. No colour matrices;
+// greys stay within 0.07 of the full fit above, saturated colours
+// desaturate less towards white
+vec3 ACESFitted(vec3 color) {
+    vec3 a = color * (0.9036 * color + 0.018);
+    vec3 b = color * (0.8748 * color + 0.354) + 0.14;
+    return clamp(a / b, 0.0, 1.0);
+}
+#endif
+"""
 
+TONE_MAPPING_FRAGMENT_SHADER = """#version 460 core
+out vec4 FragColor;
+
+in vec2 v_TexCoords;
+
+uniform sampler2D u_HDRBuffer;
+uniform float u_Exposure;
+uniform bool u_UseACES;
+""" + ACES_FUNCTIONS + GAMMA_FUNCTIONS + """
 void main() {
     // Sample HDR color
     vec3 hdrColor = texture(u_HDRBuffer, v_TexCoords).rgb;
@@ -545,12 +944,110 @@ void main() {
     }
     
     // Gamma correction
-    mapped = pow(mapped, vec3(1.0 / 2.2));
+    mapped = GammaEncode(mapped);
     
     FragColor = vec4(mapped, 1.0);
 }
 """
 
+# Every per-pixel effect after the neighbourhood passes (SSAO, SSR, bloom
+# pyramid, DOF, motion blur, AA) in one pass: the HDR scene and bloom are read
+# once and the LDR result written once. See PostProcessor._compile_composite_post_shader.
+COMPOSITE_FRAGMENT_SHADER = """#version 460 core
+out vec4 FragColor;
+
+in vec2 v_TexCoords;
+
+uniform sampler2D u_Scene;  // HDR scene
+uniform sampler2D u_Bloom;  // Mip 0 of PostProcessor.bloom_texture
+
+// Effects are compiled in with ENABLE_BLOOM, ENABLE_CA, ENABLE_SHARPEN,
+// ENABLE_VIGNETTE and ENABLE_GRAIN (see with_defines). TONE_MAP_REINHARD
+// swaps the ACES curve for exponential Reinhard, ACES_FULL selects the
+// matrix ACES fit and FAST_GAMMA the GAMMA_FUNCTIONS gamma approximation.
+
+uniform float u_Time;
+uniform float u_Exposure;
+uniform float u_BloomIntensity;
+uniform float u_ChromaticAberration;
+uniform float u_SharpenStrength;
+uniform float u_Contrast;
+uniform float u_Saturation;
+uniform float u_Brightness;
+uniform float u_Temperature;  // -1 (cool) to 1 (warm)
+uniform float u_Tint;         // -1 (magenta) to 1 (green)
+uniform float u_VignetteIntensity;
+uniform float u_VignetteSoftness;
+uniform float u_FilmGrainIntensity;
+""" + ACES_FUNCTIONS + GAMMA_FUNCTIONS + """
+vec3 SampleScene(vec2 uv) {
+#ifdef ENABLE_CA
+    // Red and blue are pulled apart radially from the screen centre
+    vec2 offset = (uv - 0.5) * u_ChromaticAberration * 0.02;
+    return vec3(texture(u_Scene, uv + offset).r,
+                texture(u_Scene, uv).g,
+                texture(u_Scene, uv - offset).b);
+#else
+    return texture(u_Scene, uv).rgb;
+#endif
+}
+
+vec3 Sharpen(vec3 center, vec2 uv) {
+    // Unsharp mask against the 4 direct neighbours
+    vec2 texel = 1.0 / vec2(textureSize(u_Scene, 0));
+    vec3 blur = 0.25 * (texture(u_Scene, uv + vec2(texel.x, 0.0)).rgb +
+                        texture(u_Scene, uv - vec2(texel.x, 0.0)).rgb +
+                        texture(u_Scene, uv + vec2(0.0, texel.y)).rgb +
+                        texture(u_Scene, uv - vec2(0.0, texel.y)).rgb);
+    return max(center + (center - blur) * u_SharpenStrength, 0.0);
+}
+
+vec3 ColorGrade(vec3 color) {
+    color *= vec3(1.0 + 0.1 * u_Temperature, 1.0 + 0.1 * u_Tint, 1.0 - 0.1 * u_Temperature);
+    color = (color - 0.5) * u_Contrast + 0.5;
+    float luma = dot(color, vec3(0.2126, 0.7152, 0.0722));
+    color = mix(vec3(luma), color, u_Saturation) * u_Brightness;
+    return clamp(color, 0.0, 1.0);
+}
+
+float Hash(vec2 p) {
+    return fract(sin(dot(p, vec2(12.9898, 78.233))) * 43758.5453);
+}
+
+void main() {
+    vec2 uv = v_TexCoords;
+    vec3 color = SampleScene(uv);
+#ifdef ENABLE_SHARPEN
+    color = Sharpen(color, uv);
+#endif
+#ifdef ENABLE_BLOOM
+    color += texture(u_Bloom, uv).rgb * u_BloomIntensity;
+#endif
+    
+#ifdef TONE_MAP_REINHARD
+    color = ColorGrade(vec3(1.0) - exp(-color * u_Exposure));
+#else
+    color = ColorGrade(ACESFitted(color * u_Exposure));
+#endif
+    
+#ifdef ENABLE_VIGNETTE
+    float distance = length(uv - 0.5) * 1.41421356;
+    float falloff = smoothstep(1.0, 1.0 - u_VignetteSoftness, distance);
+    color *= mix(1.0, falloff, u_VignetteIntensity);
+#endif
+    
+    // Gamma correction
+    color = GammaEncode(color);
+    
+#ifdef ENABLE_GRAIN
+    // Grain is added after gamma so it is even across the tonal range
+    color += (Hash(gl_FragCoord.xy + fract(u_Time) * 1000.0) - 0.5) * u_FilmGrainIntensity;
+#endif
+    
+    FragColor = vec4(color, 1.0);
+}
+"""
+
 # =============================================================================
 # Skybox Shader
 # =============================================================================
@@ -576,52 +1073,46 @@ out vec4 FragColor;
 in vec3 v_TexCoords;
 
 uniform samplerCube u_Skybox;
-uniform vec3 u_SunDirection;
-uniform vec3 u_SunColor;
-uniform float u_Time;
+""" + ATMOSPHERE_BLOCK + """
 
-// Constants
 const float sunAngularRadius = 0.00465; // ~0.5 degrees in radians
 
+// Rayleigh sky colour (rgb) and Mie phase (a), precomputed once on the CPU
+// (see hdr_graphics._sky_scattering_lut). u = 1 - sqrt(1 - sunDot) packs more
+// texels towards the sun where the Mie lobe peaks; v = sunDir.y * 0.5 + 0.5.
+layout (binding = 14) uniform sampler2D u_AtmosphereLUT;
+
 // Simple atmospheric scattering approximation
 vec3 atmosphere(vec3 rd, vec3 sunDir) {
-    // Simple Rayleigh-like scattering
     float sunDot = max(dot(rd, sunDir), 0.0);
-    float rayleigh = 3.0 / (8.0 * 3.14159265) * (1.0 + sunDot * sunDot);
+    float s = sqrt(1.0 - sunDot);
+    vec4 scattering = textureLod(u_AtmosphereLUT, vec2(1.0 - s, sunDir.y * 0.5 + 0.5), 0.0);
     
-    // Mie scattering (aerosols)
-    float g = 0.8; // Scattering directionality
-    float mie = (1.0 - g * g) / (4.0 * 3.14159265 * pow(1.0 + g * g - 2.0 * g * sunDot, 1.5));
+    // Add sun; the chord length sqrt(2 - 2 cos a) matches the angle a to
+    // within 1e-5 relative across the disc, without an acos
+    float sun = smoothstep(sunAngularRadius, 0.0, 1.41421356 * s);
     
-    // Combine with colors
-    vec3 skyColor = mix(
-        vec3(0.3, 0.6, 1.0),  // Blue sky
-        vec3(1.0, 0.7, 0.4),  // Sunset
-        smoothstep(0.0, 1.0, -sunDir.y * 0.5 + 0.5)
-    );
-    
-    // Add sun
-    float sun = smoothstep(sunAngularRadius, 0.0, acos(sunDot));
-    
-    return skyColor * rayleigh + u_SunColor * mie + u_SunColor * sun * 10.0;
+    vec3 sunColor = u_Atmosphere.sun_color * u_Atmosphere.sun_intensity;
+    return scattering.rgb + sunColor * scattering.a + sunColor * sun * 10.0;
 }
 
 void main() {
-    // Sample cubemap
-    vec3 texColor = texture(u_Skybox, v_TexCoords).rgb;
-    
-    // Add atmospheric scattering
+    // Atmosphere below the horizon, cubemap above dir.y = 0.3 and a blend
+    // between; each side only evaluates the term it shows. The split follows
+    // the horizon, so whole tiles usually take the same branch. Derivatives
+    // are undefined in divergent quads, so the cubemap is read at level 0
     vec3 dir = normalize(v_TexCoords);
-    vec3 sunDir = normalize(u_SunDirection);
-    vec3 atmosphereColor = atmosphere(dir, sunDir);
-    
-    // Blend between cubemap and atmosphere based on view direction
-    float blend = smoothstep(0.0, 0.3, dir.y);
-    vec3 color = mix(atmosphereColor, texColor, blend);
-    
-    // Apply exposure and gamma correction
-    color = pow(color, vec3(1.0/2.2));
+    vec3 color;
+    if (dir.y >= 0.3) {
+        color = textureLod(u_Skybox, v_TexCoords, 0.0).rgb;
+    } else {
+        color = atmosphere(dir, u_Atmosphere.sun_direction);
+        if (dir.y > 0.0) {
+            color = mix(color, textureLod(u_Skybox, v_TexCoords, 0.0).rgb, smoothstep(0.0, 0.3, dir.y));
+        }
+    }
     
+    // Linear HDR like the lit scene; the composite pass tone maps both
     FragColor = vec4(color, 1.0);
 }
 """
@@ -641,11 +1132,6 @@ void main() {
 }
 """
 
-SHADOW_MAP_FRAGMENT_SHADER = """#version 460 core
-void main() {
-    // Nothing to do here, we only need the depth values
-}
-"""
 
 # =============================================================================
 # Debug Shaders
@@ -677,18 +1163,349 @@ void main() {
 """
 
 # =============================================================================
-# Fullscreen Quad Shader
+# Fullscreen Triangle Shader
 # =============================================================================
 
-FULLSCREEN_QUAD_VERTEX_SHADER = """#version 460 core
-layout (location = 0) in vec2 a_Position;
-layout (location = 1) in vec2 a_TexCoords;
-
+# One triangle covering the viewport, generated from gl_VertexID: draw three
+# vertices with an empty VAO bound and no vertex buffer (see TextureBlitter)
+FULLSCREEN_TRIANGLE_VERTEX_SHADER = """#version 460 core
 out vec2 v_TexCoords;
 
 void main() {
-    v_TexCoords = a_TexCoords;
-    gl_Position = vec4(a_Position, 0.0, 1.0);
+    // UVs (0, 0), (2, 0), (0, 2); the part outside the unit square is clipped
+    v_TexCoords = vec2((gl_VertexID << 1) & 2, gl_VertexID & 2);
+    gl_Position = vec4(v_TexCoords * 2.0 - 1.0, 0.0, 1.0);
+}
+"""
+
+BLIT_FRAGMENT_SHADER = """#version 460 core
+in vec2 v_TexCoords;
+
+layout (binding = 0) uniform sampler2D u_Source;
+
+out vec4 FragColor;
+
+void main() {
+    FragColor = texture(u_Source, v_TexCoords);
+}
+"""
+
+FXAA_FRAGMENT_SHADER = """#version 460 core
+// FXAA (Lottes): blurs along the local edge direction found from the luma of
+// the four diagonal neighbours. Pixels without enough local contrast return
+// early with a single fetch.
+out vec4 FragColor;
+
+in vec2 v_TexCoords;
+
+layout (binding = 0) uniform sampler2D u_Source;
+
+#define FXAA_EDGE_THRESHOLD (1.0 / 8.0)
+#define FXAA_EDGE_THRESHOLD_MIN (1.0 / 16.0)
+#define FXAA_REDUCE_MIN (1.0 / 128.0)
+#define FXAA_REDUCE_MUL (1.0 / 8.0)
+#define FXAA_SPAN_MAX 8.0
+
+float Luma(vec3 color) {
+    return dot(color, vec3(0.299, 0.587, 0.114));
+}
+
+void main() {
+    vec3 rgbM = texture(u_Source, v_TexCoords).rgb;
+    float lumaM = Luma(rgbM);
+    float lumaNW = Luma(textureOffset(u_Source, v_TexCoords, ivec2(-1, -1)).rgb);
+    float lumaNE = Luma(textureOffset(u_Source, v_TexCoords, ivec2(1, -1)).rgb);
+    float lumaSW = Luma(textureOffset(u_Source, v_TexCoords, ivec2(-1, 1)).rgb);
+    float lumaSE = Luma(textureOffset(u_Source, v_TexCoords, ivec2(1, 1)).rgb);
+    float lumaMin = min(lumaM, min(min(lumaNW, lumaNE), min(lumaSW, lumaSE)));
+    float lumaMax = max(lumaM, max(max(lumaNW, lumaNE), max(lumaSW, lumaSE)));
+    
+    // Early out on flat areas
+    if (lumaMax - lumaMin < max(FXAA_EDGE_THRESHOLD_MIN, lumaMax * FXAA_EDGE_THRESHOLD)) {
+        FragColor = vec4(rgbM, 1.0);
+        return;
+    }
+    
+    // Direction along the edge, scaled so the shorter axis spans one texel
+    vec2 dir = vec2(-((lumaNW + lumaNE) - (lumaSW + lumaSE)),
+                    (lumaNW + lumaSW) - (lumaNE + lumaSE));
+    float dirReduce = max((lumaNW + lumaNE + lumaSW + lumaSE) * (0.25 * FXAA_REDUCE_MUL), FXAA_REDUCE_MIN);
+    float rcpDirMin = 1.0 / (min(abs(dir.x), abs(dir.y)) + dirReduce);
+    dir = clamp(dir * rcpDirMin, vec2(-FXAA_SPAN_MAX), vec2(FXAA_SPAN_MAX)) / vec2(textureSize(u_Source, 0));
+    
+    vec3 rgbA = 0.5 * (texture(u_Source, v_TexCoords + dir * (1.0 / 3.0 - 0.5)).rgb +
+                       texture(u_Source, v_TexCoords + dir * (2.0 / 3.0 - 0.5)).rgb);
+    vec3 rgbB = rgbA * 0.5 + 0.25 * (texture(u_Source, v_TexCoords - dir * 0.5).rgb +
+                                     texture(u_Source, v_TexCoords + dir * 0.5).rgb);
+    
+    // The wider blur is rejected when it leaves the local luma range
+    float lumaB = Luma(rgbB);
+    FragColor = vec4((lumaB < lumaMin || lumaB > lumaMax) ? rgbA : rgbB, 1.0);
+}
+"""
+
+# =============================================================================
+# Bloom Shaders
+# =============================================================================
+
+# Half-precision storage where the driver has it (AMD or NVIDIA extensions),
+# plain floats otherwise. real/real3 hold low-precision intermediates such as
+# the bloom tiles in shared memory; fp16 halves their footprint. Must follow
+# #version directly, before any declaration.
+HALF_PRECISION = """#extension GL_AMD_gpu_shader_half_float : enable
+#extension GL_NV_gpu_shader5 : enable
+#if defined(GL_AMD_gpu_shader_half_float) || defined(GL_NV_gpu_shader5)
+#define real float16_t
+#define real3 f16vec3
+#else
+#define real float
+#define real3 vec3
+#endif
+"""
+
+# Per-frame bloom settings shared by the downsample and upsample passes.
+# u_Tent holds the centre, edge and corner weights of the separable 3x3
+# upsample kernel; u_Threshold and u_Knee are only read by the first pass.
+BLOOM_PARAMS_BLOCK = """
+layout (std140, binding = 4) uniform BloomParams {
+    vec4 u_Tent;
+    float u_Threshold;
+    float u_Knee;
+};
+"""
+
+BLOOM_DOWNSAMPLE_COMPUTE_SHADER = """#version 460 core
+""" + HALF_PRECISION + """
+// 13-tap downsample of one mip level into the next (Jimenez, "Next Generation
+// Post Processing in Call of Duty: Advanced Warfare"). Each workgroup loads its
+// source footprint into shared memory once and takes every tap from there.
+// The first pass (compiled with BLOOM_FIRST_PASS) reads the HDR scene, applies
+// the soft threshold and uses a Karis average to keep single bright pixels
+// from flickering.
+layout (local_size_x = 16, local_size_y = 16, local_size_z = 1) in;
+
+layout (binding = 0) uniform sampler2D u_Source;  // Scene texture or the bloom texture
+layout (binding = 1, r11f_g11f_b10f) uniform writeonly image2D u_Destination;  // Next bloom mip
+
+uniform int u_SourceLevel;
+""" + BLOOM_PARAMS_BLOCK + """
+// Source texels under the 16x16 outputs plus a 2 texel border
+const int TILE = 36;
+shared real3 s_tile[TILE][TILE];
+
+float Luminance(vec3 color) {
+    return dot(color, vec3(0.2126, 0.7152, 0.0722));
+}
+
+vec3 Prefilter(vec3 color) {
+    float brightness = max(color.r, max(color.g, color.b));
+    float soft = clamp(brightness - u_Threshold + u_Knee, 0.0, 2.0 * u_Knee);
+    soft = soft * soft / (4.0 * u_Knee + 1e-4);
+    float contribution = max(soft, brightness - u_Threshold) / max(brightness, 1e-4);
+    return color * contribution;
+}
+
+// Average of the 2x2 texels starting at p, i.e. one bilinear tap between them
+vec3 Box(ivec2 p) {
+    return vec3(real(0.25) * (s_tile[p.y][p.x] + s_tile[p.y][p.x + 1] +
+                              s_tile[p.y + 1][p.x] + s_tile[p.y + 1][p.x + 1]));
+}
+
+vec3 KarisWeighted(vec3 a, vec3 b, vec3 c, vec3 d, float weight, inout float total) {
+    vec3 group = 0.25 * (a + b + c + d);
+#ifdef BLOOM_FIRST_PASS
+    weight /= 1.0 + Luminance(group);
+#endif
+    total += weight;
+    return group * weight;
+}
+
+void main() {
+    ivec2 src_max = textureSize(u_Source, u_SourceLevel) - 1;
+    ivec2 origin = ivec2(gl_WorkGroupID.xy) * 32 - 2;
+    int local = int(gl_LocalInvocationIndex);
+    for (int i = local; i < TILE * TILE; i += 256) {
+        ivec2 t = ivec2(i % TILE, i / TILE);
+        vec3 color = texelFetch(u_Source, clamp(origin + t, ivec2(0), src_max), u_SourceLevel).rgb;
+#ifdef BLOOM_FIRST_PASS
+        color = Prefilter(color);
+#endif
+        s_tile[t.y][t.x] = real3(color);
+    }
+    barrier();
+    
+    ivec2 dst = ivec2(gl_GlobalInvocationID.xy);
+    if (dst.x >= imageSize(u_Destination).x || dst.y >= imageSize(u_Destination).y) {
+        return;
+    }
+    
+    // Taps are 2x2 boxes centred -2..2 source texels around the output centre
+    ivec2 c = ivec2(gl_LocalInvocationID.xy) * 2 + 2;
+    vec3 a = Box(c + ivec2(-2, -2)), b = Box(c + ivec2(0, -2)), d = Box(c + ivec2(2, -2));
+    vec3 e = Box(c + ivec2(-1, -1)), f = Box(c + ivec2(1, -1));
+    vec3 g = Box(c + ivec2(-2, 0)), h = Box(c), i = Box(c + ivec2(2, 0));
+    vec3 j = Box(c + ivec2(-1, 1)), k = Box(c + ivec2(1, 1));
+    vec3 l = Box(c + ivec2(-2, 2)), m = Box(c + ivec2(0, 2)), n = Box(c + ivec2(2, 2));
+    
+    float total = 0.0;
+    vec3 result = KarisWeighted(e, f, j, k, 0.5, total);
+    result += KarisWeighted(a, b, g, h, 0.125, total);
+    result += KarisWeighted(b, d, h, i, 0.125, total);
+    result += KarisWeighted(g, h, l, m, 0.125, total);
+    result += KarisWeighted(h, i, m, n, 0.125, total);
+    imageStore(u_Destination, dst, vec4(result / total, 1.0));
+}
+"""
+
+BLOOM_UPSAMPLE_COMPUTE_SHADER = """#version 460 core
+""" + HALF_PRECISION + """
+// 3x3 tent upsample of one bloom mip, added into the level above. The tent
+// weights come from BloomParams, so one binary serves every filter radius. Each
+// invocation owns one source texel and writes the 2x2 destination texels it
+// covers; the tent-filtered tile (plus a 1 texel border) lives in shared memory.
+layout (local_size_x = 16, local_size_y = 16, local_size_z = 1) in;
+
+layout (binding = 0) uniform sampler2D u_Source;  // Bloom texture, read at u_SourceLevel
+layout (binding = 1, r11f_g11f_b10f) uniform image2D u_Destination;  // Bloom mip u_SourceLevel - 1
+
+uniform int u_SourceLevel;
+""" + BLOOM_PARAMS_BLOCK + """
+shared real3 s_raw[20][20];
+shared real3 s_tile[18][18];
+
+void main() {
+    ivec2 src_max = textureSize(u_Source, u_SourceLevel) - 1;
+    ivec2 origin = ivec2(gl_WorkGroupID.xy) * 16 - 2;
+    int local = int(gl_LocalInvocationIndex);
+    for (int i = local; i < 20 * 20; i += 256) {
+        ivec2 t = ivec2(i % 20, i / 20);
+        s_raw[t.y][t.x] = real3(texelFetch(u_Source, clamp(origin + t, ivec2(0), src_max), u_SourceLevel).rgb);
+    }
+    barrier();
+    
+    for (int i = local; i < 18 * 18; i += 256) {
+        ivec2 t = ivec2(i % 18, i / 18) + 1;
+        s_tile[t.y - 1][t.x - 1] =
+            real(u_Tent.x) * s_raw[t.y][t.x] +
+            real(u_Tent.y) * (s_raw[t.y][t.x - 1] + s_raw[t.y][t.x + 1] + s_raw[t.y - 1][t.x] + s_raw[t.y + 1][t.x]) +
+            real(u_Tent.z) * (s_raw[t.y - 1][t.x - 1] + s_raw[t.y - 1][t.x + 1] +
+                              s_raw[t.y + 1][t.x - 1] + s_raw[t.y + 1][t.x + 1]);
+    }
+    barrier();
+    
+    // Destination texel 2s + o sits a quarter texel from source texel s, so it
+    // blends s (3/4) with its neighbour towards o (1/4)
+    ivec2 s = ivec2(gl_LocalInvocationID.xy) + 1;
+    ivec2 dst_size = imageSize(u_Destination);
+    for (int oy = 0; oy < 2; ++oy) {
+        for (int ox = 0; ox < 2; ++ox) {
+            ivec2 dst = ivec2(gl_GlobalInvocationID.xy) * 2 + ivec2(ox, oy);
+            if (dst.x >= dst_size.x || dst.y >= dst_size.y) {
+                continue;
+            }
+            ivec2 n = s + ivec2(ox * 2 - 1, oy * 2 - 1);
+            vec3 bloom = vec3(real(0.5625) * s_tile[s.y][s.x] + real(0.1875) * (s_tile[s.y][n.x] + s_tile[n.y][s.x]) +
+                              real(0.0625) * s_tile[n.y][n.x]);
+            imageStore(u_Destination, dst, imageLoad(u_Destination, dst) + vec4(bloom, 0.0));
+        }
+    }
+}
+"""
+
+# =============================================================================
+# Volumetric Lighting Shaders
+# =============================================================================
+
+MAX_Z_DOWNSAMPLE_COMPUTE_SHADER = """#version 460 core
+// One 2x2 max reduction step; run log2(factor) times to build the tile max-depth texture
+layout (local_size_x = 8, local_size_y = 8, local_size_z = 1) in;
+
+layout (binding = 0) uniform sampler2D u_Source;  // Depth buffer or previous level
+layout (binding = 1, r32f) uniform writeonly image2D u_Destination;
+
+void main() {
+    ivec2 dst = ivec2(gl_GlobalInvocationID.xy);
+    ivec2 dst_size = imageSize(u_Destination);
+    if (dst.x >= dst_size.x || dst.y >= dst_size.y) {
+        return;
+    }
+    
+    // Clamp so odd-sized sources still cover their last row and column
+    ivec2 src_max = textureSize(u_Source, 0) - 1;
+    ivec2 src = dst * 2;
+    float z = max(
+        max(texelFetch(u_Source, min(src, src_max), 0).r,
+            texelFetch(u_Source, min(src + ivec2(1, 0), src_max), 0).r),
+        max(texelFetch(u_Source, min(src + ivec2(0, 1), src_max), 0).r,
+            texelFetch(u_Source, min(src + ivec2(1, 1), src_max), 0).r));
+    imageStore(u_Destination, dst, vec4(z));
+}
+"""
+
+VOLUMETRIC_COMPUTE_SHADER = """#version 460 core
+// Froxel raymarch in a single dispatch: each invocation walks one froxel
+// column front to back instead of ping-ponging between depth slices.
+// Slices behind the tile's max depth are occluded and not lit.
+layout (local_size_x = 8, local_size_y = 8, local_size_z = 1) in;
+
+layout (binding = 0, rgba16f) uniform writeonly image3D u_Volume;  // rgb = in-scatter, a = transmittance
+layout (binding = 8) uniform sampler2D u_MaxZ;  // PostProcessor.params['volumetric_max_z_binding']
+
+uniform mat4 u_InvViewProjection;
+uniform vec3 u_CameraPos;
+uniform vec3 u_LightDirection;  // Direction the light travels
+uniform vec3 u_LightColor;
+uniform float u_Intensity;
+uniform float u_Density;
+uniform float u_Scattering;     // Henyey-Greenstein anisotropy
+
+const float PI = 3.14159265359;
+const float MAX_Z_EPSILON = 1e-4;
+
+float PhaseHG(float cosTheta, float g) {
+    float g2 = g * g;
+    return (1.0 - g2) / (4.0 * PI * pow(1.0 + g2 - 2.0 * g * cosTheta, 1.5));
+}
+
+vec3 WorldPosition(vec2 uv, float depth) {
+    vec4 world = u_InvViewProjection * vec4(uv * 2.0 - 1.0, depth * 2.0 - 1.0, 1.0);
+    return world.xyz / world.w;
+}
+
+void main() {
+    ivec3 size = imageSize(u_Volume);
+    ivec2 cell = ivec2(gl_GlobalInvocationID.xy);
+    if (cell.x >= size.x || cell.y >= size.y) {
+        return;
+    }
+    
+    vec2 uv = (vec2(cell) + 0.5) / vec2(size.xy);
+    float maxZ = texture(u_MaxZ, uv).r;
+    
+    vec3 scattered = vec3(0.0);
+    float transmittance = 1.0;
+    vec3 previous = WorldPosition(uv, 0.0);
+    for (int slice = 0; slice < size.z; ++slice) {
+        float depth = (float(slice) + 0.5) / float(size.z);
+        if (depth > maxZ + MAX_Z_EPSILON) {
+            // Hidden behind geometry: carry the accumulated value to the back
+            for (; slice < size.z; ++slice) {
+                imageStore(u_Volume, ivec3(cell, slice), vec4(scattered, transmittance));
+            }
+            break;
+        }
+        
+        vec3 position = WorldPosition(uv, depth);
+        float stepLength = length(position - previous);
+        previous = position;
+        
+        vec3 viewDir = normalize(position - u_CameraPos);
+        float sliceTransmittance = exp(-u_Density * stepLength);
+        vec3 inScatter = u_LightColor * u_Intensity * PhaseHG(dot(viewDir, -u_LightDirection), u_Scattering);
+        scattered += transmittance * inScatter * (1.0 - sliceTransmittance);
+        transmittance *= sliceTransmittance;
+        imageStore(u_Volume, ivec3(cell, slice), vec4(scattered, transmittance));
+    }
 }
 """
 
@@ -705,37 +1522,65 @@ SHADERS = {
     
     # Lighting shaders
     'lighting': {
-        'vertex': LIGHTING_VERTEX_SHADER,
+        'vertex': FULLSCREEN_TRIANGLE_VERTEX_SHADER,
         'fragment': LIGHTING_FRAGMENT_SHADER
     },
     
+    'light_clusters': {
+        'compute': LIGHT_CLUSTER_COMPUTE_SHADER
+    },
+    
     # Post-processing shaders
     'post': {
-        'vertex': POST_PROCESSING_VERTEX_SHADER,
+        'vertex': FULLSCREEN_TRIANGLE_VERTEX_SHADER,
     },
     
+    # Standalone bloom combine and tone mapping passes, kept for callers that
+    # run them separately; the renderers fuse both into 'composite'
     'bloom': {
+        'vertex': FULLSCREEN_TRIANGLE_VERTEX_SHADER,
         'fragment': BLOOM_FRAGMENT_SHADER
     },
     
     'ssao': {
+        'vertex': FULLSCREEN_TRIANGLE_VERTEX_SHADER,
         'fragment': SSAO_FRAGMENT_SHADER
     },
     
+    'ssao_blur': {
+        'vertex': FULLSCREEN_TRIANGLE_VERTEX_SHADER,
+        'fragment': SSAO_BLUR_FRAGMENT_SHADER
+    },
+    
+    'ssao_upsample': {
+        'vertex': FULLSCREEN_TRIANGLE_VERTEX_SHADER,
+        'fragment': SSAO_UPSAMPLE_FRAGMENT_SHADER
+    },
+    
     'tone_mapping': {
+        'vertex': FULLSCREEN_TRIANGLE_VERTEX_SHADER,
         'fragment': TONE_MAPPING_FRAGMENT_SHADER
     },
     
+    'fxaa': {
+        'vertex': FULLSCREEN_TRIANGLE_VERTEX_SHADER,
+        'fragment': FXAA_FRAGMENT_SHADER
+    },
+    
+    'composite': {
+        'vertex': FULLSCREEN_TRIANGLE_VERTEX_SHADER,
+        'fragment': COMPOSITE_FRAGMENT_SHADER
+    },
+    
     # Skybox shaders
     'skybox': {
         'vertex': SKYBOX_VERTEX_SHADER,
         'fragment': SKYBOX_FRAGMENT_SHADER
     },
     
-    # Shadow mapping shaders
+    # Shadow mapping: depth only, so no fragment stage
     'shadow_map': {
-        'vertex': SHADOW_MAP_VERTEX_SHADER,
-        'fragment': SHADOW_MAP_FRAGMENT_SHADER
+        'vertex': SHADOW_MAP_VERTEX_SHADER
     },
     
     # Debug shaders
@@ -744,8 +1589,31 @@ SHADERS = {
         'fragment': DEBUG_FRAGMENT_SHADER
     },
     
-    # Fullscreen quad shader
+    # Fullscreen pass vertex shader (one triangle from gl_VertexID)
     'fullscreen_quad': {
-        'vertex': FULLSCREEN_QUAD_VERTEX_SHADER
+        'vertex': FULLSCREEN_TRIANGLE_VERTEX_SHADER
+    },
+    
+    # Texture copy drawn with TextureBlitter
+    'blit': {
+        'vertex': FULLSCREEN_TRIANGLE_VERTEX_SHADER,
+        'fragment': BLIT_FRAGMENT_SHADER
+    },
+    
+    # Volumetric lighting compute shaders
+    'max_z_downsample': {
+        'compute': MAX_Z_DOWNSAMPLE_COMPUTE_SHADER
+    },
+    
+    'volumetric': {
+        'compute': VOLUMETRIC_COMPUTE_SHADER
+    },
+    
+    # Bloom mip chain shaders
+    'bloom_downsample': {
+        'compute': BLOOM_DOWNSAMPLE_COMPUTE_SHADER
+    },
+    'bloom_upsample': {
+        'compute': BLOOM_UPSAMPLE_COMPUTE_SHADER
     }
 }
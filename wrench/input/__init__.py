@@ -1,12 +1,15 @@
 """
 Helper functions and classes for input management.
 """
-from typing import Dict, List, Callable, Any, Optional
+from typing import Dict, List, Callable, Any, Optional, Tuple
 import pygame
 
-# Event handlers
-_key_handlers: Dict[int, List[Callable[[pygame.event.Event], None]]] = {}
-_mouse_handlers: Dict[int, List[Callable[[pygame.event.Event], None]]] = {}
+# Event handlers, keyed by what they wait for so dispatch needs no checks
+_key_down_handlers: Dict[int, List[Callable[[], None]]] = {}
+_key_up_handlers: Dict[int, List[Callable[[], None]]] = {}
+_mouse_down_handlers: Dict[int, List[Callable[[int, int], None]]] = {}
+_mouse_up_handlers: Dict[int, List[Callable[[int, int], None]]] = {}
+_mouse_motion_handlers: List[Callable[[int, int, int, int], None]] = []
 _update_handlers: List[Callable[[float], None]] = []
 
 # Keyboard state
@@ -17,9 +20,7 @@ _mouse_rel: Tuple[int, int] = (0, 0)
 
 def on_key_press(key: int, callback: Callable[[], None]) -> None:
     """Registers a function to be called when the specified key is pressed."""
-    if key not in _key_handlers:
-        _key_handlers[key] = []
-    _key_handlers[key].append(lambda e: callback())
+    _key_down_handlers.setdefault(key, []).append(callback)
 
 def on_key_down(key: int, callback: Callable[[], None]) -> None:
     """Registers a function to be called when the specified key is pressed."""
@@ -27,33 +28,23 @@ def on_key_down(key: int, callback: Callable[[], None]) -> None:
 
 def on_key_up(key: int, callback: Callable[[], None]) -> None:
     """Registers a function to be called when the specified key is released."""
-    if key not in _key_handlers:
-        _key_handlers[key] = []
-    _key_handlers[key].append(lambda e: callback() if e.type == pygame.KEYUP else None)
+    _key_up_handlers.setdefault(key, []).append(callback)
 
 def on_mouse_click(button: int, callback: Callable[[int, int], None]) -> None:
     """Registers a handler for mouse clicks."""
-    if button not in _mouse_handlers:
-        _mouse_handlers[button] = []
-    _mouse_handlers[button].append(lambda e, b=button: callback(e.pos[0], e.pos[1]) if e.type == pygame.MOUSEBUTTONDOWN and e.button == b else None)
+    on_mouse_down(button, callback)
 
 def on_mouse_down(button: int, callback: Callable[[int, int], None]) -> None:
     """Registers a function to be called when a mouse button is pressed."""
-    if button not in _mouse_handlers:
-        _mouse_handlers[button] = []
-    _mouse_handlers[button].append(lambda e, b=button: callback(e.pos[0], e.pos[1]) if e.type == pygame.MOUSEBUTTONDOWN and e.button == b else None)
+    _mouse_down_handlers.setdefault(button, []).append(callback)
 
 def on_mouse_up(button: int, callback: Callable[[int, int], None]) -> None:
     """Registers a function to be called when a mouse button is released."""
-    if button not in _mouse_handlers:
-        _mouse_handlers[button] = []
-    _mouse_handlers[button].append(lambda e, b=button: callback(e.pos[0], e.pos[1]) if e.type == pygame.MOUSEBUTTONUP and e.button == b else None)
+    _mouse_up_handlers.setdefault(button, []).append(callback)
 
 def on_mouse_move(callback: Callable[[int, int, int, int], None]) -> None:
     """Registers a function to be called when the mouse moves."""
-    if -1 not in _mouse_handlers:
-        _mouse_handlers[-1] = []
-    _mouse_handlers[-1].append(lambda e: callback(e.pos[0], e.pos[1], e.rel[0], e.rel[1]) if e.type == pygame.MOUSEMOTION else None)
+    _mouse_motion_handlers.append(callback)
 
 def on_update(callback: Callable[[float], None]) -> None:
     """Registers a function to be called on each frame update."""
@@ -75,42 +66,60 @@ def get_mouse_rel() -> Tuple[int, int]:
     """Returns the relative mouse movement since the last call."""
     return _mouse_rel
 
+def _on_key_down(event: pygame.event.Event) -> None:
+    _key_state[event.key] = True
+    for handler in _key_down_handlers.get(event.key, ()):
+        handler()
+
+def _on_key_up(event: pygame.event.Event) -> None:
+    _key_state[event.key] = False
+    for handler in _key_up_handlers.get(event.key, ()):
+        handler()
+
+def _on_mouse_down(event: pygame.event.Event) -> None:
+    _mouse_state[event.button] = True
+    x, y = event.pos
+    for handler in _mouse_down_handlers.get(event.button, ()):
+        handler(x, y)
+
+def _on_mouse_up(event: pygame.event.Event) -> None:
+    _mouse_state[event.button] = False
+    x, y = event.pos
+    for handler in _mouse_up_handlers.get(event.button, ()):
+        handler(x, y)
+
+def _on_mouse_motion(event: pygame.event.Event) -> None:
+    global _mouse_pos, _mouse_rel
+    _mouse_pos = event.pos
+    _mouse_rel = event.rel
+    if _mouse_motion_handlers:  # Genel fare hareket işleyicileri
+        x, y = event.pos
+        dx, dy = event.rel
+        for handler in _mouse_motion_handlers:
+            handler(x, y, dx, dy)
+
+# Event type -> handler; other event types are ignored
+_DISPATCH: Dict[int, Callable[[pygame.event.Event], None]] = {
+    pygame.KEYDOWN: _on_key_down,
+    pygame.KEYUP: _on_key_up,
+    pygame.MOUSEBUTTONDOWN: _on_mouse_down,
+    pygame.MOUSEBUTTONUP: _on_mouse_up,
+    pygame.MOUSEMOTION: _on_mouse_motion,
+}
+
 def _handle_event(event: pygame.event.Event) -> None:
     """Handles incoming events."""
-    global _mouse_pos, _mouse_rel
-    
-    # Klavye olayları
-    if event.type == pygame.KEYDOWN:
-        _key_state[event.key] = True
-        if event.key in _key_handlers:
-            for handler in _key_handlers[event.key]:
-                handler(event)
-    
-    elif event.type == pygame.KEYUP:
-        _key_state[event.key] = False
-        if event.key in _key_handlers:
-            for handler in _key_handlers[event.key]:
-                handler(event)
-    
-    # Fare olayları
-    elif event.type == pygame.MOUSEBUTTONDOWN:
-        _mouse_state[event.button] = True
-        if event.button in _mouse_handlers:
-            for handler in _mouse_handlers[event.button]:
-                handler(event)
-    
-    elif event.type == pygame.MOUSEBUTTONUP:
-        _mouse_state[event.button] = False
-        if event.button in _mouse_handlers:
-            for handler in _mouse_handlers[event.button]:
-                handler(event)
-    
-    elif event.type == pygame.MOUSEMOTION:
-        _mouse_pos = event.pos
-        _mouse_rel = event.rel
-        if -1 in _mouse_handlers:  # Genel fare hareket işleyicileri
-            for handler in _mouse_handlers[-1]:
-                handler(event)
+    handler = _DISPATCH.get(event.type)
+    if handler is not None:
+        handler(event)
+
+def _dispatch_events(events: List[pygame.event.Event]) -> None:
+    """Handles one frame's batch of events from pygame.event.get()."""
+    dispatch = _DISPATCH.get
+    for event in events:
+        handler = dispatch(event.type)
+        if handler is not None:
+            handler(event)
 
 def _update(delta_time: float) -> None:
     """Calls all update handlers."""
@@ -10,12 +10,35 @@ import platform
 import subprocess
 import ctypes
 import shutil
+import importlib.util
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 
+# Import names of packages whose distribution name differs
+_MODULE_NAMES = {
+    'PyOpenGL': 'OpenGL',
+    'PyOpenGL_accelerate': 'OpenGL_accelerate',
+    'PyOpenGL-accelerate': 'OpenGL_accelerate',
+    'pywin32': 'win32api',
+}
+
+def _is_installed(package: str) -> bool:
+    """Check whether a package can be imported, without importing it."""
+    name = package.split('>=')[0].split('==')[0]
+    name = _MODULE_NAMES.get(name, name.replace('-', '_'))
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
 def check_requirements() -> Dict[str, bool]:
     """
     Check if the system meets the minimum requirements for Wrench Engine.
     
+    Each check runs once per process and is cached; call
+    clear_requirements_cache() to re-run them, e.g. after creating the
+    OpenGL context or installing dependencies.
+    
     Returns:
         Dict containing the status of each requirement check.
     """
@@ -34,10 +57,18 @@ def check_requirements() -> Dict[str, bool]:
     
     return requirements
 
+def clear_requirements_cache() -> None:
+    """Forget cached requirement checks so the next call re-runs them."""
+    for check in (check_python_version, check_opengl_version, check_ram, check_disk_space,
+                  check_gpu, check_dependencies, check_permissions):
+        check.cache_clear()
+
+@lru_cache(maxsize=None)
 def check_python_version(min_version: Tuple[int, int, int] = (3, 8, 0)) -> bool:
     """Check if the Python version meets the minimum requirement."""
     return sys.version_info >= min_version
 
+@lru_cache(maxsize=None)
 def check_opengl_version(min_version: Tuple[int, int] = (3, 3)) -> bool:
     """Check if the system supports the minimum required OpenGL version."""
     try:
@@ -56,6 +87,7 @@ def check_opengl_version(min_version: Tuple[int, int] = (3, 3)) -> bool:
     except Exception:
         return False
 
+@lru_cache(maxsize=None)
 def check_ram(min_gb: int = 4) -> bool:
     """Check if the system has at least the minimum required RAM."""
     try:
@@ -64,6 +96,7 @@ def check_ram(min_gb: int = 4) -> bool:
     except Exception:
         return False
 
+@lru_cache(maxsize=None)
 def check_disk_space(min_gb: int = 2, path: str = '.') -> bool:
     """Check if there's enough disk space available."""
     try:
@@ -72,6 +105,7 @@ def check_disk_space(min_gb: int = 2, path: str = '.') -> bool:
     except Exception:
         return False
 
+@lru_cache(maxsize=None)
 def check_gpu() -> bool:
     """Check if the system has a compatible GPU."""
     try:
@@ -88,18 +122,13 @@ def check_gpu() -> bool:
         except:
             return False
 
+@lru_cache(maxsize=None)
 def check_dependencies() -> bool:
     """Check if all required dependencies are installed."""
     required = ['numpy', 'pygame', 'PyOpenGL', 'PyOpenGL_accelerate']
-    
-    for package in required:
-        try:
-            __import__(package)
-        except ImportError:
-            return False
-    
-    return True
+    return all(_is_installed(package) for package in required)
 
+@lru_cache(maxsize=None)
 def check_permissions() -> bool:
     """Check if we have the necessary permissions."""
     try:
@@ -164,11 +193,10 @@ def install_missing_dependencies() -> bool:
         
         # Install each package
         for package in requirements:
-            try:
-                __import__(package.split('>=')[0].split('==')[0])
-            except ImportError:
+            if not _is_installed(package):
                 subprocess.check_call([sys.executable, '-m', 'pip', 'install', package])
         
+        check_dependencies.cache_clear()
         return True
     except Exception as e:
         print(f"Failed to install dependencies: {e}")
@@ -6,23 +6,83 @@ This module contains functions to optimize graphics settings and shaders.
 
 import os
 import json
+import time
 import platform
 from typing import Dict, Any, Optional
 
-def optimize_shaders() -> None:
-    """Optimize shaders for the current hardware."""
-    # Get the shader cache directory
-    shader_cache_dir = os.path.join(os.path.dirname(__file__), '..', 'cache', 'shaders')
-    os.makedirs(shader_cache_dir, exist_ok=True)
+# Shader cache directory; vendor.json in it remembers the detected GPU vendor
+SHADER_CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', 'cache', 'shaders')
+
+# Re-probe the GPU vendor once the cached result is this old
+VENDOR_CACHE_MAX_AGE_DAYS = 7
+
+def get_graphics_info() -> Dict[str, Any]:
+    """
+    Get GPU information from the current OpenGL context.
+    
+    Returns:
+        Dict with 'gpu_vendor' and 'gpu_renderer'; both are empty without a
+        current context or PyOpenGL.
+    """
+    try:
+        from OpenGL import GL
+        vendor = GL.glGetString(GL.GL_VENDOR)
+        renderer = GL.glGetString(GL.GL_RENDERER)
+    except Exception:
+        vendor = renderer = None
+    return {
+        'gpu_vendor': vendor.decode('utf-8', 'replace') if vendor else '',
+        'gpu_renderer': renderer.decode('utf-8', 'replace') if renderer else ''
+    }
+
+def get_gpu_vendor(probe: bool = True) -> str:
+    """
+    Get the GPU vendor, preferably from the vendor.json cache.
     
-    # Get system information
-    system_info = get_graphics_info()
+    The driver is only probed (get_graphics_info) when the cache is missing
+    or older than VENDOR_CACHE_MAX_AGE_DAYS, and a successful probe is
+    written back.
     
-    # Optimize shader compilation based on GPU
-    if 'NVIDIA' in system_info.get('gpu_vendor', ''):
+    Args:
+        probe: Whether to probe on a cache miss; False returns '' instead,
+            e.g. before any OpenGL context exists.
+    """
+    cache_path = os.path.join(SHADER_CACHE_DIR, 'vendor.json')
+    try:
+        with open(cache_path, 'r') as f:
+            cached = json.load(f)
+        if time.time() - cached['detected_at'] < VENDOR_CACHE_MAX_AGE_DAYS * 86400:
+            return cached['vendor']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    
+    if not probe:
+        return ''
+    vendor = get_graphics_info()['gpu_vendor']
+    if vendor:
+        try:
+            os.makedirs(SHADER_CACHE_DIR, exist_ok=True)
+            with open(cache_path, 'w') as f:
+                json.dump({'vendor': vendor, 'detected_at': time.time()}, f)
+        except OSError:
+            pass
+    return vendor
+
+def apply_vendor_environment(vendor: str) -> None:
+    """
+    Set the driver environment variables for a GPU vendor.
+    
+    Drivers read them when the OpenGL context is created, so this has to
+    run before pygame.display.set_mode.
+    """
+    if 'NVIDIA' in vendor:
         os.environ['__GL_THREADED_OPTIMIZATIONS'] = '1'
-    elif 'AMD' in system_info.get('gpu_vendor', ''):
+    elif 'AMD' in vendor:
         os.environ['R600_ENABLE_SAMPLER_OPTIMIZATIONS'] = '1'
         os.environ['R600_DEBUG'] = 'nofmask'
-    elif 'Intel' in system_info.get('gpu_vendor', ''):
+    elif 'Intel' in vendor:
         os.environ['INTEL_DEBUG'] = 'noforcemip'
+
+def optimize_shaders() -> None:
+    """Optimize shaders for the current hardware."""
+    apply_vendor_environment(get_gpu_vendor())